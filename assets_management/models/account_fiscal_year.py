@@ -2,13 +2,98 @@
 # Copyright 2019 Openforce Srls Unipersonale (www.openforce.it)
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
-from odoo import _, api, fields, models
+from bisect import bisect_right
+
+from odoo import _, api, fields, models, tools
 from odoo.exceptions import UserError
 
 
 class AccountFiscalYear(models.Model):
     _inherit = 'account.fiscal.year'
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.clear_caches()
+        return super().create(vals_list)
+
+    @api.multi
+    def write(self, vals):
+        res = super().write(vals)
+        if {'company_id', 'date_from', 'date_to'}.intersection(vals):
+            self.clear_caches()
+        return res
+
+    @api.multi
+    def unlink(self):
+        res = super().unlink()
+        self.clear_caches()
+        return res
+
+    @api.model
+    @tools.ormcache('self.env.uid')
+    def get_fiscal_year_index(self):
+        """
+        Loads every fiscal year into an interval index, grouped by company.
+
+        The index is cached and cleared whenever fiscal years are created,
+        deleted or have their dates or company changed.
+        Returned values are shared by every caller: do not modify them.
+
+        :return: dict {company id: (starts, intervals)} where ``intervals`` is
+        a tuple of (date_from, date_to, fiscal year id) sorted by
+        ``date_from``, and ``starts`` holds the ``date_from`` of each interval
+        for bisection
+        """
+        intervals_by_company = {}
+        for fy_data in self.search([]).read(
+            ['company_id', 'date_from', 'date_to'], load=''
+        ):
+            intervals_by_company.setdefault(fy_data['company_id'], []).append(
+                (fy_data['date_from'], fy_data['date_to'], fy_data['id'])
+            )
+        index = {}
+        for company_id, intervals in intervals_by_company.items():
+            intervals = tuple(sorted(intervals))
+            index[company_id] = (
+                tuple(i[0] for i in intervals),
+                intervals,
+            )
+        return index
+
+    @api.model
+    def get_fiscal_year_id_by_date(self, date, company=None):
+        """
+        Looks up the fiscal year of given ``date`` by bisection over the
+        fiscal year index.
+
+        Fiscal years of the same company can't overlap: for each company, the
+        only candidate is the last fiscal year starting before ``date``. If
+        several companies match, the fiscal year that starts first is kept.
+
+        :return: fiscal year id, or False if none is found
+        """
+        date = fields.Date.to_date(date)
+        if not date:
+            return False
+        index = self.get_fiscal_year_index()
+        if company:
+            company_ids = company.ids
+        else:
+            company_ids = index.keys()
+        candidates = []
+        for company_id in company_ids:
+            if company_id not in index:
+                continue
+            starts, intervals = index[company_id]
+            pos = bisect_right(starts, date)
+            if pos:
+                date_from, date_to, fy_id = intervals[pos - 1]
+                if date_to >= date:
+                    candidates.append((date_from, fy_id))
+        if not candidates:
+            return False
+        return min(candidates)[1]
+
     @api.model
     def get_fiscal_year_by_date(
         self, date, limit=1, company=None, miss_raise=True
@@ -18,16 +103,38 @@ class AccountFiscalYear(models.Model):
 
         By default, only 1 fiscal year will be returned, unless specified
         differently.
-        If ``miss_raise`` is True and no fiscal year is found, an error will be
+        If ``miss_raise`` is True and no fiscal year is found, an error will be
         raised.
         """
-        dom = self.get_fiscal_year_by_date_domain(date, company)
-        fiscal_years = self.search(dom, limit=limit)
+        if limit == 1:
+            fiscal_years = self.browse(
+                self.get_fiscal_year_id_by_date(date, company=company)
+            )
+        else:
+            dom = self.get_fiscal_year_by_date_domain(date, company)
+            fiscal_years = self.search(dom, limit=limit)
         if not fiscal_years and miss_raise:
             date_str = fields.Date.to_string(date)
             raise UserError(_("No fiscal year defined for date ") + date_str)
         return fiscal_years
 
+    @api.model
+    def get_fiscal_years_by_dates(self, dates, company=None, miss_raise=True):
+        """
+        Retrieves fiscal years for every date in ``dates`` (datetime.date
+        objects) from the fiscal year index.
+
+        Returns a dict {date: fiscal year}; dates without fiscal year are
+        mapped to an empty recordset, unless ``miss_raise`` is True: in that
+        case, an error will be raised.
+        """
+        res = {}
+        for date in set(dates):
+            res[date] = self.get_fiscal_year_by_date(
+                date, company=company, miss_raise=miss_raise
+            )
+        return res
+
     @api.model
     def get_fiscal_year_by_date_domain(self, date, company=None):
         """
@@ -130,18 +130,23 @@ class Asset(models.Model):
         string="Used",
     )
 
-    @api.model
-    def create(self, vals):
+    @api.model_create_multi
+    def create(self, vals_list):
         # Add depreciation if it's missing while category is set
-        create_deps_from_categ = False
-        if vals.get('category_id') and not vals.get('depreciation_ids'):
-            create_deps_from_categ = True
-        if vals.get('code'):
-            vals['code'] = ' '.join(vals.get('code').split())
-        asset = super().create(vals)
-        if create_deps_from_categ:
-            asset.onchange_category_id()
-        return asset
+        create_deps_from_categ = []
+        for vals in vals_list:
+            create_deps_from_categ.append(
+                bool(vals.get('category_id'))
+                and not vals.get('depreciation_ids')
+            )
+            if vals.get('code'):
+                vals['code'] = ' '.join(vals.get('code').split())
+        assets = super().create(vals_list)
+        assets.browse([
+            asset.id for asset, create_deps
+            in zip(assets, create_deps_from_categ) if create_deps
+        ]).create_depreciations_from_category()
+        return assets
 
     @api.multi
     def write(self, vals):
@@ -250,6 +255,23 @@ class Asset(models.Model):
         act['context'] = ctx
         return act
 
+    def create_depreciations_from_category(self):
+        """
+        Creates depreciations of every asset from its category, as
+        `onchange_category_id` does, with a single `create()` call
+        """
+        dep_vals_list = []
+        for asset in self:
+            for vals in asset.category_id.get_depreciation_vals(
+                asset.purchase_amount
+            ):
+                vals.update({
+                    'asset_id': asset.id,
+                    'date_start': asset.purchase_date,
+                })
+                dep_vals_list.append(vals)
+        return self.env['asset.depreciation'].create(dep_vals_list)
+
     def get_asset_state(self):
         self.ensure_one()
         if not self.depreciation_ids:
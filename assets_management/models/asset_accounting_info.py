@@ -80,11 +80,11 @@ class AssetAccountingInfo(models.Model):
         string="Relation Type"
     )
 
-    @api.model
-    def create(self, vals):
-        info = super().create(vals)
-        info.check_and_normalize()
-        return info
+    @api.model_create_multi
+    def create(self, vals_list):
+        infos = super().create(vals_list)
+        infos.check_and_normalize()
+        return infos
 
     @api.multi
     def write(self, vals):
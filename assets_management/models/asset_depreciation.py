@@ -164,15 +164,15 @@ class AssetDepreciation(models.Model):
         string="Zero Depreciation Up To"
     )
 
-    @api.model
-    def create(self, vals):
-        dep = super().create(vals)
-        dep.normalize_first_dep_nr()
-        if dep.line_ids:
+    @api.model_create_multi
+    def create(self, vals_list):
+        deps = super().create(vals_list)
+        deps.normalize_first_dep_nr()
+        for dep in deps.filtered('line_ids'):
             num_lines = dep.line_ids.filtered('requires_depreciation_nr')
             if num_lines:
                 num_lines.normalize_depreciation_nr()
-        return dep
+        return deps
 
     @api.multi
     def write(self, vals):
@@ -327,11 +327,20 @@ class AssetDepreciation(models.Model):
         # Set new date within context if necessary
         self.check_before_generate_depreciation_lines(dep_date)
 
-        new_lines = self.env['asset.depreciation.line']
+        # Compute every amount at once, then create every line in one batch
+        vals_list = []
+        amounts = self.get_depreciation_amounts(dep_date)
         for dep in self:
-            new_lines |= dep.generate_depreciation_lines_single(dep_date)
+            dep_nr, dep_amount = amounts[dep.id]
+            vals_list.append(
+                dep.with_context(
+                    dep_nr=dep_nr,
+                    used_asset=dep.asset_id.used,
+                    dep_amount=dep_amount,
+                ).prepare_depreciation_line_vals(dep_date)
+            )
 
-        return new_lines
+        return self.env['asset.depreciation.line'].create(vals_list)
 
     def generate_depreciation_lines_single(self, dep_date):
         self.ensure_one()
@@ -360,9 +369,12 @@ class AssetDepreciation(models.Model):
 
     def get_computed_amounts(self):
         self.ensure_one()
+        # Lines are read only once: updated and residual amounts are
+        # computed from balances grouped by move type
+        balances = self.line_ids.get_balances_grouped()
         vals = {
             'amount_{}'.format(k): abs(v)
-            for k, v in self.line_ids.get_balances_grouped().items()
+            for k, v in balances.items()
             if 'amount_{}'.format(k) in self._fields
         }
 
@@ -377,12 +389,12 @@ class AssetDepreciation(models.Model):
             amt_dep = self.amount_depreciable
             vals.update({
                 'amount_depreciable_updated': amt_dep + sum([
-                    l.balance for l in self.line_ids
-                    if l.move_type in update_move_types
+                    balance for move_type, balance in balances.items()
+                    if move_type in update_move_types
                 ]),
                 'amount_residual': amt_dep + sum([
-                    l.balance for l in self.line_ids
-                    if l.move_type not in non_residual_types
+                    balance for move_type, balance in balances.items()
+                    if move_type not in non_residual_types
                 ])
             })
 
@@ -413,7 +425,133 @@ class AssetDepreciation(models.Model):
 
         return dep_amount
 
-    def get_depreciation_amount_multiplier(self, dep_date):
+    def get_depreciation_amounts(self, dep_date):
+        """
+        Bulk version of `get_depreciation_amount`: computes the depreciation
+        amount of every depreciation in `self` at date `dep_date`.
+        Line balances, depreciation numbers and fiscal years are loaded
+        with a few grouped queries instead of once per depreciation.
+        :return: dict {depreciation id: (dep_nr, dep_amount)}, where dep_nr
+        is the number the new depreciation line will get
+        """
+        if not self:
+            return {}
+        line_obj = self.env['asset.depreciation.line']
+        max_nrs = {
+            group['depreciation_id'][0]: group['depreciation_nr']
+            for group in line_obj.read_group(
+                [('depreciation_id', 'in', self.ids),
+                 ('move_type', 'in', line_obj.get_numbered_move_types()),
+                 ('partial_dismissal', '=', False)],
+                ['depreciation_id', 'depreciation_nr:max'],
+                ['depreciation_id'],
+            )
+        }
+        update_balances = {
+            group['depreciation_id'][0]: group['balance']
+            for group in line_obj.read_group(
+                [('depreciation_id', 'in', self.ids),
+                 ('move_type', 'in', line_obj.get_update_move_types()),
+                 ('date', '<=', dep_date)],
+                ['depreciation_id', 'balance'],
+                ['depreciation_id'],
+            )
+        }
+        fiscal_years = self.get_pro_rata_temporis_fiscal_years(dep_date)
+
+        digits = self.env['decimal.precision'].precision_get('Account')
+        res = {}
+        for dep in self:
+            dep_nr = (max_nrs.get(dep.id) or 0) + 1
+            zero_dep_date = dep.zero_depreciation_until
+            if zero_dep_date and dep_date <= zero_dep_date:
+                res[dep.id] = (dep_nr, 0)
+                continue
+
+            amount = dep.amount_depreciable + (update_balances.get(dep.id) or 0)
+            multiplier = dep.with_context(
+                dep_nr=dep_nr, used_asset=dep.asset_id.used
+            ).get_depreciation_amount_multiplier(
+                dep_date, fiscal_years=fiscal_years.get(dep.company_id)
+            )
+            dep_amount = round(amount * multiplier, digits)
+
+            # If amount_residual < dep_amount: use amount_residual as
+            # dep_amount
+            if float_compare(dep.amount_residual, dep_amount, digits) < 0:
+                dep_amount = dep.amount_residual
+            res[dep.id] = (dep_nr, dep_amount)
+        return res
+
+    def get_previsional_depreciation_amounts(self, dep_dates):
+        """
+        Projects the amounts of the depreciation lines that would be
+        generated for `self` at each date of `dep_dates`, one after the
+        other, with the same rules as `get_depreciation_amount`; pro rata
+        temporis is forced on the last date.
+        Nothing is written: each projected amount only updates the residual
+        amount and the depreciation number used for the following dates.
+        :param dep_dates: list of dates, sorted
+        :return: list of amounts, one for each date
+        """
+        self.ensure_one()
+        digits = self.env['decimal.precision'].precision_get('Account')
+        update_move_types = self.line_ids.get_update_move_types()
+        update_lines = self.line_ids.filtered(
+            lambda l: l.move_type in update_move_types
+        )
+        dep_nr = self.get_max_depreciation_nr()
+        amount_residual = self.amount_residual
+        zero_dep_date = self.zero_depreciation_until
+
+        amounts = []
+        for num, dep_date in enumerate(dep_dates, 1):
+            dep_nr += 1
+            if zero_dep_date and dep_date <= zero_dep_date:
+                amounts.append(0)
+                continue
+
+            dep = self.with_context(
+                dep_nr=dep_nr,
+                force_prorata=num == len(dep_dates)
+                or self._context.get('force_prorata'),
+                used_asset=self.asset_id.used,
+            )
+            amount = self.amount_depreciable + sum(
+                l.balance for l in update_lines if l.date <= dep_date
+            )
+            multiplier = dep.get_depreciation_amount_multiplier(dep_date)
+            dep_amount = round(amount * multiplier, digits)
+            if float_compare(amount_residual, dep_amount, digits) < 0:
+                dep_amount = amount_residual
+            amount_residual -= dep_amount
+            amounts.append(dep_amount)
+        return amounts
+
+    def get_pro_rata_temporis_fiscal_years(self, dep_date):
+        """
+        Retrieves fiscal years needed by pro rata temporis computations for
+        depreciations in `self` at date `dep_date`.
+        :return: dict {company: {date: fiscal year}}
+        """
+        force_prorata = self._context.get('force_prorata')
+        deps = self.filtered(lambda d: d.pro_rata_temporis or force_prorata)
+        fiscal_year_obj = self.env['account.fiscal.year']
+        res = {}
+        for company in deps.mapped('company_id'):
+            company_deps = deps.filtered(lambda d: d.company_id == company)
+            dates = set(company_deps.mapped('date_start'))
+            dates.add(dep_date)
+            res[company] = fiscal_year_obj.get_fiscal_years_by_dates(
+                dates, company=company
+            )
+        return res
+
+    def get_depreciation_amount_multiplier(self, dep_date, fiscal_years=None):
+        """
+        :param fiscal_years: optional dict {date: fiscal year} used instead
+        of searching fiscal years for pro rata temporis computations
+        """
         self.ensure_one()
 
         # Base multiplier
@@ -433,13 +571,16 @@ class AssetDepreciation(models.Model):
             )
 
         if self.pro_rata_temporis or self._context.get('force_prorata'):
+            fiscal_years = fiscal_years or {}
             fiscal_year_obj = self.env['account.fiscal.year']
-            fy_start = fiscal_year_obj.get_fiscal_year_by_date(
-                date_start, company=self.company_id
-            )
-            fy_dep = fiscal_year_obj.get_fiscal_year_by_date(
-                dep_date, company=self.company_id
-            )
+            fy_start = fiscal_years.get(date_start) \
+                or fiscal_year_obj.get_fiscal_year_by_date(
+                    date_start, company=self.company_id
+                )
+            fy_dep = fiscal_years.get(dep_date) \
+                or fiscal_year_obj.get_fiscal_year_by_date(
+                    dep_date, company=self.company_id
+                )
             if fy_dep == fy_start:
                 # If current depreciation lies within the same fiscal year in
                 # which the asset was registered, compute multiplier as a
@@ -449,17 +590,17 @@ class AssetDepreciation(models.Model):
                 fy_start = fields.Date.from_string(fy_dep.date_from)
                 lapse = (fy_end - fy_start).days + 1
                 dep_multiplier = self.get_pro_rata_temporis_multiplier(
-                    dep_date, 'dte'
+                    dep_date, 'dte', fiscal_year=fy_dep
                 )
                 start_multiplier = self.get_pro_rata_temporis_multiplier(
-                    self.date_start, 'dte'
+                    self.date_start, 'dte', fiscal_year=fy_dep
                 )
                 multiplier *= start_multiplier - dep_multiplier + 1 / lapse
             else:
                 # Otherwise, simply compute multiplier with respect to how
                 # many days have passed since the beginning of the fiscal year
                 multiplier *= self.get_pro_rata_temporis_multiplier(
-                    dep_date, 'std'
+                    dep_date, 'std', fiscal_year=fy_dep
                 )
 
         return multiplier
@@ -515,12 +656,13 @@ class AssetDepreciation(models.Model):
             nums = [0]
         return max(nums)
 
-    def get_pro_rata_temporis_dates(self, date):
+    def get_pro_rata_temporis_dates(self, date, fiscal_year=None):
         """
         Gets useful dates for pro rata temporis computations, according to
         given date, by retrieving its fiscal year.
 
         :param date: given date for depreciation
+        :param fiscal_year: fiscal year of given date, if already known
         :return: date objects triplet (dt_start, dt, dt_end)
             - dt_start: fiscal year first day
             - dt: given date
@@ -531,10 +673,9 @@ class AssetDepreciation(models.Model):
                 _("Cannot compute pro rata temporis for unknown date.")
             )
 
-        fiscal_year_obj = self.env['account.fiscal.year']
-        fiscal_year = fiscal_year_obj.get_fiscal_year_by_date(
-            date, company=self.company_id
-        )
+        if not fiscal_year:
+            fiscal_year = self.env['account.fiscal.year']\
+                .get_fiscal_year_by_date(date, company=self.company_id)
         if not fiscal_year:
             date_str = fields.Date.from_string(date).strftime('%d/%m/%Y')
             raise ValidationError(
@@ -547,11 +688,13 @@ class AssetDepreciation(models.Model):
             fields.Date.from_string(fiscal_year.date_to)
         )
 
-    def get_pro_rata_temporis_multiplier(self, date=None, mode='std'):
+    def get_pro_rata_temporis_multiplier(self, date=None, mode='std',
+                                         fiscal_year=None):
         """
         Computes and returns pro rata temporis multiplier according to given
         depreciation, date, fiscal year and mode
         :param date: given date as a fields.Date string
+        :param fiscal_year: fiscal year of given date, if already known
         :param mode: string, defines how to compute multiplier. Valid values:
             - 'std': start-to-date, computes multiplier using days from fiscal
                      year's first day to given date;
@@ -562,7 +705,9 @@ class AssetDepreciation(models.Model):
         if not (self.pro_rata_temporis or self._context.get('force_prorata')):
             return 1
 
-        dt_start, dt, dt_end = self.get_pro_rata_temporis_dates(date)
+        dt_start, dt, dt_end = self.get_pro_rata_temporis_dates(
+            date, fiscal_year=fiscal_year
+        )
         lapse = (dt_end - dt_start).days + 1
         if mode == 'std':
             return ((dt - dt_start).days + 1) / lapse
@@ -607,9 +752,15 @@ class AssetDepreciation(models.Model):
             if force or d.need_normalize_first_dep_nr():
                 d.onchange_normalize_first_dep_nr()
 
-    def post_generate_depreciation_lines(self, lines=None):
+    def post_generate_depreciation_lines(self, lines=None, group_moves=False):
+        """
+        :param group_moves: if True, create a single account move for lines
+        with the same category, journal and date
+        """
         lines = lines or self.env['asset.depreciation.line']
-        lines.filtered('requires_account_move').button_generate_account_move()
+        lines.filtered('requires_account_move').generate_account_move(
+            group=group_moves
+        )
 
     def prepare_depreciation_line_vals(self, dep_date):
         self.ensure_one()
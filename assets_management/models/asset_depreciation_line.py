@@ -2,8 +2,14 @@
 # Copyright 2019 Openforce Srls Unipersonale (www.openforce.it)
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
+from collections import OrderedDict, defaultdict
+
 from odoo import _, api, fields, models
 from odoo.exceptions import ValidationError
+from odoo.tools import split_every
+
+# Account moves are created by batches of this size
+MOVE_BATCH_SIZE = 500
 
 
 class AssetDepreciationLine(models.Model):
@@ -137,12 +143,13 @@ class AssetDepreciationLine(models.Model):
     # depreciable amount
     _update_move_types = ('in', 'out')
 
-    @api.model
-    def create(self, vals):
-        line = super().create(vals)
-        if line.need_normalize_depreciation_nr():
-            line.normalize_depreciation_nr(force=True)
-        return line
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        for line in lines:
+            if line.need_normalize_depreciation_nr():
+                line.normalize_depreciation_nr(force=True)
+        return lines
 
     @api.multi
     def write(self, vals):
@@ -171,7 +178,7 @@ class AssetDepreciationLine(models.Model):
                 _("Following lines are linked to posted account moves, and"
                   " cannot be deleted:\n") + name_list
             )
-        self.mapped('move_id').unlink()
+        self.remove_account_move()
         return super().unlink()
 
     @api.multi
@@ -244,6 +251,65 @@ class AssetDepreciationLine(models.Model):
             balances_grouped[line.move_type] += line.balance
         return balances_grouped
 
+    @api.model
+    def get_amounts_by_record(self, records, field_name):
+        """
+        Sums balances and amounts of the depreciation lines linked to each
+        of `records` through many2many `field_name` with a single query,
+        grouping them by move type and partial dismissal.
+        :return: dict {record id: {(move_type, partial_dismissal): (balance,
+        amount)}}
+        """
+        amounts_by_record = {record_id: {} for record_id in records.ids}
+        if not records:
+            return amounts_by_record
+        field = records._fields[field_name]
+        self.env.cr.execute(
+            """
+            SELECT rel.{record_col}, dl.move_type,
+                COALESCE(dl.partial_dismissal, FALSE),
+                SUM(dl.balance), SUM(dl.amount)
+            FROM {relation} rel
+                JOIN asset_depreciation_line dl
+                    ON dl.id = rel.{dep_line_col}
+            WHERE rel.{record_col} IN %s
+            GROUP BY rel.{record_col}, dl.move_type,
+                COALESCE(dl.partial_dismissal, FALSE)
+            """.format(
+                dep_line_col=field.column2,
+                record_col=field.column1,
+                relation=field.relation,
+            ),
+            (tuple(records.ids),)
+        )
+        for record_id, move_type, partial_dismissal, balance, amount \
+                in self.env.cr.fetchall():
+            amounts_by_record[record_id][move_type, partial_dismissal] = (
+                balance, amount
+            )
+        return amounts_by_record
+
+    def get_fiscal_years_by_line(self):
+        """
+        Returns dict {line: fiscal year}, looking up every date only once
+        for each company
+        """
+        fiscal_year_obj = self.env['account.fiscal.year']
+        dates_by_company = defaultdict(set)
+        for line in self:
+            dates_by_company[line.company_id].add(line.date)
+        fiscal_years = {}
+        for company, dates in dates_by_company.items():
+            fy_by_date = fiscal_year_obj.get_fiscal_years_by_dates(
+                dates, company=company
+            )
+            for date, fyear in fy_by_date.items():
+                fiscal_years[company, date] = fyear
+        return {
+            line: fiscal_years[line.company_id, line.date]
+            for line in self
+        }
+
     def get_depreciation_nr_dict(self):
         """ Returns dict {line: new number} """
         dep = self.mapped('depreciation_id')
@@ -359,11 +425,90 @@ class AssetDepreciationLine(models.Model):
 
     @api.multi
     def button_remove_account_move(self):
-        self.mapped('move_id').unlink()
+        self.remove_account_move()
 
-    def generate_account_move(self):
-        for line in self.filtered(lambda l: l.needs_account_move()):
-            line.generate_account_move_single()
+    @api.multi
+    def remove_account_move(self):
+        """
+        Removes account moves of lines in `self`.
+        A move shared with depreciation lines not in `self` (see
+        `generate_account_move(group=True)`) is not deleted: it is rebuilt
+        for the remaining lines, and only lines in `self` are unlinked from it.
+        """
+        moves = self.mapped('move_id')
+        if not moves:
+            return
+        siblings = self.search([
+            ('move_id', 'in', moves.ids),
+            ('id', 'not in', self.ids),
+        ])
+        shared_moves = siblings.mapped('move_id')
+        (moves - shared_moves).unlink()
+        if not shared_moves:
+            return
+        self.filtered(lambda l: l.move_id in shared_moves) \
+            .write({'move_id': False})
+        for move in shared_moves:
+            move_siblings = siblings.filtered(lambda l: l.move_id == move)
+            vals = move_siblings.get_grouped_account_move_vals()
+            move.write({
+                'line_ids': [(5, 0, 0)] + vals['line_ids'],
+                'ref': vals['ref'],
+            })
+
+    def generate_account_move(self, group=False):
+        """
+        Creates account moves for lines in `self`, by batches.
+        :param group: if True, depreciation lines with the same category,
+        journal and date share a single account move
+        """
+        lines = self.filtered(lambda l: l.needs_account_move())
+        if not lines:
+            return
+        am_obj = self.env['account.move']
+        lines_groups = lines.get_account_move_groups(group=group)
+        for groups in split_every(MOVE_BATCH_SIZE, lines_groups):
+            moves = am_obj.create([
+                grouped_lines.get_grouped_account_move_vals()
+                for grouped_lines in groups
+            ])
+            for grouped_lines, move in zip(groups, moves):
+                grouped_lines.write({'move_id': move.id})
+
+    def get_account_move_groups(self, group=False):
+        """
+        Splits lines in `self` by account move to create: one for each line,
+        or one for every category, journal and date when `group` is True
+        (depreciation lines only).
+        :return: list of recordsets
+        """
+        if not group:
+            return list(self)
+        groups = OrderedDict()
+        for line in self:
+            if line.move_type == 'depreciated':
+                category = line.asset_id.category_id
+                key = (line.company_id, category, category.journal_id,
+                       line.date)
+            else:
+                key = line
+            groups.setdefault(key, []).append(line.id)
+        return [self.browse(line_ids) for line_ids in groups.values()]
+
+    def get_grouped_account_move_vals(self):
+        """ Returns vals of a single account move for lines in `self` """
+        if len(self) == 1:
+            vals = self.get_account_move_vals()
+        else:
+            vals = self[0].get_account_move_vals()
+            category = self[0].asset_id.category_id
+            vals['ref'] = _("Assets: ") + category.name_get()[0][-1]
+        if 'line_ids' not in vals:
+            vals['line_ids'] = []
+        for line in self:
+            for v in line.get_account_move_line_vals():
+                vals['line_ids'].append((0, 0, v))
+        return vals
 
     def generate_account_move_single(self):
         self.ensure_one()
@@ -3,7 +3,7 @@
 # Copyright 2022 Simone Rubino - TAKOBI
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 
 from odoo import _, api, fields, models
 from odoo.exceptions import ValidationError
@@ -197,53 +197,59 @@ class Report(models.TransientModel):
                 _("There is nothing to print according to current settings!")
             )
 
+        # Group lines by depreciation and fiscal year: groups are sorted by
+        # date of their first line, and each line is visited only once
+        dep_lines = dep_lines.sorted('date')
+        fiscal_years = dep_lines.get_fiscal_years_by_line()
         dep_lines_grouped = OrderedDict()
-        fiscal_year = self.env['account.fiscal.year']
-        for dep_line in dep_lines.sorted('date'):
-            dep = dep_line.depreciation_id
-            fyear = fiscal_year.get_fiscal_year_by_date(
-                dep_line.date, company=dep_line.company_id
+        for dep_line in dep_lines:
+            key = (dep_line.depreciation_id, fiscal_years[dep_line])
+            dep_lines_grouped.setdefault(key, []).append(dep_line.id)
+
+        assets_by_categ = defaultdict(list)
+        for asset in self.sort_assets(assets):
+            assets_by_categ[asset.category_id].append(asset)
+        deps_by_asset = defaultdict(list)
+        for dep in deps:
+            deps_by_asset[dep.asset_id].append(dep)
+        dep_lines_by_dep = defaultdict(list)
+        for (dep, fyear), line_ids in dep_lines_grouped.items():
+            dep_lines_by_dep[dep].append((fyear, line_ids))
+
+        # Every report section is created at once, in the same order the
+        # report will show it
+        report_categs = self.env['report_asset_journal_category'].create([
+            {'category_id': c.id, 'report_id': self.id}
+            for c in categories.sorted('name')
+        ])
+        report_assets = self.env['report_asset_journal_asset'].create([
+            {'asset_id': a.id,
+             'report_category_id': report_categ.id,
+             'report_id': self.id}
+            for report_categ in report_categs
+            for a in assets_by_categ[report_categ.category_id]
+        ])
+        report_deps = self.env['report_asset_journal_depreciation'].create([
+            {'depreciation_id': d.id,
+             'report_asset_id': report_asset.id,
+             'report_id': self.id}
+            for report_asset in report_assets
+            for d in deps_by_asset[report_asset.asset_id]
+        ])
+        self.env['report_asset_journal_depreciation_line_year'].create([
+            {'dep_line_ids': [(6, 0, line_ids)],
+             'fiscal_year_id': fyear.id,
+             'report_depreciation_id': report_dep.id,
+             'report_id': self.id,
+             'sequence': sequence}
+            for report_dep in report_deps
+            for sequence, (fyear, line_ids) in enumerate(
+                dep_lines_by_dep[report_dep.depreciation_id], 1
             )
-            key = (dep, fyear)
-            if key not in dep_lines_grouped:
-                dep_lines_grouped[key] = self.env['asset.depreciation.line']
-            dep_lines_grouped[key] += dep_line
-
-        self.write({
-            'report_category_ids': [
-                (0, 0, {'category_id': c.id, 'report_id': self.id})
-                for c in categories.sorted('name')
-            ]
-        })
-        for report_categ in self.report_category_ids:
-            report_categ.write({
-                'report_asset_ids': [
-                    (0, 0, {'asset_id': a.id, 'report_id': self.id})
-                    for a in self.sort_assets(assets)
-                    if a.category_id == report_categ.category_id
-                ]
-            })
-        for report_asset in self.report_asset_ids:
-            report_asset.write({
-                'report_depreciation_ids': [
-                    (0, 0, {'depreciation_id': d.id, 'report_id': self.id})
-                    for d in deps
-                    if d.asset_id == report_asset.asset_id
-                ]
-            })
-        for report_dep in self.report_depreciation_ids:
-            sequence = 0
-            for (dep, fyear), lines in dep_lines_grouped.items():
-                if dep == report_dep.depreciation_id:
-                    sequence += 1
-                    report_dep.write({
-                        'report_depreciation_year_line_ids': [
-                            (0, 0, {'dep_line_ids': [(6, 0, lines.ids)],
-                                    'fiscal_year_id': fyear.id,
-                                    'report_id': self.id,
-                                    'sequence': sequence})
-                        ]
-                    })
+        ])
+        # Sections' one2many fields may be cached from before their lines
+        # were created
+        self.invalidate_cache()
 
     def generate_totals(self):
         curr = self.company_id.currency_id
@@ -680,19 +686,40 @@ class ReportDepreciationLineByYear(models.TransientModel):
         return format_amount(self.env, amount, currency)
 
     def generate_data(self):
+        amounts_by_line = self.get_dep_line_amounts()
         for report_dep_line_year in self.sorted():  # Force sorting by _order
             report_dep_line_year.write(
-                report_dep_line_year.get_report_dep_line_year_data()
+                report_dep_line_year.get_report_dep_line_year_data(
+                    amounts_by_line[report_dep_line_year.id]
+                )
             )
 
+    def get_dep_line_amounts(self):
+        """
+        :return: amounts of the depreciation lines of each line in `self`,
+        as returned by `asset.depreciation.line.get_amounts_by_record`
+        """
+        return self.env['asset.depreciation.line'].get_amounts_by_record(
+            self, 'dep_line_ids')
+
     def get_currency(self):
         self.ensure_one()
         return self.report_depreciation_id.depreciation_id.currency_id
 
-    def get_report_dep_line_year_data(self):
+    def get_report_dep_line_year_data(self, dep_line_amounts=None):
+        """
+        :param dep_line_amounts: amounts of the depreciation lines, as
+        returned by `get_dep_line_amounts` for `self`
+        """
         self.ensure_one()
         report_dep = self.report_depreciation_id
-        grouped_amounts = self.dep_line_ids.get_balances_grouped()
+        if dep_line_amounts is None:
+            dep_line_amounts = self.get_dep_line_amounts()[self.id]
+        grouped_amounts = {}
+        for (move_type, partial_dismissal), (balance, amount) \
+                in dep_line_amounts.items():
+            grouped_amounts[move_type] = \
+                grouped_amounts.get(move_type, 0.0) + balance
 
         amount_depreciable = report_dep.dep_amount_depreciable
         amount_gain = grouped_amounts.get('gain') or 0.0
@@ -707,20 +734,10 @@ class ReportDepreciationLineByYear(models.TransientModel):
         gain_loss = amount_gain + amount_loss
         gain_loss_total = gain_loss
 
-        amount_depreciated = sum([
-            line.amount
-            for line in self.dep_line_ids.filtered(
-                lambda l: l.move_type == 'depreciated'
-                and not l.partial_dismissal
-            )
-        ])
-        amount_dismissal = sum([
-            line.amount
-            for line in self.dep_line_ids.filtered(
-                lambda l: l.move_type == 'depreciated'
-                and l.partial_dismissal
-            )
-        ])
+        amount_depreciated = \
+            dep_line_amounts.get(('depreciated', False), (0.0, 0.0))[1]
+        amount_dismissal = \
+            dep_line_amounts.get(('depreciated', True), (0.0, 0.0))[1]
 
         prev_year_line = report_dep.report_depreciation_year_line_ids.filtered(
             lambda l: l.sequence == self.sequence - 1
@@ -3,7 +3,7 @@
 # Copyright 2022 Simone Rubino - TAKOBI
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 
 from odoo import _, api, fields, models
 from odoo.exceptions import ValidationError
@@ -64,10 +64,6 @@ class Report(models.TransientModel):
     )
 
     # Report structure fields
-    previsional_line_ids = fields.Many2many(
-        'asset.depreciation.line'
-    )
-
     report_category_ids = fields.One2many(
         'report_asset_previsional_category',
         'report_id'
@@ -184,7 +180,6 @@ class Report(models.TransientModel):
         self.report_depreciation_ids.generate_data()
         self.report_depreciation_line_year_ids.generate_previsional_lines()
         self.report_depreciation_line_year_ids.generate_data()
-        self.previsional_line_ids.unlink()
         self.report_depreciation_line_year_ids.clean_unused()
         self.report_category_ids.generate_totals()
         self.generate_totals()
@@ -210,69 +205,71 @@ class Report(models.TransientModel):
         # Create an ordered dict where each key is a fiscal year, sorting
         # them for starting date => every fiscal year must have its own
         # depreciation lines or previsional ones
-        dep_line_obj = self.env['asset.depreciation.line']
+        fyears = self.env['account.fiscal.year'].search(
+            fy_domain, order='date_from asc'
+        )
         dep_lines_grouped = {
-            dep: OrderedDict({
-                fy: dep_line_obj
-                for fy in self.env['account.fiscal.year'].search(
-                    fy_domain, order='date_from asc'
-                )
-            })
+            dep: OrderedDict((fy, []) for fy in fyears)
             for dep in deps
         }
-
-        fiscal_year = self.env['account.fiscal.year']
+        fiscal_years = dep_lines.get_fiscal_years_by_line()
         for dep_line in dep_lines:
             dep = dep_line.depreciation_id
-            fyear = fiscal_year.get_fiscal_year_by_date(
-                dep_line.date, company=dep_line.company_id
-            )
-            dep_lines_grouped[dep][fyear] += dep_line
-
-        self.write({
-            'report_category_ids': [
-                (0, 0, {'category_id': c.id, 'report_id': self.id})
-                for c in categories.sorted('name')
-            ]
-        })
-        for report_categ in self.report_category_ids:
-            report_categ.write({
-                'report_asset_ids': [
-                    (0, 0, {'asset_id': a.id, 'report_id': self.id})
-                    for a in self.sort_assets(assets)
-                    if a.category_id == report_categ.category_id
-                ]
-            })
-        for report_asset in self.report_asset_ids:
-            report_asset.write({
-                'report_depreciation_ids': [
-                    (0, 0, {'depreciation_id': d.id, 'report_id': self.id})
-                    for d in deps
-                    if d.asset_id == report_asset.asset_id
-                ]
-            })
-        for report_dep in self.report_depreciation_ids:
+            dep_lines_grouped[dep][fiscal_years[dep_line]].append(dep_line)
+
+        assets_by_categ = defaultdict(list)
+        for asset in self.sort_assets(assets):
+            assets_by_categ[asset.category_id].append(asset)
+        deps_by_asset = defaultdict(list)
+        for dep in deps:
+            deps_by_asset[dep.asset_id].append(dep)
+
+        # Every report section is created at once, in the same order the
+        # report will show it
+        report_categs = self.env['report_asset_previsional_category'].create([
+            {'category_id': c.id, 'report_id': self.id}
+            for c in categories.sorted('name')
+        ])
+        report_assets = self.env['report_asset_previsional_asset'].create([
+            {'asset_id': a.id,
+             'report_category_id': report_categ.id,
+             'report_id': self.id}
+            for report_categ in report_categs
+            for a in assets_by_categ[report_categ.category_id]
+        ])
+        report_deps = self.env['report_asset_previsional_depreciation']\
+            .create([
+                {'depreciation_id': d.id,
+                 'report_asset_id': report_asset.id,
+                 'report_id': self.id}
+                for report_asset in report_assets
+                for d in deps_by_asset[report_asset.asset_id]
+            ])
+        year_line_vals = []
+        for report_dep in report_deps:
+            dep = report_dep.depreciation_id
             sequence = 0
-            for dep, lines_by_fyear in dep_lines_grouped.items():
-                if dep == report_dep.depreciation_id:
-                    for fyear, lines in lines_by_fyear.items():
-                        if fyear.date_to >= dep.date_start:
-                            prev = not lines or not any(
-                                l.move_type == 'depreciated'
-                                and not l.partial_dismissal
-                                for l in lines
-                            )
-                            sequence += 1
-                            line_ids = lines.ids
-                            report_dep.write({
-                                'report_depreciation_year_line_ids': [
-                                    (0, 0, {'dep_line_ids': [(6, 0, line_ids)],
-                                            'fiscal_year_id': fyear.id,
-                                            'needs_previsional': prev,
-                                            'report_id': self.id,
-                                            'sequence': sequence})
-                                ]
-                            })
+            for fyear, lines in dep_lines_grouped[dep].items():
+                if fyear.date_to >= dep.date_start:
+                    prev = not lines or not any(
+                        l.move_type == 'depreciated'
+                        and not l.partial_dismissal
+                        for l in lines
+                    )
+                    sequence += 1
+                    year_line_vals.append({
+                        'dep_line_ids': [(6, 0, [l.id for l in lines])],
+                        'fiscal_year_id': fyear.id,
+                        'needs_previsional': prev,
+                        'report_depreciation_id': report_dep.id,
+                        'report_id': self.id,
+                        'sequence': sequence,
+                    })
+        self.env['report_asset_previsional_depreciation_line_year']\
+            .create(year_line_vals)
+        # Sections' one2many fields may be cached from before their lines
+        # were created
+        self.invalidate_cache()
 
     def generate_totals(self):
         curr = self.company_id.currency_id
@@ -663,6 +660,8 @@ class ReportDepreciationLineByYear(models.TransientModel):
         'account.fiscal.year'
     )
 
+    previsional_amount = fields.Float()
+
     # Report structure fields
     hidden = fields.Boolean()
 
@@ -726,11 +725,22 @@ class ReportDepreciationLineByYear(models.TransientModel):
         return format_amount(self.env, amount, currency)
 
     def generate_data(self):
+        amounts_by_line = self.get_dep_line_amounts()
         for report_dep_line_year in self.sorted():  # Force sorting by _order
             report_dep_line_year.write(
-                report_dep_line_year.get_report_dep_line_year_data()
+                report_dep_line_year.get_report_dep_line_year_data(
+                    amounts_by_line[report_dep_line_year.id]
+                )
             )
 
+    def get_dep_line_amounts(self):
+        """
+        :return: amounts of the depreciation lines of each line in `self`,
+        as returned by `asset.depreciation.line.get_amounts_by_record`
+        """
+        return self.env['asset.depreciation.line'].get_amounts_by_record(
+            self, 'dep_line_ids')
+
     def get_currency(self):
         self.ensure_one()
         return self.report_depreciation_id.depreciation_id.currency_id
@@ -744,26 +754,32 @@ class ReportDepreciationLineByYear(models.TransientModel):
             else:
                 lines_grouped[dep] += line
 
-        ctx = dict(force_prorata=True)
-        for lines in lines_grouped.values():
+        # Depreciations are projected in memory: no depreciation line is
+        # actually created
+        for dep, lines in lines_grouped.items():
             lines = lines.sorted()
-            last_line = lines[-1]
-            for line in lines - last_line:
-                line.generate_previsional_line_single()
-            last_line.with_context(**ctx).generate_previsional_line_single()
-
-    def generate_previsional_line_single(self):
-        self.ensure_one()
-        dep = self.report_depreciation_id.depreciation_id
-        to_date = min(self.fiscal_year_id.date_to, self.report_id.date)
-        previsional_lines = dep.generate_depreciation_lines(to_date)
-        self.dep_line_ids += previsional_lines
-        self.report_id.previsional_line_ids += previsional_lines
+            dep_dates = [
+                min(line.fiscal_year_id.date_to, line.report_id.date)
+                for line in lines
+            ]
+            amounts = dep.get_previsional_depreciation_amounts(dep_dates)
+            for line, amount in zip(lines, amounts):
+                line.previsional_amount = amount
 
-    def get_report_dep_line_year_data(self):
+    def get_report_dep_line_year_data(self, dep_line_amounts=None):
+        """
+        :param dep_line_amounts: amounts of the depreciation lines, as
+        returned by `get_dep_line_amounts` for `self`
+        """
         self.ensure_one()
         report_dep = self.report_depreciation_id
-        grouped_amounts = self.dep_line_ids.get_balances_grouped()
+        if dep_line_amounts is None:
+            dep_line_amounts = self.get_dep_line_amounts()[self.id]
+        grouped_amounts = {}
+        for (move_type, partial_dismissal), (balance, amount) \
+                in dep_line_amounts.items():
+            grouped_amounts[move_type] = \
+                grouped_amounts.get(move_type, 0.0) + balance
 
         amount_depreciable = report_dep.dep_amount_depreciable
         amount_gain = grouped_amounts.get('gain') or 0.0
@@ -778,20 +794,11 @@ class ReportDepreciationLineByYear(models.TransientModel):
         gain_loss = amount_gain + amount_loss
         gain_loss_total = gain_loss
 
-        amount_depreciated = sum([
-            line.amount
-            for line in self.dep_line_ids.filtered(
-                lambda l: l.move_type == 'depreciated'
-                and not l.partial_dismissal
-            )
-        ])
-        amount_dismissal = sum([
-            line.amount
-            for line in self.dep_line_ids.filtered(
-                lambda l: l.move_type == 'depreciated'
-                and l.partial_dismissal
-            )
-        ])
+        amount_depreciated = \
+            dep_line_amounts.get(('depreciated', False), (0.0, 0.0))[1]
+        amount_depreciated += self.previsional_amount
+        amount_dismissal = \
+            dep_line_amounts.get(('depreciated', True), (0.0, 0.0))[1]
 
         prev_year_line = report_dep.report_depreciation_year_line_ids.filtered(
             lambda l: l.sequence == self.sequence - 1
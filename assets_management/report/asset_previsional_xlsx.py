@@ -9,7 +9,7 @@ _logger = logging.getLogger(__name__)
 
 class AssetJournalXslx(models.AbstractModel):
     _name = 'report.assets_management.report_asset_previsional_xlsx'
-    _inherit = 'report.account_financial_report.abstract_report_xlsx'
+    _inherit = 'report.assets_management.asset_report_xlsx'
 
     def __init__(self, pool, cr):
         """ Adds new attributes """
@@ -359,47 +359,6 @@ class AssetJournalXslx(models.AbstractModel):
         )
         return {n: d for n, d in enumerate(data)}
 
-    def _set_column_width(self):
-        """ Override to force every column to width 25 at least """
-        max_width = self.get_max_width_dict()
-        for col, width in max_width.items():
-            self.sheet.set_column(col, col, max(width, 25))
-
-    def get_max_width_dict(self):
-        min_col = min([
-            min(self.category_data.keys()),
-            min(self.asset_data.keys()),
-            min(self.asset_accounting_doc_data.keys()),
-            min(self.depreciation_data.keys()),
-            min(self.depreciation_line_year_data.keys()),
-            min(self.depreciation_line_amount_detail_data.keys()),
-            min(self.totals_data.keys()),
-        ])
-        max_col = max([
-            max(self.category_data.keys()),
-            max(self.asset_data.keys()),
-            max(self.asset_accounting_doc_data.keys()),
-            max(self.depreciation_data.keys()),
-            max(self.depreciation_line_year_data.keys()),
-            max(self.depreciation_line_amount_detail_data.keys()),
-            max(self.totals_data.keys()),
-        ])
-
-        return {
-            col: max([
-                self.category_data.get(col, {}).get('width') or 0,
-                self.asset_data.get(col, {}).get('width') or 0,
-                self.asset_accounting_doc_data.get(col, {}).get('width') or 0,
-                self.depreciation_data.get(col, {}).get('width') or 0,
-                self.depreciation_line_year_data.get(col, {})
-                .get('width') or 0,
-                self.depreciation_line_amount_detail_data.get(col, {})
-                .get('width') or 0,
-                self.totals_data.get(col, {}).get('width') or 0,
-            ])
-            for col in range(min_col, max_col + 1)
-        }
-
     def _get_report_name(self, report):
         """
         * Overrides standard method *
@@ -407,86 +366,6 @@ class AssetJournalXslx(models.AbstractModel):
         """
         return self._get_report_complete_name(report, report.report_name)
 
-    def _write_report_title(self, title):
-        """
-        * Overrides standard method *
-        Writes report title on current line using all defined columns width
-        """
-        self.sheet.merge_range(
-            self.row_pos, 0, self.row_pos, 9,
-            title, self.format_title
-        )
-        self.row_pos += 3
-
-    def _generate_report_content(self, workbook, report):
-        """ Creates actual xls report """
-        for categ_section in report.report_category_ids:
-            self.write_all(self.category_data, categ_section)
-
-            for asset_section in categ_section.report_asset_ids:
-                self.write_all(self.asset_data, asset_section)
-
-                if asset_section.report_purchase_doc_id:
-                    self.write_all(
-                        self.asset_accounting_doc_data,
-                        asset_section.report_purchase_doc_id
-                    )
-
-                for dep_section in asset_section.report_depreciation_ids:
-                    self.write_all(self.depreciation_data, dep_section)
-
-                    self.write_header(self.depreciation_line_year_data)
-                    for year in dep_section.report_depreciation_year_line_ids:
-                        self.write_value(
-                            self.depreciation_line_year_data, year
-                        )
-                        if year.has_amount_detail:
-                            self.write_value(
-                                self.depreciation_line_amount_detail_data, year
-                            )
-
-                if asset_section.report_sale_doc_id:
-                    self.write_all(
-                        self.asset_accounting_doc_data,
-                        asset_section.report_sale_doc_id
-                    )
-                self.row_pos += 1
-
-            if report.show_category_totals:
-                self.write_header(self.totals_data)
-                for total_section in categ_section.report_total_ids:
-                    self.write_value(self.totals_data, total_section)
-                self.row_pos += 1
-
-            self.row_pos += 1
-
-        if report.show_totals:
-            self.write_header(self.totals_data)
-            for total_section in report.report_total_ids:
-                self.write_value(self.totals_data, total_section)
-            self.row_pos += 1
-
-    def write_all(self, data, obj):
-        self.write_header(data)
-        self.write_value(data, obj)
-
-    def write_header(self, data):
-        pos = self.row_pos
-        for col, data in data.items():
-            self.sheet.write(pos, col, data['title'], data['tstyle'])
-        self.row_pos += 1
-
-    def write_value(self, data, obj):
-        pos = self.row_pos
-        for col, data in data.items():
-            value, style = getattr(obj, data['field']), data['vstyle']
-            if data.get('type') == 'amount':
-                value = getattr(obj, 'format_amount')(value)
-            if value in (False, None):
-                value = '/'
-            self.sheet.write(pos, col, value, style)
-        self.row_pos += 1
-
     ########################################################
     #                                                      #
     # UNUSED METHODS, OVERRIDDEN FOR COMPATIBILITY REASONS #
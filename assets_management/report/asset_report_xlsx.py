@@ -0,0 +1,159 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
+
+from odoo import models
+from odoo.tools import split_every
+
+# Asset sections are read and written by batches, so that the records cache
+# doesn't grow with the whole report
+ASSET_BATCH_SIZE = 1000
+# Column widths are estimated on the first records of each section only
+WIDTH_SAMPLE_SIZE = 100
+
+
+class AssetReportXlsx(models.AbstractModel):
+    """ Methods shared by the XLSX reports of assets """
+    _name = 'report.assets_management.asset_report_xlsx'
+    _inherit = 'report.account_financial_report.abstract_report_xlsx'
+    _description = "Assets XLSX report"
+
+    def get_workbook_options(self):
+        """
+        Rows are written in order and flushed to a temporary file as soon as
+        the next row begins, so that memory usage doesn't depend on the
+        report size
+        """
+        return {'constant_memory': True}
+
+    def _set_column_width(self):
+        """ Override to force every column to width 25 at least """
+        max_width = self.get_max_width_dict()
+        for col, width in max_width.items():
+            self.sheet.set_column(col, col, max(width, 25))
+
+    def get_max_width_dict(self):
+        """
+        Estimates every column width from its titles and from the values of
+        a sample of the printed records
+        """
+        max_width = {}
+        for data, sample in self.get_width_samples():
+            for col, col_data in data.items():
+                width = max(
+                    [col_data.get('width') or 0, len(col_data['title'])]
+                    + [len(str(self.get_value(col_data, obj)))
+                       for obj in sample]
+                )
+                max_width[col] = max(max_width.get(col, 0), width)
+        return max_width
+
+    def get_width_samples(self):
+        """ Returns couples (data, records sample) """
+        report = self.report
+        size = WIDTH_SAMPLE_SIZE
+        assets = report.report_asset_ids[:size]
+        docs = assets.mapped('report_purchase_doc_id') \
+            | assets.mapped('report_sale_doc_id')
+        deps = assets.mapped('report_depreciation_ids')[:size]
+        years = deps.mapped('report_depreciation_year_line_ids')[:size]
+        return [
+            (self.category_data, report.report_category_ids[:size]),
+            (self.asset_data, assets),
+            (self.asset_accounting_doc_data, docs),
+            (self.depreciation_data, deps),
+            (self.depreciation_line_year_data, years),
+            (self.depreciation_line_amount_detail_data,
+             years.filtered('has_amount_detail')),
+            (self.totals_data, report.report_total_ids[:size]),
+        ]
+
+    def _write_report_title(self, title):
+        """
+        * Overrides standard method *
+        Writes report title on current line.
+        Merged cells are not supported in `constant_memory` mode: the title
+        is written in the first cell only.
+        """
+        self.sheet.write(self.row_pos, 0, title, self.format_title)
+        self.row_pos += 3
+
+    def _generate_report_content(self, workbook, report):
+        """ Creates actual xls report """
+        for categ_section in report.report_category_ids:
+            self.write_all(self.category_data, categ_section)
+
+            asset_sections = categ_section.report_asset_ids
+            for asset_ids in split_every(ASSET_BATCH_SIZE, asset_sections.ids):
+                # Browse every batch separately: prefetching is limited to
+                # the batch, and its records can be evicted once written
+                for asset_section in asset_sections.browse(asset_ids):
+                    self.write_asset_section(asset_section)
+                self.env.invalidate_all()
+
+            if report.show_category_totals:
+                self.write_header(self.totals_data)
+                for total_section in categ_section.report_total_ids:
+                    self.write_value(self.totals_data, total_section)
+                self.row_pos += 1
+
+            self.row_pos += 1
+
+        if report.show_totals:
+            self.write_header(self.totals_data)
+            for total_section in report.report_total_ids:
+                self.write_value(self.totals_data, total_section)
+            self.row_pos += 1
+
+    def write_asset_section(self, asset_section):
+        self.write_all(self.asset_data, asset_section)
+
+        if asset_section.report_purchase_doc_id:
+            self.write_all(
+                self.asset_accounting_doc_data,
+                asset_section.report_purchase_doc_id
+            )
+
+        for dep_section in asset_section.report_depreciation_ids:
+            self.write_all(self.depreciation_data, dep_section)
+
+            self.write_header(self.depreciation_line_year_data)
+            for year in dep_section.report_depreciation_year_line_ids:
+                self.write_depreciation_year_line(year)
+
+        if asset_section.report_sale_doc_id:
+            self.write_all(
+                self.asset_accounting_doc_data,
+                asset_section.report_sale_doc_id
+            )
+        self.row_pos += 1
+
+    def write_depreciation_year_line(self, year):
+        self.write_value(self.depreciation_line_year_data, year)
+        if year.has_amount_detail:
+            self.write_value(
+                self.depreciation_line_amount_detail_data, year
+            )
+
+    def write_all(self, data, obj):
+        self.write_header(data)
+        self.write_value(data, obj)
+
+    def write_header(self, data):
+        pos = self.row_pos
+        for col, data in data.items():
+            self.sheet.write(pos, col, data['title'], data['tstyle'])
+        self.row_pos += 1
+
+    def write_value(self, data, obj):
+        pos = self.row_pos
+        for col, data in data.items():
+            value, style = self.get_value(data, obj), data['vstyle']
+            self.sheet.write(pos, col, value, style)
+        self.row_pos += 1
+
+    def get_value(self, data, obj):
+        value = getattr(obj, data['field'])
+        if data.get('type') == 'amount':
+            value = getattr(obj, 'format_amount')(value)
+        if value in (False, None):
+            value = '/'
+        return value
@@ -1 +1,2 @@
 from . import test_assets_management
+from . import test_benchmark
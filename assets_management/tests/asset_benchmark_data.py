@@ -0,0 +1,125 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import random
+from datetime import date
+
+
+class AssetDataGenerator:
+    """
+    Creates a synthetic asset book to measure how asset operations scale:
+        * a fiscal year for every year, from `start_year` on;
+        * `categories` categories, alternating depreciation modes;
+        * `assets` assets spread among categories, bought during the first
+          year, either new or used, with pro rata temporis depreciations
+          or not;
+        * depreciation lines for every fiscal year but the last one, which
+          is left to the operations to measure.
+    Random values are generated from `seed`, so that the same sizes always
+    produce the same book.
+    """
+
+    def __init__(self, env, categories=5, assets=200, years=5,
+                 start_year=2015, seed=42):
+        self.env = env
+        self.categories_nr = categories
+        self.assets_nr = assets
+        self.years_nr = years
+        self.start_year = start_year
+        self.random = random.Random(seed)
+
+        self.company = env.user.company_id
+        self.fiscal_years = env['account.fiscal.year']
+        self.categories = env['asset.category']
+        self.assets = env['asset.asset']
+
+    def generate(self):
+        self.fiscal_years = self.generate_fiscal_years()
+        self.categories = self.generate_categories()
+        self.assets = self.generate_assets()
+        self.generate_depreciation_lines()
+        return self
+
+    def get_account(self, xmlid):
+        user_type = self.env.ref(xmlid)
+        return self.env['account.account'].search([
+            ('company_id', '=', self.company.id),
+            ('user_type_id', '=', user_type.id),
+        ], limit=1)
+
+    def generate_fiscal_years(self):
+        return self.env['account.fiscal.year'].create([
+            {'company_id': self.company.id,
+             'date_from': date(year, 1, 1),
+             'date_to': date(year, 12, 31),
+             'name': "Benchmark Fiscal Year %d" % year}
+            for year in range(self.start_year,
+                              self.start_year + self.years_nr)
+        ])
+
+    def generate_categories(self):
+        journal = self.env['account.journal'].search([
+            ('company_id', '=', self.company.id),
+            ('type', '=', 'general'),
+        ], limit=1)
+        asset_account = self.get_account(
+            'account.data_account_type_fixed_assets')
+        expense_account = self.get_account(
+            'account.data_account_type_expenses')
+        fund_account = self.get_account(
+            'account.data_account_type_non_current_assets')
+        revenue_account = self.get_account(
+            'account.data_account_type_revenue')
+        modes = [
+            self.env.ref('assets_management.ad_mode_materiale'),
+            self.env.ref('assets_management.ad_mode_immateriale'),
+        ]
+        dep_types = [
+            self.env.ref('assets_management.ad_type_civilistico'),
+            self.env.ref('assets_management.ad_type_fiscale'),
+        ]
+        return self.env['asset.category'].create([
+            {'asset_account_id': asset_account.id,
+             'depreciation_account_id': expense_account.id,
+             'fund_account_id': fund_account.id,
+             'gain_account_id': revenue_account.id,
+             'journal_id': journal.id,
+             'loss_account_id': expense_account.id,
+             'name': "Benchmark Category %d" % num,
+             'type_ids': [
+                 (0, 0, {'depreciation_type_id': dep_type.id,
+                         'mode_id': modes[num % len(modes)].id,
+                         'percentage': self.random.choice((10, 20, 25))})
+                 for dep_type in dep_types
+             ]}
+            for num in range(self.categories_nr)
+        ])
+
+    def generate_assets(self):
+        categories = self.categories
+        assets = self.env['asset.asset'].create([
+            {'category_id': categories[num % len(categories)].id,
+             'company_id': self.company.id,
+             'currency_id': self.company.currency_id.id,
+             'name': "Benchmark Asset %d" % num,
+             'purchase_amount': self.random.randint(1, 1000) * 100.0,
+             'purchase_date': date(self.start_year,
+                                   self.random.randint(1, 12),
+                                   self.random.randint(1, 28)),
+             'used': self.random.random() < 0.2}
+            for num in range(self.assets_nr)
+        ])
+        deps = assets.mapped('depreciation_ids')
+        deps.filtered(lambda d: self.random.random() < 0.5)\
+            .write({'pro_rata_temporis': True})
+        return assets
+
+    def generate_depreciation_lines(self):
+        deps = self.assets.mapped('depreciation_ids')
+        for fiscal_year in self.fiscal_years[:-1]:
+            dep_date = fiscal_year.date_to
+            to_depreciate = deps.filtered(
+                lambda d: d.date_start and d.date_start < dep_date
+                and d.amount_residual > 0
+            )
+            if to_depreciate:
+                to_depreciate.generate_depreciation_lines(dep_date)
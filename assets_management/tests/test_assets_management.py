@@ -170,3 +170,238 @@ class TestAssets(TransactionCase):
         total = report.report_total_ids
         self.assertEqual(total.amount_depreciation_fund_curr_year, 1000)
         self.assertEqual(total.amount_depreciation_fund_prev_year, 1000)
+
+    def test_journal_structure(self):
+        """
+        Journal sections link each asset to its depreciations,
+        with a line for every fiscal year
+        """
+        # Arrange: Create two assets bought in 2019,
+        # one of them depreciated in 2019 and 2020
+        purchase_date = date(2019, 1, 1)
+        asset = self._create_asset(purchase_date)
+        other_asset = self._create_asset(purchase_date)
+        self._civil_depreciate_asset(asset)
+
+        # Act: Generate the asset journal report for 2021
+        report_date = date(2021, 11, 7)
+        self._generate_fiscal_years(purchase_date, report_date)
+        report = self._get_report(report_date, 'journal')
+
+        # Assert: Each asset has its own depreciations and year lines
+        report_assets = report.report_category_ids.report_asset_ids
+        self.assertEqual(
+            report_assets.mapped('asset_id'), asset | other_asset)
+        report_asset = report_assets.filtered(
+            lambda ra: ra.asset_id == asset)
+        report_dep = report_asset.report_depreciation_ids
+        self.assertEqual(report_dep.depreciation_id, asset.depreciation_ids)
+        year_lines = report_dep.report_depreciation_year_line_ids
+        self.assertEqual(year_lines.mapped('sequence'), [1, 2])
+        self.assertEqual(year_lines.mapped('year'), ['2019', '2020'])
+        self.assertEqual(
+            year_lines.mapped('dep_line_ids'),
+            asset.depreciation_ids.line_ids)
+        self.assertEqual(
+            year_lines.mapped('amount_depreciated'), [500, 500])
+        self.assertEqual(
+            year_lines.mapped('amount_residual'), [500, 0])
+
+    def test_bulk_depreciation_amounts(self):
+        """
+        Depreciations generated in bulk get the same amounts
+        as depreciations computed one by one
+        """
+        # Arrange: Create two assets bought in 2019, depreciated pro rata
+        purchase_date = date(2019, 3, 1)
+        assets = self._create_asset(purchase_date) \
+            | self._create_asset(date(2019, 7, 15))
+        self._generate_fiscal_years(purchase_date, date(2021, 1, 1))
+        deps = assets.mapped('depreciation_ids')
+        deps.write({'pro_rata_temporis': True})
+        dep_date = date(2019, 12, 31)
+
+        # Act: Compute amounts in bulk
+        amounts = deps.get_depreciation_amounts(dep_date)
+
+        # Assert: Amounts match the ones computed for each depreciation
+        for dep in deps:
+            dep_nr, dep_amount = amounts[dep.id]
+            self.assertEqual(dep_nr, 1)
+            self.assertEqual(
+                dep_amount,
+                dep.with_context(
+                    dep_nr=dep_nr, used_asset=dep.asset_id.used
+                ).get_depreciation_amount(dep_date)
+            )
+        lines = deps.generate_depreciation_lines(dep_date)
+        self.assertEqual(len(lines), len(deps))
+        for line in lines:
+            self.assertEqual(line.amount, amounts[line.depreciation_id.id][1])
+            self.assertEqual(line.depreciation_nr, 1)
+
+    def test_group_account_moves(self):
+        """
+        Depreciations of the same category and date
+        can share a single account move
+        """
+        # Arrange: Create two assets of the same category
+        purchase_date = date(2019, 1, 1)
+        assets = self._create_asset(purchase_date) \
+            | self._create_asset(purchase_date)
+        self._generate_fiscal_years(purchase_date, date(2020, 1, 1))
+        deps = assets.mapped('depreciation_ids')
+        dep_date = date(2019, 12, 31)
+        lines = deps.generate_depreciation_lines(dep_date)
+
+        # Act: Generate account moves grouping them
+        deps.post_generate_depreciation_lines(lines, group_moves=True)
+
+        # Assert: Every line is linked to the same move
+        move = lines.mapped('move_id')
+        self.assertEqual(len(move), 1)
+        self.assertEqual(move.date, dep_date)
+        self.assertEqual(len(move.line_ids), 2 * len(lines))
+        self.assertEqual(
+            sum(move.line_ids.mapped('debit')),
+            sum(lines.mapped('amount')))
+
+    def test_remove_grouped_account_move(self):
+        """
+        Removing the account move of a line of a grouped move
+        keeps the accounting of the other lines
+        """
+        # Arrange: Group the moves of two depreciation lines
+        purchase_date = date(2019, 1, 1)
+        assets = self._create_asset(purchase_date) \
+            | self._create_asset(purchase_date)
+        self._generate_fiscal_years(purchase_date, date(2020, 1, 1))
+        deps = assets.mapped('depreciation_ids')
+        lines = deps.generate_depreciation_lines(date(2019, 12, 31))
+        deps.post_generate_depreciation_lines(lines, group_moves=True)
+        move = lines.mapped('move_id')
+        removed_line, kept_line = lines[0], lines[1]
+
+        # Act: Remove the move of one line
+        removed_line.button_remove_account_move()
+
+        # Assert: The move is kept for the other line only
+        self.assertFalse(removed_line.move_id)
+        self.assertTrue(move.exists())
+        self.assertEqual(kept_line.move_id, move)
+        self.assertEqual(len(move.line_ids), 2)
+        self.assertEqual(
+            sum(move.line_ids.mapped('debit')), kept_line.amount)
+
+        # Act: Regenerate the move of the removed line
+        removed_line.button_regenerate_account_move()
+
+        # Assert: Each line has its own move
+        self.assertTrue(removed_line.move_id)
+        self.assertNotEqual(removed_line.move_id, move)
+        self.assertEqual(kept_line.move_id, move)
+        self.assertEqual(len(move.line_ids), 2)
+
+    def test_previsional_depreciation_amounts(self):
+        """
+        Projected depreciation amounts match the amounts
+        of depreciation lines generated year by year
+        """
+        # Arrange: Create an asset bought in 2019, depreciated pro rata
+        purchase_date = date(2019, 3, 1)
+        asset = self._create_asset(purchase_date)
+        self._generate_fiscal_years(purchase_date, date(2023, 1, 1))
+        dep = first(asset.depreciation_ids)
+        dep.pro_rata_temporis = True
+        dep_dates = [
+            date(2019, 12, 31),
+            date(2020, 12, 31),
+            date(2021, 12, 31),
+            date(2022, 6, 30),
+        ]
+
+        # Act: Project amounts, then generate the lines
+        amounts = dep.get_previsional_depreciation_amounts(dep_dates)
+        self.assertFalse(dep.line_ids)
+        lines = self.env['asset.depreciation.line']
+        for dep_date in dep_dates[:-1]:
+            lines |= dep.generate_depreciation_lines(dep_date)
+        lines |= dep.with_context(force_prorata=True)\
+            .generate_depreciation_lines(dep_dates[-1])
+
+        # Assert: Projected amounts are the generated ones
+        self.assertEqual(amounts, lines.mapped('amount'))
+
+    def test_fiscal_year_index(self):
+        """
+        Fiscal years are found by date through the index,
+        which is refreshed when fiscal years change
+        """
+        company = self.env.ref('base.main_company')
+        fiscal_year_obj = self.env['account.fiscal.year']
+        fiscal_years = self._generate_fiscal_years(
+            date(2017, 1, 1), date(2019, 1, 1))
+        fy_2017 = fiscal_years.filtered(lambda fy: fy.date_from.year == 2017)
+        fy_2018 = fiscal_years - fy_2017
+
+        by_dates = fiscal_year_obj.get_fiscal_years_by_dates(
+            [date(2017, 1, 1), date(2017, 12, 31), date(2018, 6, 15)],
+            company=company)
+        self.assertEqual(by_dates, {
+            date(2017, 1, 1): fy_2017,
+            date(2017, 12, 31): fy_2017,
+            date(2018, 6, 15): fy_2018,
+        })
+        self.assertFalse(fiscal_year_obj.get_fiscal_year_by_date(
+            date(2019, 6, 15), company=company, miss_raise=False))
+
+        fy_2018.date_to = date(2019, 12, 31)
+        self.assertEqual(
+            fiscal_year_obj.get_fiscal_year_by_date(
+                date(2019, 6, 15), company=company),
+            fy_2018)
+
+    def test_batch_create_assets_from_moves(self):
+        """
+        In batch mode, an asset is created for each move,
+        lines not using an asset account are reported
+        """
+        # Arrange: Create two moves with a line on the asset account
+        asset_account = self.asset_category_1.asset_account_id
+        counterpart_account = self.env['account.account'].search(
+            [('user_type_id', '=',
+              self.data_account_type_current_liabilities.id)], limit=1)
+        moves = self.env['account.move']
+        for amount in (1000, 2000):
+            moves |= self.env['account.move'].create({
+                'date': date(2019, 1, 1),
+                'journal_id': self.asset_category_1.journal_id.id,
+                'line_ids': [
+                    (0, 0, {'account_id': asset_account.id,
+                            'debit': amount,
+                            'name': 'Asset %s' % amount}),
+                    (0, 0, {'account_id': counterpart_account.id,
+                            'credit': amount,
+                            'name': 'Counterpart'}),
+                ],
+            })
+        wiz = self.env['wizard.account.move.manage.asset'].create({
+            'batch_mode': True,
+            'category_id': self.asset_category_1.id,
+            'management_type': 'create',
+            'move_ids': [(6, 0, moves.ids)],
+            'move_line_ids': [(6, 0, moves.mapped('line_ids').ids)],
+        })
+
+        # Act: Link lines in batch
+        wiz.link_asset()
+
+        # Assert: One asset for each move, counterparts are skipped
+        assets = moves.mapped('line_ids.asset_accounting_info_ids.asset_id')
+        self.assertEqual(len(assets), 2)
+        self.assertEqual(
+            sorted(assets.mapped('purchase_amount')), [1000, 2000])
+        self.assertEqual(assets.mapped('category_id'), self.asset_category_1)
+        self.assertTrue(all(a.depreciation_ids for a in assets))
+        self.assertEqual(wiz.batch_log.count('created'), 2)
+        self.assertEqual(wiz.batch_log.count('skipped'), 2)
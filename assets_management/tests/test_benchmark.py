@@ -0,0 +1,230 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import json
+import logging
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import date
+
+from odoo.tests.common import SavepointCase, tagged
+
+from .asset_benchmark_data import AssetDataGenerator
+
+_logger = logging.getLogger(__name__)
+
+
+def get_env_int(name, default):
+    return int(os.environ.get(name) or default)
+
+
+@tagged('-standard', 'assets_benchmark')
+class TestAssetsBenchmark(SavepointCase):
+    """
+    Measures wall time, SQL queries and peak memory of asset operations
+    over a synthetic asset book.
+
+    Not run by default: use `--test-tags assets_benchmark`. Sizes are read
+    from environment variables:
+        * ASSETS_BENCHMARK_CATEGORIES (default 5);
+        * ASSETS_BENCHMARK_ASSETS (default 200);
+        * ASSETS_BENCHMARK_YEARS (default 5);
+        * ASSETS_BENCHMARK_DISMISSALS (default 10).
+    If ASSETS_BENCHMARK_OUTPUT is set, results are dumped there as JSON.
+    If ASSETS_BENCHMARK_BASELINE is set, it must point to such a JSON file:
+    every operation fails if its SQL queries exceed the baseline ones by more
+    than ASSETS_BENCHMARK_TOLERANCE percent (default 10).
+    """
+
+    results = {}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.generator = AssetDataGenerator(
+            cls.env,
+            categories=get_env_int('ASSETS_BENCHMARK_CATEGORIES', 5),
+            assets=get_env_int('ASSETS_BENCHMARK_ASSETS', 200),
+            years=get_env_int('ASSETS_BENCHMARK_YEARS', 5),
+        ).generate()
+        cls.categories = cls.generator.categories
+        cls.assets = cls.generator.assets
+        cls.last_fiscal_year = cls.generator.fiscal_years[-1]
+        cls.partner = cls.env.ref('base.res_partner_12')
+
+    @classmethod
+    def tearDownClass(cls):
+        output = os.environ.get('ASSETS_BENCHMARK_OUTPUT')
+        if output:
+            with open(output, 'w') as output_file:
+                json.dump(cls.results, output_file, indent=4, sort_keys=True)
+        super().tearDownClass()
+
+    @contextmanager
+    def benchmark(self, operation):
+        self.env.invalidate_all()
+        tracemalloc.start()
+        queries = self.cr.sql_log_count
+        start = time.perf_counter()
+        try:
+            yield
+            wall_time = time.perf_counter() - start
+            queries = self.cr.sql_log_count - queries
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        result = {
+            'assets': len(self.assets),
+            'peak_memory': peak_memory,
+            'queries': queries,
+            'wall_time': wall_time,
+        }
+        self.results[operation] = result
+        _logger.info(
+            "Assets benchmark: %s on %d assets: %.3fs, %d queries,"
+            " %.1f KiB peak memory",
+            operation, len(self.assets), wall_time, queries,
+            peak_memory / 1024,
+        )
+        self.check_baseline(operation, result)
+
+    def check_baseline(self, operation, result):
+        baseline_path = os.environ.get('ASSETS_BENCHMARK_BASELINE')
+        if not baseline_path:
+            return
+        with open(baseline_path) as baseline_file:
+            baseline = json.load(baseline_file).get(operation)
+        if not baseline:
+            return
+        tolerance = get_env_int('ASSETS_BENCHMARK_TOLERANCE', 10)
+        max_queries = baseline['queries'] * (100 + tolerance) / 100
+        self.assertLessEqual(
+            result['queries'], max_queries,
+            "%s: %d queries, baseline is %d"
+            % (operation, result['queries'], baseline['queries'])
+        )
+
+    def get_account_move(self, account, amount, debit=True):
+        """ Creates a move with a line on `account` and its counterpart """
+        journal = self.categories[0].journal_id
+        counterpart = self.env['account.account'].search([
+            ('company_id', '=', journal.company_id.id),
+            ('user_type_id', '=',
+             self.env.ref('account.data_account_type_receivable').id),
+        ], limit=1)
+        line_vals = {
+            'account_id': account.id,
+            'credit': 0 if debit else amount,
+            'debit': amount if debit else 0,
+            'name': "Benchmark",
+            'partner_id': self.partner.id,
+        }
+        counterpart_vals = dict(
+            line_vals,
+            account_id=counterpart.id,
+            credit=line_vals['debit'],
+            debit=line_vals['credit'],
+        )
+        return self.env['account.move'].create({
+            'date': self.last_fiscal_year.date_to,
+            'journal_id': journal.id,
+            'line_ids': [(0, 0, line_vals), (0, 0, counterpart_vals)],
+        })
+
+    def generate_depreciations(self, group_account_moves):
+        wizard = self.env['wizard.asset.generate.depreciation'].create({
+            'category_ids': [(6, 0, self.categories.ids)],
+            'date_dep': self.last_fiscal_year.date_to,
+            'group_account_moves': group_account_moves,
+        })
+        wizard.do_generate()
+
+    def test_generate_depreciations(self):
+        with self.benchmark('generate_depreciations'):
+            self.generate_depreciations(False)
+
+    def test_generate_depreciations_grouped(self):
+        with self.benchmark('generate_depreciations_grouped'):
+            self.generate_depreciations(True)
+
+    def test_asset_journal_report(self):
+        wizard = self.env['wizard.asset.journal.report'].create({
+            'category_ids': [(6, 0, self.categories.ids)],
+            'date': self.last_fiscal_year.date_to,
+        })
+        with self.benchmark('asset_journal_report'):
+            wizard.export_asset_journal_report()
+
+    def test_asset_previsional_report(self):
+        wizard = self.env['wizard.asset.previsional.report'].create({
+            'category_ids': [(6, 0, self.categories.ids)],
+            'date': date(self.last_fiscal_year.date_to.year + 2, 12, 31),
+        })
+        with self.benchmark('asset_previsional_report'):
+            wizard.export_asset_previsional_report()
+
+    def test_dismiss_assets(self):
+        assets = self.assets[:get_env_int('ASSETS_BENCHMARK_DISMISSALS', 10)]
+        wizards = self.env['wizard.account.move.manage.asset']
+        for asset in assets:
+            account = asset.category_id.asset_account_id
+            move = self.get_account_move(
+                account, asset.purchase_amount / 2, debit=False
+            )
+            wizards |= wizards.create({
+                'asset_id': asset.id,
+                'dismiss_date': self.last_fiscal_year.date_to,
+                'management_type': 'dismiss',
+                'move_line_ids': [(6, 0, move.line_ids.filtered(
+                    lambda l: l.account_id == account
+                ).ids)],
+            })
+        with self.benchmark('dismiss_assets'):
+            for wizard in wizards:
+                wizard.link_asset()
+
+    def test_create_assets_from_moves(self):
+        wizards = self.env['wizard.account.move.manage.asset']
+        for num, category in enumerate(self.categories):
+            account = category.asset_account_id
+            move = self.get_account_move(account, 1000.0 * (num + 1))
+            wizards |= wizards.create({
+                'category_id': category.id,
+                'management_type': 'create',
+                'move_line_ids': [(6, 0, move.line_ids.filtered(
+                    lambda l: l.account_id == account
+                ).ids)],
+                'name': "Benchmark Asset from Move %d" % num,
+                'purchase_date': move.date,
+            })
+        with self.benchmark('create_assets_from_moves'):
+            for wizard in wizards:
+                wizard.link_asset()
+
+    def test_create_assets_from_invoices(self):
+        wizards = self.env['wizard.invoice.manage.asset']
+        for num, category in enumerate(self.categories):
+            invoice = self.env['account.invoice'].create({
+                'date_invoice': self.last_fiscal_year.date_to,
+                'invoice_line_ids': [(0, 0, {
+                    'account_id': category.asset_account_id.id,
+                    'name': "Benchmark",
+                    'price_unit': 1000.0 * (num + 1),
+                    'quantity': 1,
+                })],
+                'partner_id': self.partner.id,
+                'type': 'in_invoice',
+            })
+            invoice.action_invoice_open()
+            wizards |= wizards.create({
+                'category_id': category.id,
+                'invoice_line_ids': [(6, 0, invoice.invoice_line_ids.ids)],
+                'management_type': 'create',
+                'name': "Benchmark Asset from Invoice %d" % num,
+                'purchase_date': invoice.date_invoice,
+            })
+        with self.benchmark('create_assets_from_invoices'):
+            for wizard in wizards:
+                wizard.link_asset()
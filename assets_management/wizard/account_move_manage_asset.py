@@ -28,6 +28,19 @@ class WizardAccountMoveManageAsset(models.TransientModel):
         string="Purchase Amount"
     )
 
+    batch_log = fields.Text(
+        readonly=True,
+        string="Batch Outcome",
+    )
+
+    batch_mode = fields.Boolean(
+        help="If set, a new asset is created for each move and asset"
+             " category: move lines are grouped by move and by the category"
+             " using their account as asset account. Lines that can't be"
+             " linked are skipped and reported.",
+        string="Batch Mode",
+    )
+
     category_id = fields.Many2one(
         'asset.category',
         string="Category",
@@ -160,6 +173,9 @@ class WizardAccountMoveManageAsset(models.TransientModel):
     @api.multi
     def link_asset(self):
         self.ensure_one()
+        if self.batch_mode and self.management_type == 'create':
+            return self.link_assets_batch()
+
         self.check_pre_link_asset()
 
         method = self.get_management_type_2_method().get(self.management_type)
@@ -187,6 +203,31 @@ class WizardAccountMoveManageAsset(models.TransientModel):
 
         return asset
 
+    @api.multi
+    def link_assets_batch(self):
+        self.ensure_one()
+        assets = self.create_assets_batch()
+
+        if self._context.get('show_asset'):
+            act_xmlid = 'assets_management.action_asset'
+            act = self.env.ref(act_xmlid).read()[0]
+            act['domain'] = [('id', 'in', assets.ids)]
+            return act
+
+        return self.launch_batch_log()
+
+    @api.multi
+    def launch_batch_log(self):
+        """ Reopens the wizard to show the outcome of every line """
+        return {
+            'name': _("Link to Assets"),
+            'res_id': self.id,
+            'res_model': self._name,
+            'target': 'new',
+            'type': 'ir.actions.act_window',
+            'view_mode': 'form',
+        }
+
     def check_pre_create_asset(self):
         self.ensure_one()
         if not self.move_line_ids:
@@ -327,6 +368,35 @@ class WizardAccountMoveManageAsset(models.TransientModel):
         self.check_pre_create_asset()
         return self.env['asset.asset'].create(self.get_create_asset_vals())
 
+    def create_assets_batch(self):
+        """
+        Creates an asset for each group of move lines returned by
+        `get_batch_line_groups` with a single `create()` call, logs the
+        outcome of every line and returns the new assets
+        """
+        self.ensure_one()
+        groups, log = self.get_batch_line_groups()
+        vals_list = [
+            self.get_batch_create_asset_vals(lines, category)
+            for (_move, category), lines in groups.items()
+        ]
+        assets = self.env['asset.asset'].create(vals_list)
+
+        for asset, lines in zip(assets, groups.values()):
+            asset_name = asset.make_name()
+            for line in lines:
+                log[line] = _("asset `{}` created").format(asset_name)
+
+        self.batch_log = "\n".join(
+            "{} - {}: {}".format(l.move_id.name, l.name, log[l])
+            for l in self.move_line_ids if l in log
+        )
+        if not assets:
+            raise ValidationError(
+                _("No asset could be created:\n") + self.batch_log
+            )
+        return assets
+
     def dismiss_asset(self):
         """ Dismisses asset and returns it """
         self.ensure_one()
@@ -367,6 +437,76 @@ class WizardAccountMoveManageAsset(models.TransientModel):
             'used': self.used,
         }
 
+    def get_batch_create_asset_vals(self, lines, category):
+        """ Prepares values to create an asset for batch lines """
+        self.ensure_one()
+        supplier = self.env['res.partner']
+        if len(lines.mapped('partner_id')) == 1:
+            supplier = lines.mapped('partner_id')
+        move = lines.mapped('move_id')
+        return {
+            'asset_accounting_info_ids': [
+                (0, 0, {'move_line_id': l.id,
+                        'relation_type': self.management_type})
+                for l in lines
+            ],
+            'category_id': category.id,
+            'company_id': self.company_id.id,
+            'currency_id': self.currency_id.id,
+            'name': self.name or lines[0].name,
+            'purchase_amount': lines.get_asset_purchase_amount(
+                currency=self.currency_id
+            ),
+            'purchase_date': move.date or self.purchase_date,
+            'purchase_move_id': move.id,
+            'supplier_id': supplier.id,
+            'supplier_ref': move.ref or "",
+            'used': self.used,
+        }
+
+    def get_batch_line_groups(self):
+        """
+        Groups move lines by move and by the category using their account
+        as asset account; the wizard category is preferred if many
+        categories share the same account.
+        Categories are retrieved with a single search.
+        :return: tuple (dict {(move, category): move lines},
+        dict {move line: message} for every line that can't be linked)
+        """
+        self.ensure_one()
+        lines = self.move_line_ids
+        categories_by_account = {}
+        for category in self.env['asset.category'].search([
+            ('asset_account_id', 'in', lines.mapped('account_id').ids),
+            ('company_id', 'in', (False, self.company_id.id)),
+        ]):
+            categories_by_account.setdefault(
+                category.asset_account_id, self.env['asset.category']
+            )
+            categories_by_account[category.asset_account_id] |= category
+
+        groups, log = {}, {}
+        for line in lines:
+            categories = categories_by_account.get(line.account_id)
+            if line.asset_accounting_info_ids:
+                log[line] = _("skipped, already linked to an asset")
+            elif not categories:
+                log[line] = _(
+                    "skipped, account `{}` is not an asset account"
+                ).format(line.account_id.name_get()[0][-1])
+            elif len(categories) > 1 \
+                    and self.category_id not in categories:
+                log[line] = _(
+                    "skipped, many categories use account `{}`"
+                ).format(line.account_id.name_get()[0][-1])
+            else:
+                if len(categories) > 1:
+                    categories = self.category_id
+                key = (line.move_id, categories)
+                groups.setdefault(key, self.env['account.move.line'])
+                groups[key] |= line
+        return groups, log
+
     def get_dismiss_asset_vals(self):
         self.ensure_one()
         asset = self.asset_id
@@ -50,6 +50,12 @@ class WizardAssetsGenerateDepreciations(models.TransientModel):
         string="Depreciation Date",
     )
 
+    group_account_moves = fields.Boolean(
+        help="If checked, a single account move is created for depreciations"
+             " of assets with the same category, journal and date.",
+        string="Group Account Moves",
+    )
+
     type_ids = fields.Many2many(
         'asset.depreciation.type',
         default=get_default_type_ids,
@@ -68,7 +74,9 @@ class WizardAssetsGenerateDepreciations(models.TransientModel):
         # Add depreciation date in context just in case
         deps = self.get_depreciations().with_context(dep_date=self.date_dep)
         dep_lines = deps.generate_depreciation_lines(self.date_dep)
-        deps.post_generate_depreciation_lines(dep_lines)
+        deps.post_generate_depreciation_lines(
+            dep_lines, group_moves=self.group_account_moves
+        )
         if self._context.get('reload_window'):
             return {
                 'type': 'ir.actions.client',
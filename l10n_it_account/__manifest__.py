@@ -8,7 +8,7 @@
 {
     'name': 'ITA - Contabilità base',
     'summary': 'Modulo base usato come dipendenza di altri moduli contabili',
-    'version': '12.0.1.4.5',
+    'version': '12.0.1.6.0',
     "development_status": "Production/Stable",
     'category': 'Hidden',
     'author': "Agile Business Group, Abstract, "
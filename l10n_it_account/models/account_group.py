@@ -1,6 +1,6 @@
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
 
-from odoo import _, api, fields, models
+from odoo import _, api, fields, models, tools
 from odoo.exceptions import ValidationError
 
 
@@ -17,6 +17,84 @@ class AccountGroup(models.Model):
         string="Balance sign",
     )
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.clear_caches()
+        return super().create(vals_list)
+
+    @api.multi
+    def write(self, vals):
+        if 'parent_id' not in vals:
+            return super().write(vals)
+        # Clear the hierarchy index both before and after writing, so that
+        # constraints computed during `write` see the new parents
+        self.clear_caches()
+        res = super().write(vals)
+        self.clear_caches()
+        return res
+
+    @api.multi
+    def unlink(self):
+        res = super().unlink()
+        self.clear_caches()
+        return res
+
+    @api.model
+    @tools.ormcache()
+    def _get_group_hierarchy(self):
+        """
+        Loads the whole groups hierarchy with one query.
+        The index is cached and cleared whenever groups are created,
+        deleted or moved.
+        Returned values are shared by every caller: do not modify them.
+        :return: tuple ({group id: parent id}, {group id: children ids})
+        """
+        self.env.cr.execute("""
+            SELECT id, parent_id
+            FROM account_group
+            ORDER BY id
+        """)
+        parent_by_group = {}
+        children_by_group = {}
+        for group_id, parent_id in self.env.cr.fetchall():
+            parent_by_group[group_id] = parent_id
+            if parent_id:
+                children_by_group.setdefault(parent_id, []).append(group_id)
+        return parent_by_group, children_by_group
+
+    def _get_parent_ids(self):
+        """
+        Same as `get_group_parents`, using the cached hierarchy index.
+        :return: list of parents ids, from nearest parent to progenitor
+        """
+        self.ensure_one()
+        parent_by_group = self._get_group_hierarchy()[0]
+        parent_ids = []
+        # Start from the record itself to support groups not saved yet
+        parent_id = self.parent_id.id
+        while parent_id:
+            if parent_id in parent_ids:
+                raise ValidationError(
+                    _("A recursion in '{}' parents has been found.")
+                    .format(self.name_get()[0][-1])
+                )
+            parent_ids.append(parent_id)
+            parent_id = parent_by_group.get(parent_id)
+        return parent_ids
+
+    def _get_subgroup_ids(self):
+        """ Same as `get_group_subgroups`, using the hierarchy index. """
+        children_by_group = self._get_group_hierarchy()[1]
+        subgroup_ids = set()
+        to_visit = list(self.ids)
+        while to_visit:
+            children_ids = children_by_group.get(to_visit.pop(), [])
+            for child_id in children_ids:
+                if child_id not in subgroup_ids:
+                    subgroup_ids.add(child_id)
+                    to_visit.append(child_id)
+        return subgroup_ids
+
     @api.constrains('parent_id')
     def check_parent_recursion(self):
         for group in self:
@@ -43,13 +121,13 @@ class AccountGroup(models.Model):
         self.check_parent_recursion()
         if self.env.context.get("skip_check_balance_sign_coherence"):
             return
-        done_group_ids, progenitor_ids = [], []
+        done_group_ids, progenitor_ids = set(), []
         for group in self:
             if group.id in done_group_ids:
                 continue
             progenitor = group.get_group_progenitor()
             progenitor_ids.append(progenitor.id)
-            done_group_ids.extend(progenitor.get_group_subgroups().ids)
+            done_group_ids.update(progenitor.get_group_subgroups().ids)
 
         for progenitor in self.browse(tuple(set(progenitor_ids))):
             accounts = progenitor.get_group_accounts()
@@ -68,8 +146,15 @@ class AccountGroup(models.Model):
 
     @api.multi
     def _compute_account_balance_sign(self):
+        # Groups sharing the same progenitor share the same sign:
+        # compute it once per progenitor
+        sign_by_progenitor = {}
         for group in self:
-            group.account_balance_sign = group.get_account_balance_sign()
+            progenitor = group.get_group_progenitor()
+            if progenitor.id not in sign_by_progenitor:
+                sign_by_progenitor[progenitor.id] = \
+                    progenitor.get_account_balance_sign()
+            group.account_balance_sign = sign_by_progenitor[progenitor.id]
 
     def get_account_balance_sign(self):
         self.ensure_one()
@@ -96,24 +181,11 @@ class AccountGroup(models.Model):
         has no parents. If a recursion is found, an error is raised.
         """
         self.ensure_one()
-        parent_ids = []
-        parent = self.parent_id
-        while parent:
-            if parent.id in parent_ids:
-                raise ValidationError(
-                    _("A recursion in '{}' parents has been found.")
-                    .format(self.name_get()[0][-1])
-                )
-            else:
-                parent_ids.append(parent.id)
-                parent = parent.parent_id
-        return self.browse(parent_ids)
+        return self.browse(self._get_parent_ids())
 
     def get_group_subgroups(self):
         """ Retrieves every subgroup for groups `self`. """
         # Avoid recursion upon empty recordsets
         if not self:
             return self
-        subgroups = self.search([('parent_id', 'in', self.ids)])
-        subgroup_ids = subgroups.ids + subgroups.get_group_subgroups().ids
-        return self.browse(tuple(set(subgroup_ids)))
+        return self.browse(tuple(self._get_subgroup_ids()))
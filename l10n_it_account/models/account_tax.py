@@ -34,6 +34,15 @@ class AccountTax(models.Model):
             name = self.parent_tax_ids[0].name
         return name
 
+    def _get_totals_tax_context(self, data):
+        context = {
+            'from_date': data['from_date'],
+            'to_date': data['to_date'],
+        }
+        if data.get('journal_ids'):
+            context['vat_registry_journal_ids'] = data['journal_ids']
+        return context
+
     def _compute_totals_tax(self, data):
         """
         Args:
@@ -43,19 +52,110 @@ class AccountTax(models.Model):
 
         """
         self.ensure_one()
-        context = {
-            'from_date': data['from_date'],
-            'to_date': data['to_date'],
+        context = self._get_totals_tax_context(data)
+        tax = self.env['account.tax'].with_context(context).browse(self.id)
+        if not tax.children_tax_ids:
+            balances = {tax.id: tax.balance}
+        else:
+            balances = {
+                child.id: child.balance for child in tax.children_tax_ids
+            }
+        return tax._get_totals_tax(data, tax.base_balance, balances)
+
+    def _compute_totals_taxes(self, data):
+        """
+        Same as `_compute_totals_tax`, for every tax in `self`:
+        balances of every tax are computed with two grouped queries.
+
+        Args:
+            data: date range, journals and registry_type
+        Returns:
+            A dict {tax id: (tax_name, base, tax, deductible, undeductible)}
+
+        """
+        context = self._get_totals_tax_context(data)
+        taxes = self.env['account.tax'].with_context(context).browse(self.ids)
+        balances = (taxes | taxes.mapped('children_tax_ids')) \
+            ._get_grouped_balances('tax')
+        base_balances = taxes._get_grouped_balances('base')
+        return {
+            tax.id: tax._get_totals_tax(
+                data, base_balances.get(tax.id, 0), balances)
+            for tax in taxes
         }
-        registry_type = data.get('registry_type', 'customer')
-        if data.get('journal_ids'):
-            context['vat_registry_journal_ids'] = data['journal_ids']
 
-        tax = self.env['account.tax'].with_context(context).browse(self.id)
+    def _get_grouped_balances(self, tax_or_base='tax'):
+        """
+        Computes the balance (as `compute_balance` does) of every tax in
+        `self` with one query grouped by tax.
+
+        Returns:
+            A dict {tax id: balance}
+
+        """
+        if not self:
+            return {}
+        if tax_or_base == 'tax':
+            field_name = 'tax_line_id'
+        else:
+            field_name = 'tax_ids'
+        # Every tax shares the same domain, except for the tax itself
+        domain = [
+            (field_name, 'in', self.ids)
+            if isinstance(leaf, (list, tuple)) and leaf[0] == field_name
+            else leaf
+            for leaf in self[0].get_move_lines_domain(tax_or_base=tax_or_base)
+        ]
+        move_line_model = self.env['account.move.line']
+        query = move_line_model._where_calc(domain)
+        move_line_model._apply_ir_rules(query, 'read')
+        from_clause, where_clause, where_params = query.get_sql()
+        if tax_or_base == 'tax':
+            sql = """
+                SELECT account_move_line.tax_line_id,
+                    SUM(account_move_line.balance)
+                FROM {from_clause}
+                WHERE {where_clause}
+                GROUP BY account_move_line.tax_line_id
+            """
+            params = where_params
+        else:
+            sql = """
+                SELECT rel.account_tax_id, SUM(account_move_line.balance)
+                FROM {from_clause},
+                    account_move_line_account_tax_rel rel
+                WHERE {where_clause}
+                    AND rel.account_move_line_id = account_move_line.id
+                    AND rel.account_tax_id IN %s
+                GROUP BY rel.account_tax_id
+            """
+            params = where_params + [tuple(self.ids)]
+        self.env.cr.execute(
+            sql.format(from_clause=from_clause,
+                       where_clause=where_clause or 'TRUE'),
+            params)
+        # balance is debit - credit: invert it as `compute_balance` does
+        return {
+            tax_id: -(balance or 0.0)
+            for tax_id, balance in self.env.cr.fetchall()
+        }
+
+    def _get_totals_tax(self, data, base_balance, balances):
+        """
+        Args:
+            data: registry_type
+            base_balance: base balance of the tax
+            balances: dict {tax id: balance} of the tax and its children
+        Returns:
+            A tuple: (tax_name, base, tax, deductible, undeductible)
+
+        """
+        self.ensure_one()
+        tax = self
+        registry_type = data.get('registry_type', 'customer')
         tax_name = tax._get_tax_name()
         if not tax.children_tax_ids:
-            base_balance = tax.base_balance
-            balance = tax.balance
+            balance = balances.get(tax.id, 0)
             if registry_type == 'supplier':
                 base_balance = -base_balance
                 balance = -balance
@@ -63,13 +163,11 @@ class AccountTax(models.Model):
                 tax_name, base_balance, balance, balance, 0
             )
         else:
-            base_balance = tax.base_balance
-
             tax_balance = 0
             deductible = 0
             undeductible = 0
             for child in tax.children_tax_ids:
-                child_balance = child.balance
+                child_balance = balances.get(child.id, 0)
                 if (
                     (
                         data['registry_type'] == 'customer' and
@@ -34,3 +34,24 @@ class TestAccount(TransactionCase):
                 'user_type_id': self.data_account_type_current_liabilities.id,
                 'company_id': self.company.id
             })
+
+    def test_group_hierarchy(self):
+        group_obj = self.env['account.group']
+        group_11 = group_obj.create({
+            'name': '11',
+            'parent_id': self.group_1.id,
+        })
+        group_111 = group_obj.create({
+            'name': '111',
+            'parent_id': group_11.id,
+        })
+        self.assertEqual(group_111.get_group_parents(),
+                         group_11 | self.group_1)
+        self.assertEqual(group_111.get_group_progenitor(), self.group_1)
+        self.assertEqual(self.group_1.get_group_subgroups(),
+                         group_11 | group_111)
+
+        # Moving a group refreshes the hierarchy
+        group_111.parent_id = self.group_1
+        self.assertEqual(group_111.get_group_parents(), self.group_1)
+        self.assertEqual(group_11.get_group_subgroups(), group_obj)
@@ -121,41 +121,40 @@ class ReportAccountBalanceReport(models.TransientModel):
         r_sec, r_name = cols['right']['section'], cols['right']['name']
         valid_sections = [l_sec, r_sec]
 
-        for trial_acc_line in self.trial_balance_id.account_ids:
-            section = self.get_report_section(
-                trial_acc_line.account_id, trial_acc_line.account_group_id
-            )
-            if not (section and section in valid_sections):
-                continue
+        trial_data = [
+            d for d in self.get_trial_balance_data()
+            if d['section'] in valid_sections
+        ]
+        self.apply_balance_signs(trial_data)
 
-            sign = trial_acc_line.get_balance_sign()
-            trial_acc_line.final_balance *= sign
-            for trial_partner_line in trial_acc_line.partner_ids:
-                trial_partner_line.final_balance *= sign
-
-            balance_line_vals = (
-                0, 0, {
-                    'date_from': self.date_from,
-                    'date_to': self.date_to,
-                    'report_partner_ids': [(
-                        0, 0, {
-                            'date_from': self.date_from,
-                            'date_to': self.date_to,
-                            'report_id': self.id,
-                            'trial_balance_partner_id': pid
-                        }) for pid in trial_acc_line.partner_ids.ids],
-                    'trial_balance_line_id': trial_acc_line.id,
-                }
-            )
+        for trial_acc_data in trial_data:
+            section = trial_acc_data['section']
+            if section == r_sec:
+                if not trial_acc_data['account_group_id']:
+                    total_credit += trial_acc_data['final_balance']
+            elif section == l_sec:
+                if not trial_acc_data['account_group_id']:
+                    total_debit += trial_acc_data['final_balance']
+            if self.is_hidden_balance(trial_acc_data):
+                continue
 
+            balance_line_vals = {
+                'date_from': self.date_from,
+                'date_to': self.date_to,
+                'trial_balance_line_id': trial_acc_data['id'],
+            }
             if section == r_sec:
+                balance_line_vals['report_credit_id'] = self.id
                 section_credit_vals.append(balance_line_vals)
-                if not trial_acc_line.account_group_id:
-                    total_credit += trial_acc_line.final_balance
-            elif section == l_sec:
+            else:
+                balance_line_vals['report_debit_id'] = self.id
                 section_debit_vals.append(balance_line_vals)
-                if not trial_acc_line.account_group_id:
-                    total_debit += trial_acc_line.final_balance
+            balance_line_vals['report_partner_ids'] = [
+                d['id'] for d in trial_acc_data['partner_lines']
+                if not self.is_hidden_partner_balance(d)
+            ]
+
+        self.create_section_lines(section_debit_vals + section_credit_vals)
 
         curr = self.company_id.currency_id or self.company_id._get_euro()
         digits = curr.decimal_places
@@ -170,8 +169,6 @@ class ReportAccountBalanceReport(models.TransientModel):
         self.write({
             'left_col_name': l_name,
             'right_col_name': r_name,
-            'section_credit_ids': section_credit_vals,
-            'section_debit_ids': section_debit_vals,
             'title': cols['title'],
             'total_balance': total_balance,
             'total_credit': total_credit,
@@ -208,6 +205,182 @@ class ReportAccountBalanceReport(models.TransientModel):
             },
         }
 
+    def get_trial_balance_data(self):
+        """
+        Reads the trial balance lines and their partner lines in a few
+        grouped queries.
+        :returns: list of dicts, one per trial balance line (in the trial
+        balance order), with keys 'id', 'account_id', 'account_group_id',
+        'final_balance', 'currency_id', 'section', 'sign' and
+        'partner_lines' (list of dicts with keys 'id', 'final_balance' and
+        'currency_id')
+        """
+        self.ensure_one()
+        trial_lines = self.trial_balance_id.account_ids
+        if not trial_lines:
+            return []
+        lines_data = trial_lines.read(
+            ['account_id', 'account_group_id', 'final_balance', 'currency_id'],
+            load='',
+        )
+        account_ids = {d['account_id'] for d in lines_data if d['account_id']}
+        group_ids = {
+            d['account_group_id'] for d in lines_data
+            if d['account_group_id'] and not d['account_id']
+        }
+        account_info = self.get_accounts_section_sign(account_ids)
+        group_info = self.get_groups_section_sign(group_ids)
+
+        partner_lines = self.env['report_trial_balance_partner'].search(
+            [('report_account_id', 'in', trial_lines.ids)]
+        ).read(
+            ['report_account_id', 'final_balance', 'currency_id'],
+            load='',
+        )
+        partner_lines_by_line = {}
+        for partner_data in partner_lines:
+            partner_lines_by_line.setdefault(
+                partner_data['report_account_id'], []
+            ).append(partner_data)
+
+        for line_data in lines_data:
+            if line_data['account_id']:
+                section, sign = account_info.get(
+                    line_data['account_id'], ('', 1))
+            elif line_data['account_group_id']:
+                section, sign = group_info.get(
+                    line_data['account_group_id'], ('', 1))
+            else:
+                section, sign = '', 1
+            line_data.update({
+                'section': section,
+                'sign': sign,
+                'partner_lines': partner_lines_by_line.get(
+                    line_data['id'], []),
+            })
+        return lines_data
+
+    def get_accounts_section_sign(self, account_ids):
+        """
+        :returns: {account id: (report section, balance sign)}
+        """
+        if not account_ids:
+            return {}
+        self.env.cr.execute("""
+            SELECT aa.id,
+                aat.account_balance_report_section,
+                aat.account_balance_sign
+            FROM account_account aa
+            JOIN account_account_type aat ON aat.id = aa.user_type_id
+            WHERE aa.id IN %s
+        """, (tuple(account_ids),))
+        return {
+            account_id: (section or '', sign or 1)
+            for account_id, section, sign in self.env.cr.fetchall()
+        }
+
+    def get_groups_section_sign(self, group_ids):
+        """
+        A group's section is the section of its first account (see
+        `get_report_section`), its sign is the group's balance sign.
+        :returns: {group id: (report section, balance sign)}
+        """
+        if not group_ids:
+            return {}
+        self.env.cr.execute("""
+            SELECT DISTINCT ON (aa.group_id)
+                aa.group_id,
+                aat.account_balance_report_section
+            FROM account_account aa
+            JOIN account_account_type aat ON aat.id = aa.user_type_id
+            WHERE aa.group_id IN %s
+            ORDER BY aa.group_id, aa.code, aa.id
+        """, (tuple(group_ids),))
+        sections = dict(self.env.cr.fetchall())
+        groups = self.env['account.group'].browse(tuple(group_ids))
+        return {
+            group.id: (sections.get(group.id) or '',
+                       group.account_balance_sign)
+            for group in groups
+        }
+
+    def apply_balance_signs(self, trial_data):
+        """
+        Applies balance signs to the final balance of trial balance lines
+        (and of their partner lines) with one update per table.
+        """
+        line_ids = [d['id'] for d in trial_data if d['sign'] == -1]
+        if not line_ids:
+            return
+        for line_data in trial_data:
+            if line_data['sign'] == -1:
+                line_data['final_balance'] *= -1
+                for partner_data in line_data['partner_lines']:
+                    partner_data['final_balance'] *= -1
+
+        line_obj = self.env['report_trial_balance_account']
+        partner_obj = self.env['report_trial_balance_partner']
+        self.env.cr.execute("""
+            UPDATE report_trial_balance_account
+            SET final_balance = -final_balance
+            WHERE id IN %s
+        """, (tuple(line_ids),))
+        self.env.cr.execute("""
+            UPDATE report_trial_balance_partner
+            SET final_balance = -final_balance
+            WHERE report_account_id IN %s
+        """, (tuple(line_ids),))
+        line_obj.invalidate_cache(['final_balance'])
+        partner_obj.invalidate_cache(['final_balance'])
+
+    def is_hidden_balance(self, line_data):
+        """
+        Balance and partner lines at 0 are not shown when the user chooses
+        to hide accounts at 0: there is no need to create them.
+        """
+        if not self.hide_account_at_0:
+            return False
+        currency = self.env['res.currency'].browse(line_data['currency_id'])
+        currency = currency or self.company_id.currency_id
+        return float_is_zero(
+            line_data['final_balance'],
+            precision_rounding=currency.rounding or 0.01,
+        )
+
+    def is_hidden_partner_balance(self, partner_data):
+        """ Mirrors `account_balance_report_partner._compute_hide_line` """
+        if not self.hide_account_at_0:
+            return False
+        currency = self.env['res.currency'].browse(partner_data['currency_id'])
+        return float_is_zero(partner_data['final_balance'],
+                             currency.decimal_places)
+
+    def create_section_lines(self, section_vals):
+        """
+        Creates section lines, then their partner lines, with a bulk
+        create each.
+        Values in `section_vals` hold the trial balance partner lines ids
+        under key 'report_partner_ids'.
+        """
+        partner_ids_list = [v.pop('report_partner_ids') for v in section_vals]
+        section_lines = self.env['account_balance_report_account'].create(
+            section_vals
+        )
+        partner_vals = [
+            {
+                'date_from': self.date_from,
+                'date_to': self.date_to,
+                'report_id': self.id,
+                'report_section_id': section_line.id,
+                'trial_balance_partner_id': pid,
+            }
+            for section_line, partner_ids in zip(section_lines,
+                                                 partner_ids_list)
+            for pid in partner_ids
+        ]
+        self.env['account_balance_report_partner'].create(partner_vals)
+        return section_lines
+
     def get_report_section(self, account=None, group=None):
         section = ''
         if not account and group and group.account_ids:
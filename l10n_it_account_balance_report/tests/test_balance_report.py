@@ -111,3 +111,36 @@ class TestBalanceReport (tests.SavepointCase):
         # Assert: The Account Code is shown
         self.assertIn(account.code, report_content)
         self.assertIn(account.name, report_content)
+
+    def test_balance_signs(self):
+        """Revenues are shown with a positive balance
+        and hidden accounts are not added to the report.
+        """
+        # Arrange
+        invoice = self.posted_invoice
+        account = invoice.invoice_line_ids.account_id
+        # pre-condition: An Invoice is posted
+        self.assertEqual(invoice.state, 'open')
+
+        # Act: Compute the Profit & Loss containing the Invoice,
+        # hiding accounts at 0
+        one_day = timedelta(days=1)
+        wiz = self.env['trial.balance.report.wizard'].create({
+            'account_balance_report_type': 'profit_loss',
+            'hide_account_at_0': True,
+            'date_from': invoice.date_invoice - one_day,
+            'date_to': invoice.date_invoice + one_day,
+        })
+        report = self.env['account_balance_report'].create(
+            wiz.prepare_report_vals())
+        report.compute_data_for_report()
+
+        # Assert: The revenue is positive and zero balances are not created
+        revenue_line = report.section_credit_ids.filtered(
+            lambda line: line.account_id == account)
+        self.assertEqual(revenue_line.final_balance, invoice.amount_untaxed)
+        self.assertEqual(report.total_credit, invoice.amount_untaxed)
+        self.assertFalse(
+            (report.section_credit_ids | report.section_debit_ids)
+            .filtered(lambda line: not line.account_group_id
+                      and not line.final_balance))
@@ -1,6 +1,7 @@
 # Copyright 2019-2023 Openforce Srls Unipersonale (www.openforce.it)
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/lgpl).
 
+from . import import_code_mixin
 from . import asset
 from . import asset_category
 from . import asset_depreciation_line
@@ -24,7 +24,7 @@ def pop_import_code(vals):
 
 
 class Asset(models.Model):
-    _inherit = 'asset.asset'
+    _inherit = ['asset.asset', 'asset.import.code.mixin']
 
     import_code = fields.Char(
         copy=False,
@@ -15,7 +15,7 @@ def pop_import_code(vals):
 
 
 class AssetCategory(models.Model):
-    _inherit = 'asset.category'
+    _inherit = ['asset.category', 'asset.import.code.mixin']
 
     import_code = fields.Char(
         copy=False,
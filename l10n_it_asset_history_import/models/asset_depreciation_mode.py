@@ -15,7 +15,7 @@ def pop_import_code(vals):
 
 
 class DepreciationMode(models.Model):
-    _inherit = 'asset.depreciation.mode'
+    _inherit = ['asset.depreciation.mode', 'asset.import.code.mixin']
 
     import_code = fields.Char(
         copy=False,
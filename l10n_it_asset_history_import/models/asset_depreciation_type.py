@@ -15,7 +15,7 @@ def pop_import_code(vals):
 
 
 class DepreciationType(models.Model):
-    _inherit = 'asset.depreciation.type'
+    _inherit = ['asset.depreciation.type', 'asset.import.code.mixin']
 
     import_code = fields.Char(
         copy=False,
@@ -0,0 +1,24 @@
+# Copyright 2019-2023 Openforce Srls Unipersonale (www.openforce.it)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/lgpl).
+
+from odoo import api, models
+
+
+class ImportCodeMixin(models.AbstractModel):
+    _name = 'asset.import.code.mixin'
+    _description = "Records referenced by import code"
+
+    @api.model
+    def get_by_import_codes(self, codes):
+        """ Returns dict {import code: records} for every code in `codes` """
+        res = {code: self.browse() for code in codes}
+        if not res:
+            return res
+        self._cr.execute(
+            "SELECT import_code, id FROM {} WHERE import_code IN %s"
+            .format(self._table),
+            (tuple(res),)
+        )
+        for code, rec_id in self._cr.fetchall():
+            res[code] |= self.browse(rec_id)
+        return res
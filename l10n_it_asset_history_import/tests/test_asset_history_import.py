@@ -0,0 +1,89 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from unittest import mock
+
+from odoo.tests.common import TransactionCase
+
+from odoo.addons.l10n_it_asset_history_import.wizards import \
+    asset_history_import
+
+
+class TestAssetHistoryImport(TransactionCase):
+
+    def setUp(self):
+        super().setUp()
+        account_model = self.env['account.account']
+        fixed_account = account_model.search([(
+            'user_type_id', '=',
+            self.env.ref('account.data_account_type_fixed_assets').id,
+        )], limit=1)
+        expense_account = account_model.search([(
+            'user_type_id', '=',
+            self.env.ref('account.data_account_type_expenses').id,
+        )], limit=1)
+        self.category = self.env['asset.category'].create({
+            'name': 'Imported asset category',
+            'asset_account_id': fixed_account.id,
+            'depreciation_account_id': expense_account.id,
+            'fund_account_id': fixed_account.id,
+            'gain_account_id': expense_account.id,
+            'loss_account_id': expense_account.id,
+            'journal_id': self.env['account.journal'].search(
+                [('type', '=', 'general')], limit=1).id,
+        })
+        self.dep_type = self.env.ref('assets_management.ad_type_civilistico')
+        self.dep_mode = self.env.ref('assets_management.ad_mode_materiale')
+        # Import codes are assigned through SQL
+        self.env.invalidate_all()
+        self.wizard = self.env['wizard.asset.history.import'].create({})
+
+    def _get_row(self, n, move_type='depreciated'):
+        return {
+            0: 'Imported asset %s' % n,
+            1: self.category.import_code,
+            2: '',
+            3: 'IMPORTED-ASSET-%s' % n,
+            4: '',
+            5: self.env.user.company_id.currency_id.name,
+            6: '01/01/2019',
+            7: 1000.0,
+            8: '',
+            9: 0.0,
+            10: self.dep_type.import_code,
+            11: self.dep_mode.import_code,
+            12: '01/01/2019',
+            13: '',
+            14: '',
+            15: 25.0,
+            16: 1.0,
+            17: 1000.0,
+            18: 'Imported line %s' % n,
+            19: '31/12/2019',
+            20: move_type,
+            21: 250.0,
+        }
+
+    def test_import_failing_chunk(self):
+        """
+        A chunk failing to be imported is rolled back,
+        while the other chunks are kept
+        """
+        rows = [
+            self._get_row(1),
+            self._get_row(2, move_type='not_a_move_type'),
+            self._get_row(3),
+        ]
+        with mock.patch.object(asset_history_import, 'IMPORT_CHUNK_SIZE', 1):
+            assets = self.wizard.import_assets_from_data(rows, None, None)
+
+        self.assertEqual(
+            assets.mapped('name'), ['Imported asset 1', 'Imported asset 3'])
+        self.assertEqual(
+            assets.mapped('depreciation_ids.line_ids.name'),
+            ['Imported line 1', 'Imported line 3'])
+        self.assertFalse(self.env['asset.asset'].search(
+            [('name', '=', 'Imported asset 2')]))
+        self.assertFalse(self.env['asset.depreciation.line'].search(
+            [('name', '=', 'Imported line 2')]))
+        self.assertIn('IMPORTED-ASSET-2', self.wizard.import_log)
+        self.assertNotIn('IMPORTED-ASSET-1', self.wizard.import_log)
@@ -5,14 +5,19 @@ import base64
 import logging
 import xlrd
 
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 from datetime import datetime, date
 
 from odoo import _, api, fields, models
 from odoo.exceptions import ValidationError
+from odoo.tools import split_every
 
 _logger = logging.getLogger(__name__)
 
+# Assets are created, with their depreciations and lines, by chunks of this
+# size: each chunk is imported within its own savepoint
+IMPORT_CHUNK_SIZE = 500
+
 
 # Map every keyword to useful info
 Header = namedtuple(
@@ -337,6 +342,13 @@ class AssetHistoryImport(models.TransientModel):
     def get_default_company_id(self):
         return self.env.user.company_id
 
+    commit_by_chunk = fields.Boolean(
+        help="If checked, data is committed after every chunk of imported"
+             " assets, so that chunks already imported are kept even if the"
+             " import is interrupted. Useful for very large files.",
+        string="Commit Every Chunk",
+    )
+
     company_id = fields.Many2one(
         'res.company',
         default=get_default_company_id,
@@ -352,6 +364,11 @@ class AssetHistoryImport(models.TransientModel):
         string="File Name"
     )
 
+    import_log = fields.Text(
+        readonly=True,
+        string="Import Errors",
+    )
+
     template_file = fields.Binary(
         string="Template File"
     )
@@ -387,6 +404,8 @@ class AssetHistoryImport(models.TransientModel):
         self.check_before_import()
         file_data, workbook, sheet = self.parse_file()
         assets = self.import_assets_from_data(file_data, workbook, sheet)
+        if self.import_log:
+            return self.launch_import_log()
         if not assets:
             raise ValidationError(
                 _("Nothing could be imported.")
@@ -394,6 +413,18 @@ class AssetHistoryImport(models.TransientModel):
 
         return self.launch_view(assets.ids)
 
+    @api.multi
+    def launch_import_log(self):
+        """ Reopens the wizard to show errors of chunks not imported """
+        return {
+            'name': _("Assets History Import"),
+            'res_id': self.id,
+            'res_model': self._name,
+            'target': 'new',
+            'type': 'ir.actions.act_window',
+            'view_mode': 'form',
+        }
+
     @api.multi
     def launch_view(self, asset_ids):
         """ Opens tree view upon assets """
@@ -414,28 +445,33 @@ class AssetHistoryImport(models.TransientModel):
                   " extension (only .xls and .xlsx are allowed).")
             )
 
-    def convert_to_asset_vals(self, asset_dict, workbook, sheet):
+    def convert_to_asset_vals(self, asset_dict, workbook, sheet,
+                              references=None):
         """
         Takes `asset_dict` as read from imported file, returns vals to be
         written into the DB (via a `create()` or `write()`
+        :param references: records related to the file, as returned by
+        `get_import_references`; if not set, they are searched
         """
         vals = convert_via_headers(asset_dict, 'asset.asset', workbook, sheet)
 
         categ_code = asset_dict[get_import_code_column('asset.category')]
-        categ = self.get_obj_by_import_code('asset.category', categ_code)
+        categ = self.get_reference('asset.category', categ_code, references)
         if not categ:
             raise ValidationError(
                 _("Could not find category for import code ") + categ_code
             )
 
         curr_col = get_header_by_model_and_field('res.currency', 'name').col
-        curr = self.env['res.currency'].search([
-            ('name', '=', asset_dict[curr_col])
-        ])
+        curr_name = asset_dict[curr_col]
+        if references is not None:
+            curr = references['res.currency'].get(curr_name)
+        else:
+            curr = self.env['res.currency'].search([('name', '=', curr_name)])
         if not curr:
             raise ValidationError(
                 _("Could not find currency for name '{}'.\n"
-                  "Is it in its ISO 4217 format?")
+                  "Is it in its ISO 4217 format?").format(curr_name)
             )
 
         vals.update({
@@ -446,10 +482,13 @@ class AssetHistoryImport(models.TransientModel):
 
         return vals
 
-    def convert_to_dep_vals(self, dep_dict, workbook, sheet):
+    def convert_to_dep_vals(self, dep_dict, workbook, sheet,
+                            references=None):
         """
         Takes `dep_dict` as read from imported file, returns vals to be
         written into the DB (via a `create()` or `write()`
+        :param references: records related to the file, as returned by
+        `get_import_references`; if not set, they are searched
         """
         vals = convert_via_headers(
             dep_dict, 'asset.depreciation', workbook, sheet
@@ -457,13 +496,13 @@ class AssetHistoryImport(models.TransientModel):
 
         mode_code = dep_dict[get_import_code_column('asset.depreciation.mode')]
         type_code = dep_dict[get_import_code_column('asset.depreciation.type')]
-        dep_mode = self.get_obj_by_import_code(
-            'asset.depreciation.mode', mode_code
+        dep_mode = self.get_reference(
+            'asset.depreciation.mode', mode_code, references
         )
-        dep_type = self.get_obj_by_import_code(
-            'asset.depreciation.type', type_code
+        dep_type = self.get_reference(
+            'asset.depreciation.type', type_code, references
         )
-        if not dep_mode and dep_type:
+        if not (dep_mode and dep_type):
             raise ValidationError(
                 _("Could not retrieve depreciation mode and type by codes"
                   " '{}' and '{}'.")
@@ -498,8 +537,42 @@ class AssetHistoryImport(models.TransientModel):
         """
         return self.env[model].get_by_import_code(code)
 
-    def import_assets_from_data(self, file_data, workbook, sheet):
-        grouped_data = {}
+    def get_import_references(self, grouped_data):
+        """
+        Retrieves every record referenced by the file with one query for
+        each model.
+        :return: dict {model: {import code (or currency name): records}}
+        """
+        references = {}
+        for model in ('asset.asset', 'asset.category',
+                      'asset.depreciation.mode', 'asset.depreciation.type'):
+            col = get_import_code_column(model)
+            codes = {
+                data['asset_data'].get(col) or data['dep_data'].get(col)
+                for data in grouped_data.values()
+            }
+            references[model] = self.env[model].get_by_import_codes(codes)
+
+        curr_col = get_header_by_model_and_field('res.currency', 'name').col
+        curr_names = {
+            data['asset_data'][curr_col] for data in grouped_data.values()
+        }
+        references['res.currency'] = {
+            curr.name: curr
+            for curr in self.env['res.currency'].search(
+                [('name', 'in', list(curr_names))]
+            )
+        }
+        return references
+
+    def get_reference(self, model, code, references=None):
+        if references is None:
+            return self.get_obj_by_import_code(model, code)
+        return references[model].get(code) or self.env[model]
+
+    def group_file_data(self, file_data):
+        """ Groups rows of the file by import codes """
+        grouped_data = OrderedDict()
         required_headers = tuple(filter(lambda h: h.required, HEADERS))
         for n, row in enumerate(file_data, start=2):
             missing_h = [h.name for h in required_headers if not row.get(h.col)]
@@ -529,62 +602,143 @@ class AssetHistoryImport(models.TransientModel):
                 n: v for n, v in row.items()
                 if HEADERS_BY_COL[n].apply_on == 'asset.depreciation.line'
             })
+        return grouped_data
 
-        ctx = dict(self._context or [], skip_depreciation_creation=True)
-        asset_obj = self.env['asset.asset'].with_context(ctx)
-        dep_obj = self.env['asset.depreciation']
-        dep_line_obj = self.env['asset.depreciation.line']
-        asset_ids = set()
-        asset_code_cache = dict()
+    def import_assets_from_data(self, file_data, workbook, sheet):
+        grouped_data = self.group_file_data(file_data)
+        references = self.get_import_references(grouped_data)
+
+        # Convert the whole file first: every error is reported at once,
+        # before anything is written
+        data_by_asset = OrderedDict()
+        errors = []
         for data in grouped_data.values():
             asset_data = data['asset_data']
             asset_code = asset_data[get_import_code_column('asset.asset')]
-            asset_vals = self.convert_to_asset_vals(
-                asset_data, workbook, sheet
+            try:
+                asset_vals = self.convert_to_asset_vals(
+                    asset_data, workbook, sheet, references
+                )
+                dep_vals = self.convert_to_dep_vals(
+                    data['dep_data'], workbook, sheet, references
+                )
+                lines_vals = self.convert_to_lines_vals(
+                    data['lines_data'], workbook, sheet
+                )
+            except ValidationError as e:
+                errors.append("{}: {}".format(asset_code, e.name))
+                continue
+            asset_vals.pop('import_code', None)
+            # Asset values come from its first group of rows, while values
+            # of a depreciation found in several groups are merged
+            asset_import_data = data_by_asset.setdefault(asset_code, {
+                'asset_vals': asset_vals,
+                'deps': OrderedDict(),
+            })
+            dep_key = (dep_vals['mode_id'], dep_vals['type_id'])
+            dep_import_data = asset_import_data['deps'].setdefault(dep_key, {
+                'dep_vals': {},
+                'lines_vals': [],
+            })
+            dep_import_data['dep_vals'].update(dep_vals)
+            dep_import_data['lines_vals'].extend(lines_vals)
+        if errors:
+            raise ValidationError(
+                _("Could not import the following assets:\n") +
+                "\n".join(errors)
             )
 
-            if asset_code in asset_code_cache:
-                asset = asset_code_cache[asset_code]
-            else:
-                asset = self.get_obj_by_import_code('asset.asset', asset_code)
-                if not asset:
-                    asset_vals.pop('import_code', None)
-                    asset = asset_obj.create(asset_vals)
-                elif len(asset) == 1:
-                    asset_vals.pop('import_code', None)
-                    asset.write(asset_vals)
-                else:
-                    raise ValidationError(
-                        _("Cannot determine the assets to update, found"
-                          " multiple assets with same code `{}`.")
-                        .format(asset_code)
+        asset_ids = []
+        log = []
+        for asset_codes in split_every(IMPORT_CHUNK_SIZE, data_by_asset):
+            chunk_data = OrderedDict(
+                (code, data_by_asset[code]) for code in asset_codes
+            )
+            try:
+                with self.env.cr.savepoint():
+                    assets = self.import_assets_chunk(chunk_data, references)
+            except Exception as e:
+                # Records of the chunk have been rolled back
+                self.env.clear()
+                _logger.exception("Error importing assets %s", asset_codes)
+                log.append(
+                    _("Assets {} have not been imported: {}").format(
+                        ", ".join(asset_codes),
+                        getattr(e, 'name', False) or str(e),
                     )
-                asset_code_cache[asset_code] = asset
+                )
+                continue
+            asset_ids += assets.ids
+            if self.commit_by_chunk:
+                self.env.cr.commit()  # pylint: disable=invalid-commit
 
-            dep_vals = self.convert_to_dep_vals(
-                data['dep_data'], workbook, sheet
-            )
-            dep = dep_obj.search(
-                [('asset_id', '=', asset.id),
-                 ('mode_id', '=', dep_vals['mode_id']),
-                 ('type_id', '=', dep_vals['type_id'])]
-            )
-            if dep:
-                dep.write(dep_vals)
-            else:
-                dep_vals.update({'asset_id': asset.id})
-                dep = dep_obj.create(dep_vals)
+        self.import_log = "\n".join(log)
+        return self.env['asset.asset'].browse(asset_ids)
 
-            lines_vals = self.convert_to_lines_vals(
-                data['lines_data'], workbook, sheet
-            )
-            for line_vals in lines_vals:
-                line_vals.update({'depreciation_id': dep.id})
-                dep_line_obj.create(line_vals)
+    def import_assets_chunk(self, chunk_data, references):
+        """
+        Creates or updates assets of `chunk_data`, then their depreciations
+        and depreciation lines, with a single `create()` call for each model
+        :param chunk_data: dict {asset import code: import data}
+        :param references: records related to the file, as returned by
+        `get_import_references`
+        """
+        ctx = dict(self._context or [], skip_depreciation_creation=True)
+        asset_obj = self.env['asset.asset'].with_context(ctx)
+        dep_obj = self.env['asset.depreciation']
+        dep_line_obj = self.env['asset.depreciation.line']
+
+        assets_by_code = {}
+        to_create = []
+        for asset_code, data in chunk_data.items():
+            asset = references['asset.asset'].get(asset_code) or asset_obj
+            if len(asset) > 1:
+                raise ValidationError(
+                    _("Cannot determine the assets to update, found"
+                      " multiple assets with same code `{}`.")
+                    .format(asset_code)
+                )
+            elif asset:
+                asset.write(data['asset_vals'])
+                assets_by_code[asset_code] = asset
+            else:
+                to_create.append(asset_code)
+        new_assets = asset_obj.create([
+            chunk_data[asset_code]['asset_vals'] for asset_code in to_create
+        ])
+        assets_by_code.update(zip(to_create, new_assets))
+
+        assets = asset_obj.browse([a.id for a in assets_by_code.values()])
+        deps_by_key = {}
+        for dep in dep_obj.search([('asset_id', 'in', assets.ids)]):
+            key = (dep.asset_id.id, dep.mode_id.id, dep.type_id.id)
+            deps_by_key[key] = deps_by_key.get(key, dep_obj) | dep
+
+        dep_to_create = []
+        lines_by_dep_key = []
+        for asset_code, data in chunk_data.items():
+            asset = assets_by_code[asset_code]
+            for (mode_id, type_id), dep_data in data['deps'].items():
+                key = (asset.id, mode_id, type_id)
+                dep = deps_by_key.get(key)
+                if dep:
+                    dep.write(dep_data['dep_vals'])
+                else:
+                    dep_to_create.append(
+                        dict(dep_data['dep_vals'], asset_id=asset.id)
+                    )
+                lines_by_dep_key.append((key, dep_data['lines_vals']))
+        for dep in dep_obj.create(dep_to_create):
+            deps_by_key[dep.asset_id.id, dep.mode_id.id, dep.type_id.id] = dep
 
-            asset_ids.add(asset.id)
+        lines_vals = []
+        for key, dep_lines_vals in lines_by_dep_key:
+            dep = deps_by_key[key]
+            for line_vals in dep_lines_vals:
+                lines_vals.append(dict(line_vals, depreciation_id=dep.id))
+        dep_line_obj.create(lines_vals)
 
-        return self.env['asset.asset'].browse(asset_ids)
+        return assets
 
     def parse_file(self):
         try:
@@ -609,8 +763,9 @@ class AssetHistoryImport(models.TransientModel):
                   " your own file to import.")
             )
 
-        data = [
+        # Rows are converted to dicts only while they are grouped
+        data = (
             {num: val for num, val in enumerate(sheet.row_values(x))}
             for x in range(1, sheet.nrows)
-        ]
+        )
         return data, workbook, sheet
@@ -6,6 +6,8 @@ import logging
 
 _logger = logging.getLogger(__name__)
 
+MOVE_LINE_BATCH_SIZE = 1000
+
 
 class ReportGiornale(models.AbstractModel):
     _name = 'report.l10n_it_central_journal.report_giornale'
@@ -24,6 +26,7 @@ class ReportGiornale(models.AbstractModel):
             'data': data,
             'docs': self.env['account.move.line'].browse(data['ids']),
             'get_move': self._get_move,
+            'get_move_lines': self._get_move_lines,
             'save_print_info': self._save_print_info,
             'env': self.env,
             'formatLang': formatLang,
@@ -43,6 +46,44 @@ class ReportGiornale(models.AbstractModel):
             'account.move.line'].browse(move_ids)
         return move_list
 
+    def _get_move_lines(self, data):
+        """Return the journal lines to be printed.
+
+        When the report is printed from the wizard, lines are streamed
+        in printing order, otherwise the explicit `ids` are browsed."""
+        form = data['form']
+        if 'journal_ids' not in form:
+            return self._get_move(data['ids'])
+        return self._iter_move_lines(form)
+
+    def _iter_move_lines(self, form, batch_size=MOVE_LINE_BATCH_SIZE):
+        """Walk the journal lines through a named (server-side) cursor,
+        prefetching the printed fields in batches of `batch_size` lines
+        and evicting each batch from the cache once printed."""
+        sql, params = self.env['wizard.giornale']._get_line_query(form)
+        move_line_model = self.env['account.move.line']
+        with self.env.cr._cnx.cursor(
+                'l10n_it_central_journal_lines') as cr:
+            cr.itersize = batch_size
+            cr.execute(sql, params)
+            while True:
+                rows = cr.fetchmany(batch_size)
+                if not rows:
+                    break
+                lines = move_line_model.browse([row[0] for row in rows])
+                self._prefetch_move_lines(lines)
+                for line in lines:
+                    yield line
+                moves = lines.mapped('move_id')
+                lines.invalidate_cache(ids=lines.ids)
+                moves.invalidate_cache(ids=moves.ids)
+
+    def _prefetch_move_lines(self, lines):
+        lines.mapped('move_id.name')
+        lines.mapped('account_id.code')
+        lines.mapped('account_id.user_type_id.type')
+        lines.mapped('partner_id.name')
+
     def _save_print_info(self, daterange_id, print_state, end_date_print,
                          end_row, end_debit, end_credit):
         res = False
@@ -85,12 +85,15 @@ class WizardGiornale(models.TransientModel):
             if self.last_def_date_print == self.daterange.date_end:
                 self.date_move_line_from_view = self.last_def_date_print
 
-    def get_line_ids(self):
-        wizard = self
-        if wizard.target_move == 'all':
-            target_type = ['posted', 'draft']
-        else:
-            target_type = [wizard.target_move]
+    def _get_target_type(self):
+        if self.target_move == 'all':
+            return ['posted', 'draft']
+        return [self.target_move]
+
+    @api.model
+    def _get_line_query(self, datas_form):
+        """Return the query (and its parameters) selecting the ids
+        of the journal lines to be printed, in printing order."""
         sql = """
             SELECT aml.id FROM account_move_line aml
             LEFT JOIN account_move am ON (am.id = aml.move_id)
@@ -102,16 +105,25 @@ class WizardGiornale(models.TransientModel):
             ORDER BY am.date, am.name
         """
         params = {
-            'date_from': wizard.date_move_line_from,
-            'date_to': wizard.date_move_line_to,
-            'target_type': tuple(target_type),
-            'journal_ids': tuple(self.journal_ids.ids)
+            'date_from': datas_form['date_move_line_from'],
+            'date_to': datas_form['date_move_line_to'],
+            'target_type': tuple(datas_form['target_type']),
+            'journal_ids': tuple(datas_form['journal_ids']),
             }
+        return sql, params
+
+    def get_line_ids(self):
+        sql, params = self._get_line_query(self._prepare_datas_form())
         self.env.cr.execute(sql, params)
         res = self.env.cr.fetchall()
         move_line_ids = flatten(res)
         return move_line_ids
 
+    def _has_lines(self):
+        sql, params = self._get_line_query(self._prepare_datas_form())
+        self.env.cr.execute("SELECT EXISTS(%s)" % sql, params)
+        return self.env.cr.fetchone()[0]
+
     def _prepare_datas_form(self):
         wizard = self
         datas_form = {}
@@ -123,18 +135,19 @@ class WizardGiornale(models.TransientModel):
         datas_form['progressive_credit'] = wizard.progressive_credit
         datas_form['start_row'] = wizard.start_row
         datas_form['daterange'] = wizard.daterange.id
+        datas_form['target_type'] = wizard._get_target_type()
+        datas_form['journal_ids'] = wizard.journal_ids.ids
         return datas_form
 
     def print_giornale(self):
         wizard = self
-        move_line_ids = self.get_line_ids()
-        if not move_line_ids:
+        if not self._has_lines():
             raise UserError(_('No documents found in the current selection'))
         datas_form = self._prepare_datas_form()
         datas_form['print_state'] = 'draft'
         datas_form['year_footer'] = wizard.year_footer
         datas = {
-            'ids': move_line_ids,
+            'ids': [],
             'model': 'account.move',
             'form': datas_form}
         return self.env.ref(
@@ -148,15 +161,14 @@ class WizardGiornale(models.TransientModel):
                 wizard.date_move_line_from <= wizard.last_def_date_print:
             raise UserError(_('Date already printed'))
         else:
-            move_line_ids = self.get_line_ids()
-            if not move_line_ids:
+            if not self._has_lines():
                 raise UserError(
                     _('No documents found in the current selection'))
             datas_form = self._prepare_datas_form()
             datas_form['print_state'] = 'def'
             datas_form['year_footer'] = wizard.year_footer
             datas = {
-                'ids': move_line_ids,
+                'ids': [],
                 'model': 'account.move',
                 'form': datas_form
             }
@@ -4,7 +4,7 @@
 
 {
     'name': "ITA - Intrastat",
-    'version': '12.0.1.3.0',
+    'version': '12.0.1.5.1',
     'category': 'Account',
     'summary': 'Riclassificazione merci e servizi per dichiarazioni Intrastat',
     'author': "Openforce, Link IT srl, Agile Business Group, "
@@ -30,6 +30,7 @@
         'views/product.xml',
         'views/account.xml',
         'views/config.xml',
+        'wizard/compute_intrastat_lines_view.xml',
     ],
     'demo': [
         'demo/product_demo.xml'
@@ -18,7 +18,11 @@ class AccountInvoiceLine(models.Model):
     _inherit = "account.invoice.line"
 
     @api.multi
-    def _prepare_intrastat_line(self):
+    def _prepare_intrastat_line(self, intrastat_data=None):
+        """
+        :param intrastat_data: intrastat data of the product of the line,
+        if already computed
+        """
         self.ensure_one()
         res = {}
         company_id = self.invoice_id.company_id
@@ -26,7 +30,7 @@ class AccountInvoiceLine(models.Model):
 
         # Code competence
         intrastat_code, intrastat_data = self._prepare_intrastat_line_code(
-            product_template, res)
+            product_template, res, intrastat_data)
 
         # Type
         res.update({
@@ -261,9 +265,11 @@ class AccountInvoiceLine(models.Model):
         return weight_kg
 
     @api.multi
-    def _prepare_intrastat_line_code(self, product_template, res):
+    def _prepare_intrastat_line_code(
+            self, product_template, res, intrastat_data=None):
         self.ensure_one()
-        intrastat_data = product_template.get_intrastat_data()
+        if intrastat_data is None:
+            intrastat_data = product_template.get_intrastat_data()
         intrastat_code_model = self.env['report.intrastat.code']
         intrastat_code = intrastat_code_model.browse()
         if intrastat_data['intrastat_code_id']:
@@ -330,12 +336,13 @@ class AccountInvoice(models.Model):
 
     @api.multi
     def action_move_create(self):
-        for invoice in self:
-            if not invoice.intrastat_line_ids and invoice.intrastat:
-                invoice.compute_intrastat_lines()
+        self.filtered(
+            lambda i: i.intrastat and not i.intrastat_line_ids
+        ).compute_intrastat_lines()
         super().action_move_create()
         precision_digits = self.env['decimal.precision'] \
             .precision_get('Account')
+        intrastat_data_by_template = self._get_intrastat_data_by_template()
         for invoice in self:
             if invoice.intrastat:
                 # Calcolo l'importo delle righe di fattura che hanno i prodotti
@@ -343,9 +350,10 @@ class AccountInvoice(models.Model):
 
                 excluded_amount = 0
                 for line in invoice.invoice_line_ids:
-                    product_tmp = line.product_id.product_tmpl_id
-                    intrastat_data = product_tmp.get_intrastat_data()
-                    if intrastat_data['intrastat_type'] == 'exclude':
+                    intrastat_data = intrastat_data_by_template.get(
+                        line.product_id.product_tmpl_id.id)
+                    if intrastat_data and \
+                            intrastat_data['intrastat_type'] == 'exclude':
                         excluded_amount += line.price_subtotal
 
                 total_amount = sum(
@@ -359,91 +367,123 @@ class AccountInvoice(models.Model):
                                       'invoice untaxed total'))
         return True
 
+    @api.multi
+    def _get_intrastat_data_by_template(self):
+        """
+        Intrastat data of the products of the invoices lines,
+        resolved once for every product template.
+
+        :return: dict {product template id: intrastat data}
+        """
+        return self.mapped('invoice_line_ids.product_id.product_tmpl_id') \
+            .get_intrastat_data_by_template()
+
     @api.multi
     def compute_intrastat_lines(self):
-        dp_obj = self.env['decimal.precision']
+        """
+        Compute intrastat lines of all the invoices at once: products
+        intrastat data is computed once for the whole run, existing lines
+        are unlinked together and new lines are created together.
+        """
+        intrastat_data_by_template = self._get_intrastat_data_by_template()
+        self.mapped('intrastat_line_ids').unlink()
+        intrastat_lines = []
         for inv in self:
-            intrastat_lines = []
-            # Unlink existing lines
-            inv.intrastat_line_ids.unlink()
-
-            i_line_by_code = {}
-            lines_to_split = []
-            for line in inv.invoice_line_ids:
-                # Lines to compute
-                if not line.product_id:
-                    continue
-                product_template = line.product_id.product_tmpl_id
-                intrastat_data = product_template.get_intrastat_data()
-                if 'intrastat_code_id' not in intrastat_data or \
-                        intrastat_data['intrastat_type'] == 'exclude':
-                    continue
-                # Free lines
-                if inv.company_id.intrastat_exclude_free_line \
-                        and not line.price_subtotal:
-                    continue
-                # lines to split at the end
-                if intrastat_data['intrastat_type'] == 'misc':
-                    lines_to_split.append(line)
-                    continue
-                if not intrastat_data['intrastat_code_id']:
-                    continue
+            intrastat_lines.extend(
+                inv._prepare_intrastat_lines(intrastat_data_by_template))
+        self.env['account.invoice.intrastat'].create(intrastat_lines)
+        return True
 
-                # Group by intrastat code
-                intra_line = line._prepare_intrastat_line()
-                i_code_id = intra_line['intrastat_code_id']
-                i_code_type = intra_line['intrastat_code_type']
-
-                if i_code_id in i_line_by_code:
-                    i_line_by_code[i_code_id]['amount_currency'] += \
-                        intra_line['amount_currency']
-                    i_line_by_code[i_code_id]['statistic_amount_euro'] += \
-                        intra_line['statistic_amount_euro']
-                    i_line_by_code[i_code_id]['weight_kg'] += \
-                        intra_line['weight_kg']
-                    i_line_by_code[i_code_id]['additional_units'] += \
-                        intra_line['additional_units']
-                else:
-                    intra_line['statement_section'] = \
-                        self.env['account.invoice.intrastat'] \
-                            .compute_statement_section(i_code_type, inv.type)
-                    i_line_by_code[i_code_id] = intra_line
-
-            # Split lines for intrastat with type "misc"
-            if lines_to_split:
-                # tot intrastat
-                amount_tot_intrastat = 0
+    @api.multi
+    def _prepare_intrastat_lines(self, intrastat_data_by_template):
+        """
+        Values of the intrastat lines of the invoice,
+        grouped by intrastat code.
+
+        :param intrastat_data_by_template: as returned by
+        `_get_intrastat_data_by_template`
+        """
+        self.ensure_one()
+        precision_digits = self.env['decimal.precision'] \
+            .precision_get('Account')
+        i_line_by_code = {}
+        lines_to_split = []
+        for line in self.invoice_line_ids:
+            # Lines to compute
+            if not line.product_id:
+                continue
+            intrastat_data = intrastat_data_by_template[
+                line.product_id.product_tmpl_id.id]
+            if 'intrastat_code_id' not in intrastat_data or \
+                    intrastat_data['intrastat_type'] == 'exclude':
+                continue
+            # Free lines
+            if self.company_id.intrastat_exclude_free_line \
+                    and not line.price_subtotal:
+                continue
+            # lines to split at the end
+            if intrastat_data['intrastat_type'] == 'misc':
+                lines_to_split.append(line)
+                continue
+            if not intrastat_data['intrastat_code_id']:
+                continue
+
+            # Group by intrastat code
+            intra_line = line._prepare_intrastat_line(intrastat_data)
+            i_code_id = intra_line['intrastat_code_id']
+            i_code_type = intra_line['intrastat_code_type']
+
+            if i_code_id in i_line_by_code:
+                i_line_by_code[i_code_id]['amount_currency'] += \
+                    intra_line['amount_currency']
+                i_line_by_code[i_code_id]['statistic_amount_euro'] += \
+                    intra_line['statistic_amount_euro']
+                i_line_by_code[i_code_id]['weight_kg'] += \
+                    intra_line['weight_kg']
+                i_line_by_code[i_code_id]['additional_units'] += \
+                    intra_line['additional_units']
+            else:
+                intra_line['statement_section'] = \
+                    self.env['account.invoice.intrastat'] \
+                        .compute_statement_section(i_code_type, self.type)
+                i_line_by_code[i_code_id] = intra_line
+
+        # Split lines for intrastat with type "misc"
+        if lines_to_split:
+            # tot intrastat
+            amount_tot_intrastat = 0
+            for key, i_line in i_line_by_code.items():
+                amount_tot_intrastat += i_line['amount_currency']
+
+            # amount to add
+            for line in lines_to_split:
+                amount_to_split = amount_to_split_residual = \
+                    line.price_subtotal
+                i = 0
                 for key, i_line in i_line_by_code.items():
-                    amount_tot_intrastat += i_line['amount_currency']
-
-                # amount to add
-                for line in lines_to_split:
-                    amount_to_split = amount_to_split_residual = \
-                        line.price_subtotal
-                    i = 0
-                    for key, i_line in i_line_by_code.items():
-                        i += 1
-                        # competence
-                        if i == len(i_line_by_code):
-                            amount_competence = amount_to_split_residual
-                        else:
-                            amount_competence = \
-                                amount_to_split * \
-                                round((i_line['amount_currency'] /
-                                       amount_tot_intrastat),
-                                      dp_obj.precision_get('Account'))
-                        # add to existing code
-                        i_line['amount_currency'] += amount_competence
-                        if i_line['statistic_amount_euro']:
-                            i_line[
-                                'statistic_amount_euro'] += amount_competence
-
-                        amount_to_split_residual -= amount_competence
-
-            for key, val in i_line_by_code.items():
-                intrastat_lines.append((0, 0, val))
-            if intrastat_lines:
-                inv.intrastat_line_ids = intrastat_lines
+                    i += 1
+                    # competence
+                    if i == len(i_line_by_code):
+                        amount_competence = amount_to_split_residual
+                    else:
+                        amount_competence = \
+                            amount_to_split * \
+                            round((i_line['amount_currency'] /
+                                   amount_tot_intrastat),
+                                  precision_digits)
+                    # add to existing code
+                    i_line['amount_currency'] += amount_competence
+                    if i_line['statistic_amount_euro']:
+                        i_line[
+                            'statistic_amount_euro'] += amount_competence
+
+                    amount_to_split_residual -= amount_competence
+
+        intrastat_lines = []
+        for key, val in i_line_by_code.items():
+            val['invoice_id'] = self.id
+            intrastat_lines.append(val)
+        return intrastat_lines
 
 
 class AccountInvoiceIntrastat(models.Model):
@@ -55,6 +55,13 @@ class ReportIntrastatCode(models.Model):
             res.append((code.id, name))
         return res
 
+    @api.multi
+    def unlink(self):
+        # Products intrastat data could refer to deleted codes
+        res = super().unlink()
+        self.clear_caches()
+        return res
+
     @api.model
     def name_search(self, name='', args=None, operator='ilike', limit=100):
         if not args:
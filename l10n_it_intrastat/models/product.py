@@ -1,7 +1,21 @@
 # Copyright 2019 Simone Rubino - Agile Business Group
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
 
-from odoo import models, fields
+from odoo import api, models, fields, tools
+
+# Fields that product intrastat data depends on
+INTRASTAT_TEMPLATE_FIELDS = {'intrastat_code_id', 'intrastat_type', 'categ_id'}
+INTRASTAT_CATEGORY_FIELDS = {'intrastat_code_id', 'intrastat_type'}
+
+
+def read_intrastat_values(records, fnames):
+    """
+    Values of fields `fnames` of `records`, to be compared before and after
+    a write: caches are only cleared when they actually change
+    """
+    if not fnames:
+        return []
+    return records.read(list(fnames), load='')
 
 
 class ProductCategory(models.Model):
@@ -20,6 +34,21 @@ class ProductCategory(models.Model):
         ],
         string="Intrastat Type")
 
+    @api.multi
+    def write(self, vals):
+        fnames = INTRASTAT_CATEGORY_FIELDS.intersection(vals)
+        old_values = read_intrastat_values(self, fnames)
+        res = super().write(vals)
+        if read_intrastat_values(self, fnames) != old_values:
+            self.clear_caches()
+        return res
+
+    @api.multi
+    def unlink(self):
+        res = super().unlink()
+        self.clear_caches()
+        return res
+
 
 class ProductTemplate(models.Model):
     _inherit = 'product.template'
@@ -35,7 +64,16 @@ class ProductTemplate(models.Model):
             ('exclude', "Exclude")],
         string="Intrastat Type")
 
-    def get_intrastat_data(self):
+    @api.multi
+    def write(self, vals):
+        fnames = INTRASTAT_TEMPLATE_FIELDS.intersection(vals)
+        old_values = read_intrastat_values(self, fnames)
+        res = super().write(vals)
+        if read_intrastat_values(self, fnames) != old_values:
+            self.clear_caches()
+        return res
+
+    def _compute_intrastat_data(self):
         """
         The intrastat code with the following priority:
 
@@ -54,3 +92,38 @@ class ProductTemplate(models.Model):
             res['intrastat_code_id'] = self.categ_id.intrastat_code_id.id
             res['intrastat_type'] = self.categ_id.intrastat_type
         return res
+
+    @api.model
+    @tools.ormcache('template_id')
+    def _get_intrastat_data_cached(self, template_id):
+        """
+        Intrastat data of a template, cached and cleared whenever
+        intrastat fields of templates or categories are changed.
+        Returned values are shared by every caller: do not modify them.
+        """
+        return self.browse(template_id).sudo()._compute_intrastat_data()
+
+    def get_intrastat_data(self):
+        """
+        The intrastat code with the following priority:
+
+        - Intrastat Code on product template
+        - Intrastat Code on product category
+        """
+        if not isinstance(self.id, int):
+            # Template not saved yet
+            return self._compute_intrastat_data()
+        return dict(self._get_intrastat_data_cached(self.id))
+
+    @api.multi
+    def get_intrastat_data_by_template(self):
+        """
+        Intrastat data of every template, templates and categories
+        not in cache are read in batch.
+
+        :return: dict {template id: intrastat data}
+        """
+        self.mapped('categ_id.intrastat_code_id')
+        return {
+            template.id: template.get_intrastat_data()
+            for template in self}
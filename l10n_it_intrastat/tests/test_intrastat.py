@@ -1,6 +1,8 @@
 # Copyright 2019 Simone Rubino - Agile Business Group
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
 
+from unittest import mock
+
 from odoo.addons.account.tests.account_test_classes import AccountingTestCase
 
 
@@ -49,7 +51,7 @@ class TestIntrastat(AccountingTestCase):
         invoice = self.env['account.invoice'].browse(res['res_id'])
         return invoice
 
-    def test_invoice_totals(self):
+    def _create_intrastat_invoice(self):
         invoice = self.invoice_model.create({
             'partner_id': self.partner01.id,
             'journal_id': self.sales_journal.id,
@@ -66,9 +68,12 @@ class TestIntrastat(AccountingTestCase):
                 })]
             })]
         })
-
         invoice.compute_taxes()
         invoice.action_invoice_open()
+        return invoice
+
+    def test_invoice_totals(self):
+        invoice = self._create_intrastat_invoice()
 
         # Compute intrastat lines
         invoice.compute_intrastat_lines()
@@ -98,3 +103,74 @@ class TestIntrastat(AccountingTestCase):
         so.action_confirm()
         invoice = self._create_invoice_from_sale(so)
         self.assertTrue(invoice.intrastat)
+
+    def test_compute_lines_dates_range(self):
+        invoice = self._create_intrastat_invoice()
+        other_invoice = self._create_intrastat_invoice()
+        invoice.intrastat_line_ids.unlink()
+        other_invoice.intrastat_line_ids.unlink()
+        other_invoice.date_invoice = '2000-01-01'
+
+        wizard = self.env['account.intrastat.compute.lines'].create({
+            'date_from': invoice.date_invoice,
+            'date_to': invoice.date_invoice,
+        })
+        action = wizard.compute_intrastat_lines()
+        self.assertTrue(invoice.intrastat_line_ids)
+        self.assertFalse(other_invoice.intrastat_line_ids)
+        self.assertIn(('invoice_id', 'in', invoice.ids), action['domain'])
+        total_intrastat_amount = sum(
+            line.amount_currency for line in invoice.intrastat_line_ids)
+        self.assertEqual(total_intrastat_amount, invoice.amount_untaxed)
+
+    def test_product_intrastat_data_cache(self):
+        template = self.product01.product_tmpl_id
+        code = self.env.ref('l10n_it_intrastat.intrastat_intrastat_01012100')
+        template.write({
+            'intrastat_type': False,
+            'intrastat_code_id': False,
+        })
+        template.categ_id.write({
+            'intrastat_type': 'good',
+            'intrastat_code_id': code.id,
+        })
+        self.assertDictEqual(template.get_intrastat_data(), {
+            'intrastat_code_id': code.id,
+            'intrastat_type': 'good',
+        })
+
+        # Changes of the category are seen by cached templates
+        template.categ_id.intrastat_type = 'service'
+        self.assertEqual(
+            template.get_intrastat_data()['intrastat_type'], 'service')
+
+        # Changes of the template are seen by cached templates
+        template.intrastat_type = 'exclude'
+        self.assertDictEqual(template.get_intrastat_data_by_template(), {
+            template.id: {
+                'intrastat_code_id': False,
+                'intrastat_type': 'exclude',
+            },
+        })
+
+    def test_product_intrastat_data_cache_unchanged(self):
+        template = self.product01.product_tmpl_id
+        category = template.categ_id
+        template.intrastat_type = 'good'
+        category.intrastat_type = 'good'
+
+        # Writing the same values keeps cached intrastat data
+        with mock.patch.object(self.registry, '_clear_cache') as clear_cache:
+            template.write({
+                'categ_id': category.id,
+                'intrastat_type': 'good',
+            })
+            category.intrastat_type = 'good'
+        clear_cache.assert_not_called()
+
+        with mock.patch.object(self.registry, '_clear_cache') as clear_cache:
+            template.intrastat_type = 'service'
+        clear_cache.assert_called_once_with()
+        with mock.patch.object(self.registry, '_clear_cache') as clear_cache:
+            category.intrastat_type = 'service'
+        clear_cache.assert_called_once_with()
@@ -0,0 +1,50 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+
+class AccountIntrastatComputeLines(models.TransientModel):
+    _name = "account.intrastat.compute.lines"
+    _description = "Recompute intrastat lines of invoices"
+
+    company_id = fields.Many2one(
+        comodel_name='res.company',
+        string="Company",
+        required=True,
+        default=lambda self: self.env.user.company_id)
+    date_from = fields.Date(
+        string="From Date",
+        required=True)
+    date_to = fields.Date(
+        string="To Date",
+        required=True)
+
+    @api.multi
+    def _get_invoices_domain(self):
+        self.ensure_one()
+        return [
+            ('company_id', '=', self.company_id.id),
+            ('intrastat', '=', True),
+            ('date_invoice', '>=', self.date_from),
+            ('date_invoice', '<=', self.date_to),
+            ('state', '!=', 'cancel'),
+        ]
+
+    @api.multi
+    def compute_intrastat_lines(self):
+        """
+        Recompute intrastat lines of the invoices in the dates range,
+        e.g. after a change of the company or products configuration.
+        """
+        self.ensure_one()
+        if self.date_from > self.date_to:
+            raise UserError(_("From Date must precede To Date"))
+        invoices = self.env['account.invoice'].search(
+            self._get_invoices_domain())
+        invoices.compute_intrastat_lines()
+
+        action = self.env.ref(
+            'l10n_it_intrastat.view_invoice_intrastat_report_action').read()[0]
+        action['domain'] = [('invoice_id', 'in', invoices.ids)]
+        return action
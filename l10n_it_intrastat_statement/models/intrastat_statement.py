@@ -1,6 +1,10 @@
 # Copyright 2019 Simone Rubino - Agile Business Group
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
 
+import json
+from collections import defaultdict
+from io import StringIO
+
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
 from datetime import datetime, date, timedelta
@@ -154,7 +158,8 @@ class AccountIntrastatStatement(models.Model):
                     section = statement[section_field]
                     sequence = 1
                     for line in section:
-                        line.sequence = sequence
+                        if line.sequence != sequence:
+                            line.sequence = sequence
                         sequence += 1
 
     @api.model
@@ -164,6 +169,22 @@ class AccountIntrastatStatement(models.Model):
 
     number = fields.Integer(
         default=_compute_progressive)
+    last_compute_date = fields.Datetime(
+        string="Last Computation",
+        readonly=True,
+        copy=False)
+    computed_invoice_ids = fields.Many2many(
+        comodel_name='account.invoice',
+        string="Computed Invoices",
+        readonly=True,
+        copy=False,
+        help="Invoices with intrastat lines at the last computation, "
+             "including refunds netted into other lines")
+    computed_pairs = fields.Text(
+        readonly=True,
+        copy=False,
+        help="Section type, partner and code of the intrastat lines of each "
+             "computed invoice, as JSON")
     date = fields.Date(
         string="Submission Date",
         default=fields.Date.today(),
@@ -579,16 +600,14 @@ class AccountIntrastatStatement(models.Model):
         return rcd
 
     @api.multi
-    def _prepare_export_prefix(self, ref_number, line=None):
+    def _prepare_export_statement_prefix(self, ref_number):
         """
-        Fixed part for every line of the exported file
+        Fixed part of the prefix, shared by every line of a listing
 
         :param ref_number: number of the listing
-        :param line: statement line, if None this is the frontispiece's prefix
-        :return: Prefix for all statement lines
+        :return: Prefix without record type and line number
         """
         self.ensure_one()
-        is_frontispiece = not bool(line)
         # Campo fisso: “EUROX”
         prefix = format_x('EUROX', 5)
 
@@ -598,6 +617,20 @@ class AccountIntrastatStatement(models.Model):
 
         # Numero di riferimento dell’elenco
         prefix += format_9(ref_number, 6)
+        return prefix
+
+    @api.multi
+    def _prepare_export_prefix(self, ref_number, line=None):
+        """
+        Fixed part for every line of the exported file
+
+        :param ref_number: number of the listing
+        :param line: statement line, if None this is the frontispiece's prefix
+        :return: Prefix for all statement lines
+        """
+        self.ensure_one()
+        is_frontispiece = not bool(line)
+        prefix = self._prepare_export_statement_prefix(ref_number)
 
         # Tipo record:
         #  0 = frontespizio
@@ -677,62 +710,45 @@ class AccountIntrastatStatement(models.Model):
         return rcd
 
     @api.multi
-    def generate_file_export(self):
+    def _write_export_section_lines(self, output, kind, ref_number):
+        """
+        Write the lines of every `kind` section to `output`:
+        the listing prefix is computed once and every section is read in
+        batch by iterating over its lines.
+        """
         self.ensure_one()
-        file_content = ''
-        # Head
-        if not self.env.context.get('export_without_head'):
-            file_content += self._prepare_export_head()
-        content_sale = self.env.context.get('sale')
-        content_purchase = self.env.context.get('purchase')
-        # Purchase
-        if (
-                self.purchase_section1_operation_number or
-                self.purchase_section2_operation_number or
-                self.purchase_section3_operation_number or
-                self.purchase_section4_operation_number
-        ) and content_purchase:
-            ref_number = self.purchase_statement_sequence
-            # frontispiece
-            file_content += self._prepare_export_frontispiece(
-                'purchase', ref_number)
-            # Section 1
-            purchase_lines = [
-                self.purchase_section1_ids,
-                self.purchase_section2_ids,
-                self.purchase_section3_ids,
-                self.purchase_section4_ids,
-            ]
-            for section_lines in purchase_lines:
-                for line in section_lines:
-                    rcd = self._prepare_export_prefix(ref_number, line)
-                    rcd += line._prepare_export_line()
-                    file_content += rcd
-        # Sale
-        if (
-                (self.sale_section1_operation_number
-                 or self.sale_section2_operation_number
-                 or self.sale_section3_operation_number
-                 or self.sale_section4_operation_number)
-                and content_sale):
-            ref_number = self.sale_statement_sequence
-            # frontispiece
-            file_content += self._prepare_export_frontispiece(
-                'sale', ref_number)
-            sale_lines = [
-                self.sale_section1_ids,
-                self.sale_section2_ids,
-                self.sale_section3_ids,
-                self.sale_section4_ids,
-            ]
-            for section_lines in sale_lines:
-                for line in section_lines:
-                    rcd = self._prepare_export_prefix(ref_number, line)
-                    rcd += line._prepare_export_line()
-                    file_content += rcd
+        statement_prefix = self._prepare_export_statement_prefix(ref_number)
+        for section_number in range(1, 5):
+            section_lines = self[
+                self.get_section_field_name(kind, section_number)]
+            record_type = format_9(section_number, 1)
+            for line in section_lines:
+                output.write(statement_prefix)
+                output.write(record_type)
+                output.write(format_9(line.sequence, 5))
+                output.write(line._prepare_export_line())
+
+    @api.multi
+    def write_file_export(self, output):
+        """
+        Write the export file to `output`, any text stream
+        (e.g. an open file or a StringIO).
+        """
+        self.ensure_one()
+        with_head = not self.env.context.get('export_without_head')
+        content_sale = self.env.context.get('sale') and (
+            self.sale_section1_operation_number or
+            self.sale_section2_operation_number or
+            self.sale_section3_operation_number or
+            self.sale_section4_operation_number)
+        content_purchase = self.env.context.get('purchase') and (
+            self.purchase_section1_operation_number or
+            self.purchase_section2_operation_number or
+            self.purchase_section3_operation_number or
+            self.purchase_section4_operation_number)
 
         # Data validation
-        if not file_content:
+        if not with_head and not content_sale and not content_purchase:
             raise ValidationError(_('Nothing to export'))
         if not self.sale_section1_ids \
                 and not self.sale_section2_ids \
@@ -744,14 +760,33 @@ class AccountIntrastatStatement(models.Model):
                 and not self.purchase_section4_ids:
             raise ValidationError(_('Statement without lines'))
 
-        return file_content
+        # Head
+        if with_head:
+            output.write(self._prepare_export_head())
+        # Purchase
+        if content_purchase:
+            ref_number = self.purchase_statement_sequence
+            output.write(self._prepare_export_frontispiece(
+                'purchase', ref_number))
+            self._write_export_section_lines(output, 'purchase', ref_number)
+        # Sale
+        if content_sale:
+            ref_number = self.sale_statement_sequence
+            output.write(self._prepare_export_frontispiece(
+                'sale', ref_number))
+            self._write_export_section_lines(output, 'sale', ref_number)
 
     @api.multi
-    def compute_statement(self):
+    def generate_file_export(self):
         self.ensure_one()
-        # Unlink existing lines
-        self._unlink_sections()
+        output = StringIO()
+        self.write_file_export(output)
+        return output.getvalue()
 
+    @api.multi
+    def _get_invoices_domain(self):
+        """Domain of the invoices whose intrastat lines are in the statement"""
+        self.ensure_one()
         # Setting period
         period_date_start, period_date_stop = self.get_dates_start_stop()
 
@@ -765,48 +800,214 @@ class AccountIntrastatStatement(models.Model):
         if self.purchase:
             inv_type += ['in_invoice', 'in_refund']
         domain.append(('type', 'in', inv_type))
+        return domain
 
-        statement_data = dict()
-        invoices = self.env['account.invoice'].search(domain)
+    @api.multi
+    def _create_section_lines(self, section_lines):
+        """
+        Create statement lines in bulk for each section, after the existing
+        ones: sequences are assigned here instead of writing the statement
+        line by line.
 
-        for inv_intra_line in invoices.mapped('intrastat_line_ids'):
-            for section_type in ['purchase', 'sale']:
-                for section_number in range(1, 5):
-                    section_details = (section_type, section_number)
-                    statement_section = '%s_s%s' % section_details
-                    if inv_intra_line.statement_section != statement_section:
-                        continue
-                    statement_section_model_name = \
-                        self.get_section_model(*section_details)
-                    st_line = self.env[statement_section_model_name] \
-                        ._prepare_statement_line(inv_intra_line, self)
-                    if not st_line:
-                        continue
-                    statement_section_field = \
-                        self.get_section_field_name(*section_details)
-                    if statement_section_field not in statement_data:
-                        statement_data[statement_section_field] = list()
-                    st_line['sequence'] = \
-                        len(statement_data[statement_section_field]) + 1
-                    statement_data[statement_section_field] \
-                        .append((0, 0, st_line))
-
-        self.write(statement_data)
-        # Group refund to sale lines if they have the same period of ref
+        :param section_lines: dict {statement section: intrastat lines}
+        """
+        self.ensure_one()
+        for section_type in ['purchase', 'sale']:
+            for section_number in range(1, 5):
+                section_details = (section_type, section_number)
+                inv_intra_lines = section_lines.get(
+                    '%s_s%s' % section_details)
+                if not inv_intra_lines:
+                    continue
+                section_model = self.env[
+                    self.get_section_model(*section_details)]
+                st_lines = section_model._prepare_statement_lines(
+                    inv_intra_lines, self)
+                sequence = len(self[
+                    self.get_section_field_name(*section_details)])
+                for st_line in st_lines:
+                    sequence += 1
+                    st_line.update({
+                        'statement_id': self.id,
+                        'sequence': sequence,
+                    })
+                section_model.create(st_lines)
+
+    @api.multi
+    def _refund_sections_lines(self, pairs=None):
+        """
+        Group refund to sale lines if they have the same period of ref
+
+        :param pairs: if set, only lines whose (section type, partner id,
+        intrastat code id) is in `pairs` are refunded
+        """
+        self.ensure_one()
         refund_map = [
             (2, 1),  # Sale (Purchase) section 2 refunds section 1
             (4, 3),  # Sale (Purchase) section 4 refunds section 3
         ]
         for section_type in ['purchase', 'sale']:
+            section_pairs = None
+            if pairs is not None:
+                section_pairs = {
+                    (partner_id, intrastat_code_id)
+                    for pair_type, partner_id, intrastat_code_id in pairs
+                    if pair_type == section_type}
             for section_number, refund_section_number in refund_map:
-                section_details = (section_type, section_number)
-                refund_section_details = (section_type, refund_section_number)
-                section_field = self.get_section_field_name(*section_details)
-                for line in self[section_field]:
-                    refund_section_model = \
-                        self.get_section_model(*refund_section_details)
-                    to_refund_model = self.env[refund_section_model]
-                    self.refund_line(line, to_refund_model)
+                self.refund_section_lines(
+                    section_type, section_number, refund_section_number,
+                    pairs=section_pairs)
+
+    @api.multi
+    def compute_statement(self):
+        self.ensure_one()
+        # Unlink existing lines
+        self._unlink_sections()
+
+        invoices = self.env['account.invoice'].search(
+            self._get_invoices_domain())
+
+        # Group intrastat lines by section in a single pass
+        section_lines = defaultdict(list)
+        for inv_intra_line in invoices.mapped('intrastat_line_ids'):
+            section_lines[inv_intra_line.statement_section] \
+                .append(inv_intra_line)
+
+        self._create_section_lines(section_lines)
+        self._refund_sections_lines()
+        self._set_computed_invoices(invoices)
+        return True
+
+    @api.multi
+    def _set_computed_invoices(self, invoices):
+        """
+        Record the invoices consumed by a computation of the statement,
+        and when it happened: later refreshes only consider the changes.
+        """
+        self.ensure_one()
+        computed_pairs = defaultdict(set)
+        for inv_intra_line in invoices.mapped('intrastat_line_ids'):
+            if inv_intra_line.statement_section:
+                computed_pairs[inv_intra_line.invoice_id.id].add(
+                    self._get_intrastat_line_pair(inv_intra_line))
+        self.write({
+            'last_compute_date': self._get_transaction_datetime(),
+            'computed_invoice_ids': [
+                (6, 0, invoices.filtered('intrastat_line_ids').ids)],
+            'computed_pairs': json.dumps({
+                invoice_id: sorted(pairs)
+                for invoice_id, pairs in computed_pairs.items()}),
+        })
+
+    @api.multi
+    def _get_computed_pairs(self):
+        """
+        Pairs recorded by `_set_computed_invoices`
+        :return: dict {invoice id: set of (section type, partner id,
+        intrastat code id)}
+        """
+        self.ensure_one()
+        return {
+            int(invoice_id): {tuple(pair) for pair in pairs}
+            for invoice_id, pairs in json.loads(
+                self.computed_pairs or '{}').items()
+        }
+
+    @api.model
+    def _get_transaction_datetime(self):
+        """
+        Start of the current transaction, the date used for `write_date`:
+        changes committed by transactions started later are not missed
+        """
+        self.env.cr.execute("SELECT (now() AT TIME ZONE 'UTC')")
+        return self.env.cr.fetchone()[0]
+
+    @staticmethod
+    def _get_intrastat_line_pair(inv_intra_line):
+        """
+        Statement lines of an intrastat line are refunded together with the
+        lines having the same section type, partner and code
+        """
+        return (
+            inv_intra_line.statement_section.split('_')[0],
+            inv_intra_line.invoice_id.partner_id.id,
+            inv_intra_line.intrastat_code_id.id,
+        )
+
+    @api.multi
+    def refresh_statement(self):
+        """
+        Update the statement with the invoices whose intrastat lines changed
+        since the last computation, and with the invoices that entered or
+        left the statement period.
+        Only statement lines having the same section type, partner and code
+        of the lines of these invoices are computed again, refunds included:
+        other lines keep their manual changes.
+        """
+        self.ensure_one()
+        if not self.last_compute_date:
+            return self.compute_statement()
+
+        invoices = self.env['account.invoice'].search(
+            self._get_invoices_domain())
+        inv_intra_lines = invoices.mapped('intrastat_line_ids')
+
+        sections_lines = []
+        for section_type in ['purchase', 'sale']:
+            for section_number in range(1, 5):
+                st_lines = self[self.get_section_field_name(
+                    section_type, section_number)]
+                sections_lines.append((section_type, st_lines))
+
+        # Invoices whose lines changed, new ones and the ones that left
+        # or lost their lines since the last computation
+        changed_lines = self.env['account.invoice.intrastat'].search([
+            ('invoice_id', 'in', invoices.ids),
+            ('write_date', '>', self.last_compute_date),
+        ])
+        affected_ids = set(changed_lines.mapped('invoice_id').ids)
+        affected_ids.update(set(self.computed_invoice_ids.ids)
+                            .symmetric_difference(
+                                inv_intra_lines.mapped('invoice_id').ids))
+        if not affected_ids:
+            self._set_computed_invoices(invoices)
+            return True
+
+        # Pairs consumed at the last computation are included: refunds
+        # netted into other lines have no statement line of their own
+        pairs = set()
+        computed_pairs = self._get_computed_pairs()
+        for invoice_id in affected_ids:
+            pairs.update(computed_pairs.get(invoice_id, ()))
+        for section_type, st_lines in sections_lines:
+            for st_line in st_lines:
+                if st_line.invoice_id.id in affected_ids:
+                    pairs.add((section_type, st_line.partner_id.id,
+                               st_line.intrastat_code_id.id))
+        for inv_intra_line in inv_intra_lines:
+            if inv_intra_line.statement_section \
+                    and inv_intra_line.invoice_id.id in affected_ids:
+                pairs.add(self._get_intrastat_line_pair(inv_intra_line))
+
+        # Lines of affected pairs are computed again
+        for section_type, st_lines in sections_lines:
+            # Lines added manually are kept
+            st_lines.filtered(
+                lambda line: line.invoice_id
+                and (section_type, line.partner_id.id,
+                     line.intrastat_code_id.id) in pairs
+            ).unlink()
+        section_lines = defaultdict(list)
+        for inv_intra_line in inv_intra_lines:
+            if inv_intra_line.statement_section and \
+                    self._get_intrastat_line_pair(inv_intra_line) in pairs:
+                section_lines[inv_intra_line.statement_section] \
+                    .append(inv_intra_line)
+        self._create_section_lines(section_lines)
+        self._refund_sections_lines(pairs=pairs)
+
+        # Writing the statement fills the gaps in sequences
+        self._set_computed_invoices(invoices)
         return True
 
     @staticmethod
@@ -818,6 +1019,85 @@ class AccountIntrastatStatement(models.Model):
     def get_section_field_name(section_type, section_number):
         return '%s_section%s_ids' % (section_type, section_number)
 
+    @api.multi
+    def _is_refund_period(self, year_id, month, quarterly):
+        """Check if a reference period is the period of the statement"""
+        self.ensure_one()
+        if year_id != self.fiscalyear:
+            return False
+        if self.period_type == 'M':
+            return month == self.period_number
+        if self.period_type == 'T':
+            return quarterly == self.period_number
+        return False
+
+    @api.multi
+    def refund_section_lines(
+            self, section_type, section_number, refund_section_number,
+            pairs=None):
+        """
+        Refund every line of section `section_number` into the first line of
+        section `refund_section_number` having the same partner and code
+        and an amount not lower than the refund, as `refund_line` does.
+        Lines of both sections are read once and matched in memory:
+        each refunded line is written once and refund lines are unlinked
+        together.
+
+        :param pairs: if set, only lines whose (partner id, intrastat code id)
+        is in `pairs` are refunded
+        """
+        self.ensure_one()
+        lines = self[self.get_section_field_name(
+            section_type, section_number)]
+        to_refund_lines = self[self.get_section_field_name(
+            section_type, refund_section_number)]
+        if pairs is not None:
+            lines = lines.filtered(
+                lambda line: (line.partner_id.id,
+                              line.intrastat_code_id.id) in pairs)
+            to_refund_lines = to_refund_lines.filtered(
+                lambda line: (line.partner_id.id,
+                              line.intrastat_code_id.id) in pairs)
+        if not lines or not to_refund_lines:
+            return
+        key_fields = ['partner_id', 'intrastat_code_id']
+        amount_fields = [
+            f for f in ['amount_euro', 'statistic_amount_euro',
+                        'amount_currency']
+            if f in to_refund_lines._fields]
+
+        # Candidates are kept in the order `search` would return them
+        candidates = defaultdict(list)
+        for to_refund_data in to_refund_lines.sorted().read(
+                key_fields + amount_fields, load=''):
+            key = tuple(to_refund_data[f] for f in key_fields)
+            candidates[key].append(to_refund_data)
+
+        refunded_ids = set()
+        to_write = dict()
+        for line_data in lines.read(
+                key_fields + amount_fields +
+                ['year_id', 'month', 'quarterly'], load=''):
+            if not self._is_refund_period(
+                    line_data['year_id'], line_data['month'],
+                    line_data['quarterly']):
+                continue
+            key = tuple(line_data[f] for f in key_fields)
+            for to_refund_data in candidates.get(key, []):
+                if to_refund_data['amount_euro'] >= line_data['amount_euro']:
+                    break
+            else:
+                continue
+            for amount_field in amount_fields:
+                to_refund_data[amount_field] -= line_data[amount_field]
+            to_write[to_refund_data['id']] = to_refund_data
+            refunded_ids.add(line_data['id'])
+
+        for to_refund_id, to_refund_data in to_write.items():
+            to_refund_lines.browse(to_refund_id).write(
+                {f: to_refund_data[f] for f in amount_fields})
+        lines.browse(refunded_ids).unlink()
+
     @api.multi
     def refund_line(self, line, to_ref_obj):
         """Refund line into sale if period ref is the same of the statement"""
@@ -70,6 +70,20 @@ class IntrastatStatementSection(models.AbstractModel):
             'intrastat_code_id': inv_intra_line.intrastat_code_id.id,
         }
 
+    @api.model
+    def _prepare_statement_lines(self, inv_intra_lines, statement_id):
+        """
+        Values of the statement lines for intrastat lines `inv_intra_lines`
+        of this section, skipping the ones that should not be declared.
+        """
+        st_lines = []
+        for inv_intra_line in inv_intra_lines:
+            st_line = self._prepare_statement_line(
+                inv_intra_line, statement_id)
+            if st_line:
+                st_lines.append(st_line)
+        return st_lines
+
     @api.multi
     def _export_line_checks(self, section_label, section_number):
         self.ensure_one()
@@ -229,6 +229,114 @@ class TestIntrastatStatement (AccountingTestCase):
         self.assertSetEqual({len(line) for line in file_lines},
                             {75, 130, 119})
 
+    def test_statement_purchase_partial_refunds(self):
+        bill = self._get_intrastat_computed_bill()
+
+        # Both refunds are subtracted from the same bill
+        for price_unit in (30.0, 40.0):
+            bill_refund = bill.refund()
+            bill_refund.update({
+                'intrastat': True,
+            })
+            bill_refund.invoice_line_ids.price_unit = price_unit
+            bill_refund.compute_taxes()
+            bill_refund.action_invoice_open()
+            bill_refund.compute_intrastat_lines()
+
+        statement = self.statement_model.create({
+            'period_number': bill.date_invoice.month,
+        })
+        statement.compute_statement()
+        self.assertFalse(statement.purchase_section2_ids)
+        self.assertEqual(len(statement.purchase_section1_ids), 1)
+        self.assertEqual(statement.purchase_section1_ids.amount_euro, 30)
+
+    def test_statement_refresh(self):
+        bill = self._get_intrastat_computed_bill()
+        statement = self.statement_model.create({
+            'period_number': bill.date_invoice.month,
+        })
+        statement.compute_statement()
+        self.assertTrue(statement.last_compute_date)
+        goods_line = statement.purchase_section1_ids
+        goods_line.weight_kg = 123
+
+        # Only lines of the new bill are added
+        self._get_intrastat_computed_bill(product=self.service01)
+        statement.refresh_statement()
+        self.assertEqual(statement.purchase_section1_ids, goods_line)
+        self.assertEqual(goods_line.weight_kg, 123)
+        self.assertEqual(len(statement.purchase_section3_ids), 1)
+        self.assertEqual(statement.purchase_section3_ids.sequence, 1)
+
+        # Lines of the refunded partner and code are refunded again
+        bill_refund = bill.refund()
+        bill_refund.update({
+            'intrastat': True,
+        })
+        bill_refund.invoice_line_ids.price_unit = 40.0
+        bill_refund.compute_taxes()
+        bill_refund.action_invoice_open()
+        bill_refund.compute_intrastat_lines()
+        statement.refresh_statement()
+        self.assertFalse(statement.purchase_section2_ids)
+        self.assertEqual(len(statement.purchase_section1_ids), 1)
+        self.assertEqual(statement.purchase_section1_ids.amount_euro, 60)
+        self.assertEqual(len(statement.purchase_section3_ids), 1)
+
+    def test_statement_refresh_netted_unchanged(self):
+        bill = self._get_intrastat_computed_bill()
+        bill_refund = bill.refund()
+        bill_refund.update({
+            'intrastat': True,
+        })
+        bill_refund.invoice_line_ids.price_unit = 40.0
+        bill_refund.compute_taxes()
+        bill_refund.action_invoice_open()
+        bill_refund.compute_intrastat_lines()
+        statement = self.statement_model.create({
+            'period_number': bill.date_invoice.month,
+        })
+        statement.compute_statement()
+        self.assertEqual(statement.computed_invoice_ids, bill | bill_refund)
+        netted_line = statement.purchase_section1_ids
+        self.assertEqual(netted_line.amount_euro, 60)
+        netted_line.weight_kg = 123
+
+        # Nothing changed: manual edits of netted lines are kept
+        statement.refresh_statement()
+        statement.refresh_statement()
+        self.assertEqual(statement.purchase_section1_ids, netted_line)
+        self.assertEqual(netted_line.weight_kg, 123)
+        self.assertEqual(netted_line.amount_euro, 60)
+        self.assertFalse(statement.purchase_section2_ids)
+
+    def test_statement_refresh_netted_refund_cancelled(self):
+        bill = self._get_intrastat_computed_bill()
+        bill_refund = bill.refund()
+        bill_refund.update({
+            'intrastat': True,
+        })
+        bill_refund.invoice_line_ids.price_unit = 40.0
+        bill_refund.compute_taxes()
+        bill_refund.action_invoice_open()
+        bill_refund.compute_intrastat_lines()
+        statement = self.statement_model.create({
+            'period_number': bill.date_invoice.month,
+        })
+        statement.compute_statement()
+        self.assertEqual(statement.purchase_section1_ids.amount_euro, 60)
+        self.assertFalse(statement.purchase_section2_ids)
+
+        # The netted refund leaves the period: the bill line is restored
+        bill_refund.journal_id.update_posted = True
+        bill_refund.action_invoice_cancel()
+        statement.refresh_statement()
+        self.assertEqual(statement.computed_invoice_ids, bill)
+        self.assertEqual(len(statement.purchase_section1_ids), 1)
+        self.assertEqual(statement.purchase_section1_ids.amount_euro, 100)
+        self.assertFalse(statement.purchase_section2_ids)
+
     def test_statement_purchase_refund_no_subtract(self):
         bill = self._get_intrastat_computed_bill()
 
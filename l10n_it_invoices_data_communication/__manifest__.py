@@ -7,7 +7,7 @@
     'name': 'ITA - Comunicazione dati fatture',
     'summary': 'Comunicazione dati fatture (c.d. "nuovo spesometro" o '
                '"esterometro")',
-    'version': '12.0.1.3.2',
+    'version': '12.0.1.8.3',
     'category': 'Account',
     'author': "Openforce di Camilli Alessandro, "
               "Odoo Community Association (OCA)",
@@ -24,6 +24,7 @@
         'data/res_country_data.xml',
         'wizard/compute_fiscal_document_type_view.xml',
         'wizard/split_big_communication_view.xml',
+        'wizard/batch_communication_view.xml',
         'views/comunicazione.xml',
         'views/account.xml',
         'views/account_invoice_view.xml',
@@ -1,5 +1,7 @@
 
 
+from collections import defaultdict
+
 from odoo import fields, models, _
 from odoo.exceptions import ValidationError
 
@@ -21,16 +23,48 @@ class AccountInvoice(models.Model):
         vals['Imposta'] = vals['Imposta'] / exchange_rate
 
     def _get_tax_comunicazione_dati_iva(self):
+        self.ensure_one()
+        return self._get_taxes_comunicazione_dati_iva()[self.id]
+
+    def _get_taxes_comunicazione_dati_iva(self):
+        """
+        Computes the VAT summary of every invoice in `self`: tax lines of
+        all the invoices are read together and parent taxes are searched
+        only once
+        :return: dict {invoice id: list of (0, 0, vals) commands}
+        """
+        tax_model = self.env['account.tax']
+
+        tax_lines_by_invoice = defaultdict(list)
+        for tax_line in self.env['account.invoice.tax'].search([
+            ('invoice_id', 'in', self.ids),
+        ]):
+            tax_lines_by_invoice[tax_line.invoice_id.id].append(tax_line)
+
+        taxes = self.mapped('tax_line_ids.tax_id')
+        parents = tax_model.search([('children_tax_ids', 'in', taxes.ids)])
+        parents_by_tax = defaultdict(lambda: tax_model)
+        for parent in parents:
+            for child_tax in parent.children_tax_ids:
+                parents_by_tax[child_tax.id] |= parent
+
+        return {
+            fattura.id: fattura._prepare_tax_comunicazione_dati_iva(
+                tax_lines_by_invoice[fattura.id], parents_by_tax)
+            for fattura in self
+        }
+
+    def _prepare_tax_comunicazione_dati_iva(self, tax_lines, parents_by_tax):
         self.ensure_one()
         fattura = self
         tax_model = self.env['account.tax']
 
-        tax_lines = []
+        tax_lines_vals = []
         tax_grouped = {}
-        for tax_line in fattura.tax_line_ids:
+        for tax_line in tax_lines:
             tax = tax_line.tax_id
             aliquota = tax.amount
-            parent = tax_model.search([('children_tax_ids', 'in', [tax.id])])
+            parent = parents_by_tax[tax.id]
             if parent:
                 main_tax = parent
                 aliquota = parent.amount
@@ -82,9 +116,9 @@ class AccountInvoice(models.Model):
                     vals['Detraibile'] = 0.0
             vals = self._check_tax_comunicazione_dati_iva(tax, vals)
             fattura._compute_taxes_in_company_currency(vals)
-            tax_lines.append((0, 0, vals))
+            tax_lines_vals.append((0, 0, vals))
 
-        return tax_lines
+        return tax_lines_vals
 
     def _check_tax_comunicazione_dati_iva(self, tax, val=None):
         if not val:
@@ -1,10 +1,14 @@
 
 
-from odoo import api, fields, models, _
+from odoo import SUPERUSER_ID, api, fields, models, tools, _
 from odoo.exceptions import ValidationError
 from odoo.addons.l10n_it_account.tools.account_tools import encode_for_export
 from lxml import etree
+from collections import defaultdict
+from io import BytesIO
+from itertools import chain
 import re
+from uuid import uuid4
 
 
 NS_2 = 'http://ivaservizi.agenziaentrate.gov.it/docs/xsd/fatture/v2.0'
@@ -12,25 +16,262 @@ VERSION = 'DAT20'
 NS_MAP = {
     'ns2': NS_2,
 }
+# Limits of a single file
+PARTNERS_LIMIT = 1000
+INVOICES_LIMIT = 1000
+# Last reserved communication identifier, and the advisory lock serializing
+# its reservations across transactions
+IDENTIFICATIVO_PARAM = 'l10n_it_invoices_data_communication.identificativo'
+IDENTIFICATIVO_LOCK = 29811
 etree.register_namespace("vi", NS_2)
+# Cedente/cessionario fields that must not start or end with spaces
+NORMALIZED_FIELDS = (
+    'Denominazione', 'Nome', 'Cognome',
+    'sede_Indirizzo', 'sede_NumeroCivico', 'sede_Comune',
+    'so_Indirizzo', 'so_NumeroCivico', 'so_Comune',
+    'rf_Denominazione', 'rf_Nome', 'rf_Cognome',
+)
+# Cedente/cessionario fields checked for errors
+CHECKED_FIELDS = NORMALIZED_FIELDS + (
+    'IdFiscaleIVA_IdPaese', 'IdFiscaleIVA_IdCodice',
+    'sede_Cap', 'sede_Nazione',
+    'so_Cap', 'so_Provincia', 'so_Nazione',
+    'rf_IdFiscaleIVA_IdPaese', 'rf_IdFiscaleIVA_IdCodice',
+)
 
 
 def format_decimal(value=0.0):
     return "{:.2f}".format(value)
 
 
-def clear_xml_element(element):
-    if element.text:
-        return False
-    return all((clear_xml_element(e) for e in element.iterchildren()))
-
-
-def clear_xml(xml_root):
-    xml_root = etree.iterwalk(xml_root)
-    for dummy, xml_element in xml_root:
-        parent = xml_element.getparent()
-        if clear_xml_element(xml_element):
-            parent.remove(xml_element)
+def xml_node(tag, value=None, children=(), records=None, condition=None):
+    """
+    Declarative mapping of an XML element:
+    - `value`: field name, or function of the record, giving the text;
+    - `children`: nodes mapped on the same record;
+    - `records`: field name of the records the element is repeated for,
+      value and children being then mapped on each of them;
+    - `condition`: function of the record, the element is skipped when it
+      returns False.
+    """
+    return tag, value, children, records, condition
+
+
+def encoded_value(field_name, max_chars, encoding='latin'):
+    return lambda record: encode_for_export(
+        record[field_name] or '', max_chars, encoding=encoding)
+
+
+def soggetto_xml_node(tag, prefix, children=(), records=None):
+    """
+    Maps cedente/cessionario data stored in fields starting with `prefix`.
+    Own company data are written as they are, with tag Numerocivico in
+    Stabile Organizzazione, while data of partners (`records` set) are
+    encoded and truncated; then, for partners:
+    - Id Fiscale IVA is written only if both country and code are set;
+    - Rappresentante Fiscale also holds its country as text.
+    """
+    partner = bool(records)
+
+    def value(name, max_chars=None, encoding='latin'):
+        field_name = prefix + name
+        if partner and max_chars:
+            return encoded_value(field_name, max_chars, encoding=encoding)
+        return field_name
+
+    def id_fiscale_iva_node(field_prefix, condition=None):
+        return xml_node('IdFiscaleIVA', children=(
+            xml_node('IdPaese', value(field_prefix + 'IdPaese')),
+            xml_node('IdCodice', value(field_prefix + 'IdCodice')),
+        ), condition=condition)
+
+    def sede_node(node_tag, field_prefix, numero_civico_tag='NumeroCivico'):
+        return xml_node(node_tag, children=(
+            xml_node('Indirizzo', value(field_prefix + 'Indirizzo', 60)),
+            xml_node(numero_civico_tag, value(
+                field_prefix + 'NumeroCivico', 8, encoding='ascii')),
+            xml_node('CAP', value(field_prefix + 'Cap', 5, encoding='ascii')),
+            xml_node('Comune', value(field_prefix + 'Comune', 60)),
+            xml_node('Provincia', value(field_prefix + 'Provincia')),
+            xml_node('Nazione', value(field_prefix + 'Nazione')),
+        ))
+
+    id_fiscale_iva_condition = None
+    if partner:
+        def id_fiscale_iva_condition(record):
+            return record[prefix + 'IdFiscaleIVA_IdPaese'] \
+                and record[prefix + 'IdFiscaleIVA_IdCodice']
+    return xml_node(tag, children=(
+        xml_node('IdentificativiFiscali', children=(
+            id_fiscale_iva_node(
+                'IdFiscaleIVA_', condition=id_fiscale_iva_condition),
+            xml_node('CodiceFiscale', value('CodiceFiscale')),
+        )),
+        xml_node('AltriDatiIdentificativi', children=(
+            xml_node('Denominazione', value('Denominazione', 80)),
+            xml_node('Nome', value('Nome', 60)),
+            xml_node('Cognome', value('Cognome', 60)),
+            sede_node('Sede', 'sede_'),
+            sede_node(
+                'StabileOrganizzazione', 'so_',
+                numero_civico_tag='NumeroCivico' if partner
+                else 'Numerocivico'),
+            xml_node(
+                'RappresentanteFiscale',
+                value('rf_IdFiscaleIVA_IdPaese') if partner else None,
+                children=(
+                    id_fiscale_iva_node('rf_IdFiscaleIVA_'),
+                    xml_node('Denominazione', value('rf_Denominazione', 80)),
+                    xml_node('Nome', value('rf_Nome', 60)),
+                    xml_node('Cognome', value('rf_Cognome', 60)),
+                )),
+        )),
+    ) + children, records=records)
+
+
+def dati_fattura_body_xml_node(tag, records, dati_generali=()):
+    return xml_node(tag, children=(
+        xml_node('DatiGenerali', children=(
+            xml_node('TipoDocumento',
+                     lambda r: r.dati_fattura_TipoDocumento.code or ''),
+            xml_node('Data',
+                     lambda r: fields.Date.to_string(r.dati_fattura_Data)
+                     or ''),
+            xml_node('Numero', 'dati_fattura_Numero'),
+        ) + dati_generali),
+        xml_node('DatiRiepilogo', children=(
+            xml_node('ImponibileImporto',
+                     lambda r: format_decimal(r.ImponibileImporto)),
+            xml_node('DatiIVA', children=(
+                xml_node('Imposta', lambda r: format_decimal(r.Imposta)),
+                xml_node('Aliquota', lambda r: format_decimal(r.Aliquota)),
+            )),
+            xml_node('Natura', lambda r: r.Natura_id.code or ''),
+            xml_node('Detraibile', lambda r: format_decimal(r.Detraibile)),
+            xml_node('Deducibile', 'Deducibile'),
+            xml_node('EsigibilitaIVA', 'EsigibilitaIVA'),
+        ), records='dati_fattura_iva_ids'),
+    ), records=records)
+
+
+# ----- 1 - Dati Fattura header
+# Nota del file excel per il blocco Dichiarante:
+# Questo blocco va valorizzato solo se il soggetto obbligato
+# alla comunicazione dei dati fattura non coincide con
+# il soggetto passivo IVA al quale i dati si riferiscono.
+# NON deve essere valorizzato se per il soggetto trasmittente
+# è vera una delle seguenti affermazioni:
+# - coincide  con il soggetto IVA al quale i dati si riferiscono;
+# - è legato da vincolo di incarico con il soggetto IVA al quale i dati
+#     si riferiscono;
+# - è un intermediario.
+# In tutti gli altri casi questo blocco DEVE essere valorizzato.
+DATI_FATTURA_HEADER_XML_NODE = xml_node('DatiFatturaHeader', children=(
+    xml_node('ProgressivoInvio', lambda r: str(r.identificativo)),
+    xml_node('Dichiarante', children=(
+        xml_node('CodiceFiscale', 'declarant_fiscalcode'),
+        xml_node('Carica', lambda r: r.codice_carica_id.code or ''),
+    )),
+))
+# Sections of DatiFattura, by kind of transmission
+XML_SECTIONS = {
+    'DTE': (
+        DATI_FATTURA_HEADER_XML_NODE,
+        # ----- 2 - DTE
+        xml_node('DTE', children=(
+            soggetto_xml_node('CedentePrestatoreDTE', 'cedente_'),
+            soggetto_xml_node(
+                'CessionarioCommittenteDTE', 'cessionario_', children=(
+                    dati_fattura_body_xml_node(
+                        'DatiFatturaBodyDTE', 'fatture_emesse_body_ids'),
+                ), records='fatture_emesse_ids'),
+        )),
+    ),
+    'DTR': (
+        DATI_FATTURA_HEADER_XML_NODE,
+        # ----- 3 - DTR
+        xml_node('DTR', children=(
+            soggetto_xml_node('CessionarioCommittenteDTR', 'cessionario_'),
+            soggetto_xml_node(
+                'CedentePrestatoreDTR', 'cedente_', children=(
+                    dati_fattura_body_xml_node(
+                        'DatiFatturaBodyDTR', 'fatture_ricevute_body_ids',
+                        dati_generali=(xml_node(
+                            'DataRegistrazione',
+                            lambda r: fields.Date.to_string(
+                                r.dati_fattura_DataRegistrazione) or ''),
+                        )),
+                ), records='fatture_ricevute_ids'),
+        )),
+    ),
+    # ----- 4 - ANN
+    # Posizione is not written: if it is empty, every invoice of the
+    # previous communication is cancelled
+    'ANN': (
+        xml_node('ANN', children=(
+            xml_node('IdFile', 'id_comunicazione'),
+        )),
+    ),
+}
+XML_INDENT = '  '
+
+
+def iter_xml_elements(nodes, record):
+    """
+    Maps `nodes` on `record`, skipping elements without any text.
+
+    :return: generator of elements (tag, text, children), text being None
+    for nodes without value
+    """
+    for tag, value, children, records, condition in nodes:
+        for node_record in record[records] if records else (record, ):
+            if condition and not condition(node_record):
+                continue
+            if isinstance(value, str):
+                text = node_record[value] or ''
+            else:
+                text = value(node_record) if value else None
+            child_elements = list(iter_xml_elements(children, node_record))
+            if text or child_elements:
+                yield tag, text, child_elements
+
+
+def write_xml_element(xml_file, element, level, pretty_print=True):
+    """
+    Writes `element` indented as lxml pretty print does: elements mapped to
+    a text, even an empty one, are written in a single line, along with
+    their children.
+    """
+    tag, text, children = element
+    with xml_file.element(tag):
+        if text is not None:
+            xml_file.write(text)
+            pretty_print = False
+        for child in children:
+            if pretty_print:
+                xml_file.write('\n' + XML_INDENT * (level + 1))
+            write_xml_element(
+                xml_file, child, level + 1, pretty_print=pretty_print)
+        if pretty_print and children:
+            xml_file.write('\n' + XML_INDENT * level)
+
+
+def write_xml_section(xml_file, section, record):
+    """
+    Writes a child of the root element one element at a time, so that only
+    an element (e.g. a partner with its invoices) is kept in memory.
+    """
+    tag, dummy, children, dummy, dummy = section
+    elements = iter_xml_elements(children, record)
+    first_element = next(elements, None)
+    if first_element is None:
+        return
+    xml_file.write('\n' + XML_INDENT)
+    with xml_file.element(tag):
+        for element in chain((first_element, ), elements):
+            xml_file.write('\n' + XML_INDENT * 2)
+            write_xml_element(xml_file, element, 2)
+        xml_file.write('\n' + XML_INDENT)
 
 
 def check_normalized_string(value):
@@ -47,6 +288,11 @@ class ComunicazioneDatiIva(models.Model):
     _description = 'Invoices data communication'
     _rec_name = 'identificativo'
     _inherit = ['mail.thread']
+    _sql_constraints = [(
+        'identificativo_uniq',
+        'unique(identificativo)',
+        "Statement already exists with this ID!"
+    )]
 
     @api.model
     def _default_company(self):
@@ -63,12 +309,43 @@ class ComunicazioneDatiIva(models.Model):
                 _("Statement already exists with ID {}"
                   ).format(self.identificativo))
 
+    @api.model
+    def _get_last_identificativo(self, cr):
+        """
+        Highest identifier used or reserved, as seen by cursor `cr`
+        """
+        cr.execute("SELECT max(identificativo) FROM comunicazione_dati_iva")
+        last = cr.fetchone()[0] or 0
+        cr.execute("SELECT value FROM ir_config_parameter WHERE key = %s",
+                   (IDENTIFICATIVO_PARAM, ))
+        reserved = cr.fetchone()
+        return max(last, int(reserved[0]) if reserved else 0)
+
     def _get_identificativo(self):
-        dichiarazioni = self.search([])
-        if dichiarazioni:
-            return len(dichiarazioni) + 1
-        else:
-            return 1
+        return self._get_last_identificativo(self.env.cr) + 1
+
+    @api.model
+    def _reserve_identificativi(self, count=1):
+        """
+        Reserves `count` consecutive identifiers, for communications created
+        in transactions that can't see each other.
+        The reservation is committed in its own transaction, started once the
+        advisory lock is held so that it sees every previous reservation.
+        :return: first reserved identifier
+        """
+        with self.pool.cursor() as lock_cr:
+            lock_cr.execute("SELECT pg_advisory_lock(%s)",
+                            (IDENTIFICATIVO_LOCK, ))
+            try:
+                with self.pool.cursor() as cr:
+                    first = self._get_last_identificativo(cr) + 1
+                    env = api.Environment(cr, SUPERUSER_ID, {})
+                    env['ir.config_parameter'].set_param(
+                        IDENTIFICATIVO_PARAM, first + count - 1)
+            finally:
+                lock_cr.execute("SELECT pg_advisory_unlock(%s)",
+                                (IDENTIFICATIVO_LOCK, ))
+        return first
 
     company_id = fields.Many2one(
         'res.company', string='Company', required=True,
@@ -188,11 +465,19 @@ class ComunicazioneDatiIva(models.Model):
         help="To fill along with 2.1.2.2 <Nome> and alternatively to "
              "2.1.2.1 <Denominazione>")
     errors = fields.Text(copy=False)
+    errors_cache_key = fields.Char(copy=False, readonly=True)
     esterometro = fields.Boolean(
         default=True,
         string="Esterometro"
     )
 
+    @api.multi
+    def write(self, vals):
+        res = super().write(vals)
+        if set(vals) - {'errors'}:
+            self._update_errors_cache_key()
+        return res
+
     @api.onchange('company_id')
     def onchange_company_id(self):
         if self.company_id:
@@ -400,14 +685,66 @@ class ComunicazioneDatiIva(models.Model):
             if comunicazione.dati_trasmissione == 'DTR':
                 comunicazione.compute_fatture_ricevute()
 
+    def _group_fatture_by_partner(self, fatture):
+        """
+        Groups invoices by partner in a single pass, keeping their order
+        :return: dict {partner id: list of invoices}
+        """
+        fatture_by_partner = defaultdict(list)
+        for fattura in fatture:
+            fatture_by_partner[fattura.partner_id.id].append(fattura)
+        return fatture_by_partner
+
+    def _create_sections(self, model_name, dati_fatture):
+        """
+        Creates sections from `dati_fatture`, as prepared by
+        `_prepare_cessionari_dati_fatture` or `_prepare_cedenti_dati_fatture`,
+        with a single create() call for sections, bodies and VAT summaries
+        """
+        self.ensure_one()
+        return self._bulk_create(
+            self.env[model_name],
+            [dict(command[2], comunicazione_id=self.id)
+             for command in dati_fatture]
+        )
+
+    def _bulk_create(self, model, vals_list):
+        """
+        Creates records of `model` from `vals_list` with a single create()
+        call: One2many values given as (0, 0, vals) commands are created
+        afterwards, with a single create() call for each field
+        """
+        o2m_vals_list = []
+        for vals in vals_list:
+            o2m_vals = {}
+            for fname, value in list(vals.items()):
+                field = model._fields[fname]
+                if field.type == 'one2many' and value \
+                        and all(command[0] == 0 for command in value):
+                    o2m_vals[fname] = vals.pop(fname)
+            o2m_vals_list.append(o2m_vals)
+        records = model.create(vals_list)
+
+        children_vals = defaultdict(list)
+        for record, o2m_vals in zip(records, o2m_vals_list):
+            for fname, commands in o2m_vals.items():
+                inverse_name = model._fields[fname].inverse_name
+                children_vals[fname].extend(
+                    dict(command[2], **{inverse_name: record.id})
+                    for command in commands
+                )
+        for fname, vals in children_vals.items():
+            comodel = self.env[model._fields[fname].comodel_name]
+            self._bulk_create(comodel, vals)
+        return records
+
     def _prepare_cessionari_dati_fatture(self, fatture_emesse, cessionari):
         dati_fatture = []
         posizione = 0
+        fatture_by_partner = self._group_fatture_by_partner(fatture_emesse)
+        tax_vals = fatture_emesse._get_taxes_comunicazione_dati_iva()
         for cessionario in cessionari:
-            fatture = fatture_emesse.filtered(
-                lambda fe:
-                fe.partner_id.id ==
-                    cessionario.id)
+            fatture = fatture_by_partner.get(cessionario.id, [])
             vals_fatture = []
             for fattura in fatture:
                 posizione += 1
@@ -419,8 +756,7 @@ class ComunicazioneDatiIva(models.Model):
                     'dati_fattura_Data': fattura.date_invoice,
                     'dati_fattura_Numero': self._parse_fattura_numero(
                         fattura.number),
-                    'dati_fattura_iva_ids':
-                        fattura._get_tax_comunicazione_dati_iva()
+                    'dati_fattura_iva_ids': tax_vals[fattura.id],
                 }
                 val = self._prepare_fattura_emessa(val, fattura)
                 vals_fatture.append((0, 0, val))
@@ -448,7 +784,8 @@ class ComunicazioneDatiIva(models.Model):
             cessionari = fatture_emesse.mapped('partner_id')
             dati_fatture = self._prepare_cessionari_dati_fatture(
                 fatture_emesse, cessionari)
-            self.fatture_emesse_ids = dati_fatture
+            self._create_sections(
+                'comunicazione.dati.iva.fatture.emesse', dati_fatture)
 
     def _get_fatture_emesse_domain(self):
         domain = [('comunicazione_dati_iva_escludi', '=', True)]
@@ -478,12 +815,11 @@ class ComunicazioneDatiIva(models.Model):
     def _prepare_cedenti_dati_fatture(self, fatture_ricevute, cedenti):
         dati_fatture = []
         posizione = 0
+        fatture_by_partner = self._group_fatture_by_partner(fatture_ricevute)
+        tax_vals = fatture_ricevute._get_taxes_comunicazione_dati_iva()
         for cedente in cedenti:
             # Fatture
-            fatture = fatture_ricevute.filtered(
-                lambda fr:
-                fr.partner_id.id ==
-                    cedente.id)
+            fatture = fatture_by_partner.get(cedente.id, [])
             vals_fatture = []
             for fattura in fatture:
                 posizione += 1
@@ -497,8 +833,7 @@ class ComunicazioneDatiIva(models.Model):
                         fattura.date,
                     'dati_fattura_Numero': self._parse_fattura_numero(
                         fattura.reference) or '',
-                    'dati_fattura_iva_ids':
-                        fattura._get_tax_comunicazione_dati_iva()
+                    'dati_fattura_iva_ids': tax_vals[fattura.id],
                 }
                 val = self._prepare_fattura_ricevuta(val, fattura)
                 vals_fatture.append((0, 0, val))
@@ -524,7 +859,8 @@ class ComunicazioneDatiIva(models.Model):
             cedenti = fatture_ricevute.mapped('partner_id')
             dati_fatture = self._prepare_cedenti_dati_fatture(
                 fatture_ricevute, cedenti)
-            self.fatture_ricevute_ids = dati_fatture
+            self._create_sections(
+                'comunicazione.dati.iva.fatture.ricevute', dati_fatture)
 
     def _get_fatture_ricevute_domain(self):
         domain = [('comunicazione_dati_iva_escludi', '=', True)]
@@ -557,133 +893,84 @@ class ComunicazioneDatiIva(models.Model):
 
         return True
 
+    def _plan_partition(self, fatture):
+        """
+        Computes up front how `fatture` must be split so that every file
+        has at most PARTNERS_LIMIT partners, each with at most
+        INVOICES_LIMIT invoices.
+        Invoices of each partner are cut in slices of INVOICES_LIMIT
+        invoices: the n-th slices of all partners are put together and then
+        split every PARTNERS_LIMIT partners.
+        :return: list of invoices recordsets, one for each file
+        """
+        slices_by_rank = []
+        for partner_fatture in self._group_fatture_by_partner(
+                fatture).values():
+            for rank, start in enumerate(
+                    range(0, len(partner_fatture), INVOICES_LIMIT)):
+                if rank == len(slices_by_rank):
+                    slices_by_rank.append([])
+                slices_by_rank[rank].append(
+                    partner_fatture[start:start + INVOICES_LIMIT])
+
+        partition = []
+        for slices in slices_by_rank:
+            for start in range(0, len(slices), PARTNERS_LIMIT):
+                partition.append(self.env['account.invoice'].browse([
+                    fattura.id
+                    for partner_slice in slices[start:start + PARTNERS_LIMIT]
+                    for fattura in partner_slice
+                ]))
+        return partition
+
     def split_communication(self):
+        """
+        Splits the communication according to `_plan_partition`: the first
+        file is kept in this communication, a copy is created for each
+        other file and each communication is computed only once.
+        :return: every resulting communication
+        """
         self.ensure_one()
         if self.dati_trasmissione == 'DTE':
-            if not self.check_fatture_emesse_partners():
-                fatture_emesse = self.mapped(
-                    'fatture_emesse_ids.fatture_emesse_body_ids.invoice_id')
-                cessionari = fatture_emesse.mapped('partner_id')
-                first_set_ids = cessionari.ids[:len(cessionari) / 2]
-                second_set_ids = cessionari.ids[len(cessionari) / 2:]
-                first_set_cessionari = self.env['res.partner'].browse(
-                    first_set_ids)
-                second_set_cessionari = self.env['res.partner'].browse(
-                    second_set_ids)
-                self._unlink_sections()
-                dati_fatture_1 = self._prepare_cessionari_dati_fatture(
-                    fatture_emesse, first_set_cessionari)
-                self.fatture_emesse_ids = dati_fatture_1
-                self.splitting_note = _(
-                    "Splitted considering partners\n%s"
-                    % '\n'.join(first_set_cessionari.mapped('name')))
-                comm_2 = self.copy()
-                comm_2._unlink_sections()
-                dati_fatture_2 = self._prepare_cessionari_dati_fatture(
-                    fatture_emesse, second_set_cessionari)
-                comm_2.fatture_emesse_ids = dati_fatture_2
-                comm_2.splitting_note = _(
-                    "Splitted considering partners\n%s"
-                    % '\n'.join(second_set_cessionari.mapped('name')))
-                return self | comm_2
-            elif not self.check_fatture_emesse_body():
-                fatture_emesse = self.mapped(
-                    'fatture_emesse_ids.fatture_emesse_body_ids.invoice_id')
-                cessionari = fatture_emesse.mapped('partner_id')
-                new_set = self.env['account.invoice']
-                old_set = fatture_emesse
-                for cessionario in cessionari:
-                    fatture = fatture_emesse.filtered(
-                        lambda fe:
-                        fe.partner_id.id ==
-                            cessionario.id)
-                    if len(fatture) > 1000:
-                        new_set_ids = fatture.ids[:len(fatture) / 2]
-                        new_partial_set = self.env['account.invoice'].browse(
-                            new_set_ids)
-                        new_set |= new_partial_set
-                        old_set -= new_partial_set
-                self._unlink_sections()
-                cessionari_1 = old_set.mapped('partner_id')
-                dati_fatture_1 = self._prepare_cessionari_dati_fatture(
-                    old_set, cessionari_1)
-                self.fatture_emesse_ids = dati_fatture_1
-                self.splitting_note = _(
-                    "Splitted considering invoices\n%s"
-                    % '\n'.join(old_set.mapped('number')))
-                comm_2 = self.copy()
-                comm_2._unlink_sections()
-                cessionari_2 = new_set.mapped('partner_id')
-                dati_fatture_2 = self._prepare_cessionari_dati_fatture(
-                    new_set, cessionari_2)
-                comm_2.fatture_emesse_ids = dati_fatture_2
-                comm_2.splitting_note = _(
-                    "Splitted considering invoices\n%s"
-                    % '\n'.join(new_set.mapped('number')))
-                return self | comm_2
-
+            fatture = self.mapped(
+                'fatture_emesse_ids.fatture_emesse_body_ids.invoice_id')
+            section_model = 'comunicazione.dati.iva.fatture.emesse'
+            prepare_dati_fatture = self._prepare_cessionari_dati_fatture
         elif self.dati_trasmissione == 'DTR':
-            if not self.check_fatture_ricevute_partners():
-                fatture_ricevute = self.mapped(
-                    'fatture_ricevute_ids.fatture_ricevute_body_ids.invoice_id')
-                cedenti = fatture_ricevute.mapped('partner_id')
-                first_set_ids = cedenti.ids[:len(cedenti) / 2]
-                second_set_ids = cedenti.ids[len(cedenti) / 2:]
-                first_set_cedenti = self.env['res.partner'].browse(
-                    first_set_ids)
-                second_set_cedenti = self.env['res.partner'].browse(
-                    second_set_ids)
-                self._unlink_sections()
-                dati_fatture_1 = self._prepare_cedenti_dati_fatture(
-                    fatture_ricevute, first_set_cedenti)
-                self.fatture_ricevute_ids = dati_fatture_1
-                self.splitting_note = _(
-                    "Splitted considering partners\n%s"
-                    % '\n'.join(first_set_cedenti.mapped('name')))
-                comm_2 = self.copy()
-                comm_2._unlink_sections()
-                dati_fatture_2 = self._prepare_cedenti_dati_fatture(
-                    fatture_ricevute, second_set_cedenti)
-                comm_2.fatture_ricevute_ids = dati_fatture_2
-                comm_2.splitting_note = _(
-                    "Splitted considering partners\n%s"
-                    % '\n'.join(second_set_cedenti.mapped('name')))
-                return self | comm_2
-            elif not self.check_fatture_ricevute_body():
-                fatture_ricevute = self.mapped(
-                    'fatture_ricevute_ids.fatture_ricevute_body_ids.invoice_id')
-                cedenti = fatture_ricevute.mapped('partner_id')
-                new_set = self.env['account.invoice']
-                old_set = fatture_ricevute
-                for cedente in cedenti:
-                    fatture = fatture_ricevute.filtered(
-                        lambda fr:
-                        fr.partner_id.id ==
-                            cedente.id)
-                    if len(fatture) > 1000:
-                        new_set_ids = fatture.ids[:len(fatture) / 2]
-                        new_partial_set = self.env['account.invoice'].browse(
-                            new_set_ids)
-                        new_set |= new_partial_set
-                        old_set -= new_partial_set
-                self._unlink_sections()
-                cedenti_1 = old_set.mapped('partner_id')
-                dati_fatture_1 = self._prepare_cedenti_dati_fatture(
-                    old_set, cedenti_1)
-                self.fatture_ricevute_ids = dati_fatture_1
-                self.splitting_note = _(
-                    "Splitted considering invoices\n%s"
-                    % '\n'.join(old_set.mapped('number')))
-                comm_2 = self.copy()
-                comm_2._unlink_sections()
-                cedenti_2 = new_set.mapped('partner_id')
-                dati_fatture_2 = self._prepare_cedenti_dati_fatture(
-                    new_set, cedenti_2)
-                comm_2.fatture_ricevute_ids = dati_fatture_2
-                comm_2.splitting_note = _(
+            fatture = self.mapped(
+                'fatture_ricevute_ids.fatture_ricevute_body_ids.invoice_id')
+            section_model = 'comunicazione.dati.iva.fatture.ricevute'
+            prepare_dati_fatture = self._prepare_cedenti_dati_fatture
+        else:
+            return self
+
+        partition = self._plan_partition(fatture)
+        if len(partition) < 2:
+            return self
+        split_by_invoices = any(
+            len(partner_fatture) > INVOICES_LIMIT
+            for partner_fatture in self._group_fatture_by_partner(
+                fatture).values()
+        )
+
+        communications = self
+        first = self._reserve_identificativi(len(partition) - 1)
+        for offset in range(len(partition) - 1):
+            communications |= self.copy({'identificativo': first + offset})
+        self._unlink_sections()
+        for comunicazione, part in zip(communications, partition):
+            partners = part.mapped('partner_id')
+            comunicazione._create_sections(
+                section_model, prepare_dati_fatture(part, partners))
+            if split_by_invoices:
+                comunicazione.splitting_note = _(
                     "Splitted considering invoices\n%s"
-                    % '\n'.join(new_set.mapped('number')))
-                return self | comm_2
+                ) % '\n'.join(part.mapped('number'))
+            else:
+                comunicazione.splitting_note = _(
+                    "Splitted considering partners\n%s"
+                ) % '\n'.join(partners.mapped('name'))
+        return communications
 
     def split_communications(self):
         res = self.env['comunicazione.dati.iva']
@@ -691,8 +978,7 @@ class ComunicazioneDatiIva(models.Model):
             if com.check_1k_limit():
                 res |= com
             else:
-                new_communications = com.split_communication()
-                res |= new_communications.split_communications()
+                res |= com.split_communication()
         return res
 
     def check_1k_limit(self):
@@ -709,421 +995,361 @@ class ComunicazioneDatiIva(models.Model):
     def check_fatture_emesse_body(self):
         for line in self.fatture_emesse_ids:
             invoices_limit = len(line.fatture_emesse_body_ids)
-            if invoices_limit > 1000:
+            if invoices_limit > INVOICES_LIMIT:
                 return False
         return True
 
     def check_fatture_emesse_partners(self):
-        if len(self.fatture_emesse_ids) > 1000:
+        if len(self.fatture_emesse_ids) > PARTNERS_LIMIT:
             return False
         return True
 
     def check_fatture_ricevute_body(self):
         for line in self.fatture_ricevute_ids:
             invoices_limit = len(line.fatture_ricevute_body_ids)
-            if invoices_limit > 1000:
+            if invoices_limit > INVOICES_LIMIT:
                 return False
         return True
 
     def check_fatture_ricevute_partners(self):
-        if len(self.fatture_ricevute_ids) > 1000:
+        if len(self.fatture_ricevute_ids) > PARTNERS_LIMIT:
             return False
         return True
 
-    @api.multi
-    def _check_errors_dte(self):
-        self.ensure_one()
-        comunicazione = self
-        errors = []
-        # ----- Conta il limite di partner e fatture
-        partner_limit = 0
-        for line in comunicazione.fatture_emesse_ids:
-            partner_limit += 1
-            invoices_limit = len(line.fatture_emesse_body_ids)
-            if invoices_limit > 1000:
-                errors += [
-                    _('Limit of 1000 invoices per assignee (%s) exceeded')
-                    % line.partner_id.display_name]
-        if partner_limit > 1000:
-            errors += [
-                _('Limit of 1000 assignees per communication exceeded')]
-        # ----- Cedente
-        # -----     Normalizzazione delle stringhe
-        if not check_normalized_string(comunicazione.cedente_Denominazione):
-            errors.append(
-                _('Remove empty characters around seller\'s denomination'))
-        if not check_normalized_string(comunicazione.cedente_Nome):
-            errors.append(
-                _('Remove empty characters around seller\'s name'))
-        if not check_normalized_string(comunicazione.cedente_Cognome):
-            errors.append(
-                _('Remove empty characters around seller\'s surname'))
-        if not check_normalized_string(comunicazione.cedente_sede_Indirizzo):
-            errors.append(
+    def _get_errors_rules_dte(self):
+        """
+        Rules of _compute_errors for customer invoices; messages are listed
+        in the same order as NORMALIZED_FIELDS
+        """
+        return {
+            'company_prefix': 'cedente_',
+            'company_messages': [
+                _('Remove empty characters around seller\'s denomination'),
+                _('Remove empty characters around seller\'s name'),
+                _('Remove empty characters around seller\'s surname'),
                 _('Remove empty characters around seller\'s headquarters '
-                  'address'))
-        if not check_normalized_string(
-                comunicazione.cedente_sede_NumeroCivico):
-            errors.append(
-                _('Remove empty characters around seller\'s street number'))
-        if not check_normalized_string(comunicazione.cedente_sede_Comune):
-            errors.append(
-                _('Remove empty characters around seller\'s city'))
-        if not check_normalized_string(comunicazione.cedente_so_Indirizzo):
-            errors.append(
+                  'address'),
+                _('Remove empty characters around seller\'s street number'),
+                _('Remove empty characters around seller\'s city'),
                 _('Remove empty characters around address of permanent '
-                  'establishment'))
-        if not check_normalized_string(comunicazione.cedente_so_NumeroCivico):
-            errors.append(
+                  'establishment'),
                 _('Remove empty characters around street number of permanent '
-                  'establishment'))
-        if not check_normalized_string(comunicazione.cedente_so_Comune):
-            errors.append(
+                  'establishment'),
                 _('Remove empty characters around city of permanent '
-                  'establishment'))
-        if not check_normalized_string(comunicazione.cedente_rf_Denominazione):
-            errors.append(
+                  'establishment'),
                 _('Remove empty characters around denomination of fiscal '
-                  'representative'))
-        if not check_normalized_string(comunicazione.cedente_rf_Nome):
-            errors.append(
+                  'representative'),
                 _('Remove empty characters around name of fiscal '
-                  'representative'))
-        if not check_normalized_string(comunicazione.cedente_rf_Cognome):
-            errors.append(
+                  'representative'),
                 _('Remove empty characters around surname of fiscal '
-                  'representative'))
-        # ----- Cessionario
-        for partner in comunicazione.fatture_emesse_ids:
-            # -----     Normalizzazione delle stringhe
-            if not check_normalized_string(partner.cessionario_Denominazione):
-                errors.append(_(
-                    u'Remove empty characters around denomination of assignee '
-                    u'%s'
-                ) % partner.partner_id.display_name)
-            if not check_normalized_string(partner.cessionario_Nome):
-                errors.append(_(
-                    u'Remove empty characters around name of assignee '
-                    u'%s'
-                ) % partner.partner_id.display_name)
-            if not check_normalized_string(partner.cessionario_Cognome):
-                errors.append(_(
-                    u'Remove empty characters around surname of assignee '
-                    u'%s'
-                ) % partner.partner_id.display_name)
-            if not check_normalized_string(partner.cessionario_sede_Indirizzo):
-                errors.append(_(
-                    u'Remove empty characters around headquarters address of '
-                    u'assignee %s'
-                ) % partner.partner_id.display_name)
-            if not check_normalized_string(
-                partner.cessionario_sede_NumeroCivico
-            ):
-                errors.append(_(
-                    u'Remove empty characters around street number of assignee'
-                    u' %s'
-                ) % partner.partner_id.display_name)
-            if not check_normalized_string(partner.cessionario_sede_Comune):
-                errors.append(_(
-                    u'Remove empty characters around city of assignee '
-                    u'%s'
-                ) % partner.partner_id.display_name)
-            if not check_normalized_string(partner.cessionario_so_Indirizzo):
-                errors.append(_(
-                    u'Remove empty characters around address of permanent '
-                    u'establishment %s'
-                ) % partner.partner_id.display_name)
-            if not check_normalized_string(
-                partner.cessionario_so_NumeroCivico
-            ):
-                errors.append(_(
-                    u'Remove empty characters around street number of '
-                    u'permanent establishment %s'
-                ) % partner.partner_id.display_name)
-            if not check_normalized_string(partner.cessionario_so_Comune):
-                errors.append(_(
-                    u'Remove empty characters around city of permanent '
-                    u'establishment %s'
-                ) % partner.partner_id.display_name)
-            if not check_normalized_string(
-                    partner.cessionario_rf_Denominazione):
-                errors.append(_(
-                    u'Remove empty characters around denomination of fiscal '
-                    u'representative %s'
-                ) % partner.partner_id.display_name)
-            if not check_normalized_string(partner.cessionario_rf_Nome):
-                errors.append(_(
-                    u'Remove empty characters around name of fiscal '
-                    u'representative %s'
-                ) % partner.partner_id.display_name)
-            if not check_normalized_string(partner.cessionario_rf_Cognome):
-                errors.append(_(
-                    u'Remove empty characters around surname of fiscal '
-                    u'representative %s'
-                ) % partner.partner_id.display_name)
-            # ----- Dati fiscali
-            if not partner.cessionario_IdFiscaleIVA_IdPaese and \
-                    partner.cessionario_IdFiscaleIVA_IdCodice:
-                errors.append(_(
-                    u'Define a country ID for assignee %s'
-                ) % partner.partner_id.display_name)
-            # ----- Dati Sede
-            if not all([partner.cessionario_sede_Indirizzo,
-                        partner.cessionario_sede_Comune,
-                        partner.cessionario_sede_Nazione, ]):
-                errors.append(_(
-                    u'Address, city, country of %s are mandatory'
-                ) % partner.partner_id.display_name)
-            # ----- Dati Stabile Organizzazione
-            if any([partner.cessionario_so_Indirizzo,
-                    partner.cessionario_so_NumeroCivico,
-                    partner.cessionario_so_Cap,
-                    partner.cessionario_so_Comune,
-                    partner.cessionario_so_Provincia,
-                    partner.cessionario_so_Nazione,
-                    ]) and not all([partner.cessionario_so_Indirizzo,
-                                    partner.cessionario_so_Comune,
-                                    partner.cessionario_so_Cap,
-                                    partner.cessionario_so_Nazione, ]):
-                errors.append(_(
-                    u'Address, city, ZIP and country of permanent '
-                    u'establishment %s are mandatory, when at least one value '
-                    u'is defined'
-                ) % partner.partner_id.display_name)
-            # ----- Rappresentante Fiscale
-            if any([partner.cessionario_rf_IdFiscaleIVA_IdPaese,
-                    partner.cessionario_rf_IdFiscaleIVA_IdCodice,
-                    partner.cessionario_rf_Denominazione,
-                    partner.cessionario_rf_Nome,
-                    partner.cessionario_rf_Cognome,
-                    ]) and not all([
-                        partner.cessionario_rf_IdFiscaleIVA_IdPaese,
-                        partner.cessionario_rf_IdFiscaleIVA_IdCodice, ]):
-                errors.append(_(
-                    u'Country ID and fiscal identifier of fiscal '
-                    u'representative %s are mandatory, when at least one '
-                    u'value is defined'
-                ) % partner.partner_id.display_name)
-            # ----- CAP
-            if partner.cessionario_sede_Cap and \
-                    not re.match('[0-9]{5}', partner.cessionario_sede_Cap):
-                errors.append(_(
-                    u'ZIP %s of assignee %s is not 5 numeric characters'
-                ) % (
-                    partner.cessionario_sede_Cap,
-                    partner.partner_id.display_name
-                ))
-            # ----- Dettagli IVA
-            for invoice in partner.fatture_emesse_body_ids:
-                if not invoice.dati_fattura_iva_ids:
-                    errors.append(_(
-                        u'No VAT data defined for invoice %s of partner %s'
-                    ) % (
-                        invoice.invoice_id.number,
-                        partner.partner_id.display_name))
-        return errors
+                  'representative'),
+            ],
+            'section_field': 'fatture_emesse_ids',
+            'partner_prefix': 'cessionario_',
+            'partner_messages': [
+                _(u'Remove empty characters around denomination of assignee '
+                  u'%s'),
+                _(u'Remove empty characters around name of assignee '
+                  u'%s'),
+                _(u'Remove empty characters around surname of assignee '
+                  u'%s'),
+                _(u'Remove empty characters around headquarters address of '
+                  u'assignee %s'),
+                _(u'Remove empty characters around street number of assignee'
+                  u' %s'),
+                _(u'Remove empty characters around city of assignee '
+                  u'%s'),
+                _(u'Remove empty characters around address of permanent '
+                  u'establishment %s'),
+                _(u'Remove empty characters around street number of '
+                  u'permanent establishment %s'),
+                _(u'Remove empty characters around city of permanent '
+                  u'establishment %s'),
+                _(u'Remove empty characters around denomination of fiscal '
+                  u'representative %s'),
+                _(u'Remove empty characters around name of fiscal '
+                  u'representative %s'),
+                _(u'Remove empty characters around surname of fiscal '
+                  u'representative %s'),
+            ],
+            'country_message': _(u'Define a country ID for assignee %s'),
+            'zip_message': _(
+                u'ZIP %s of assignee %s is not 5 numeric characters'),
+            'body_field': 'fatture_emesse_body_ids',
+            'body_messages': [],
+        }
 
-    @api.multi
-    def _check_errors_dtr(self):
-        self.ensure_one()
-        comunicazione = self
-        errors = []
-        # ----- Conta il limite di partner e fatture
-        partner_limit = 0
-        for line in comunicazione.fatture_ricevute_ids:
-            partner_limit += 1
-            invoices_limit = len(line.fatture_ricevute_body_ids)
-            if invoices_limit > 1000:
-                errors += [
-                    _('Limit of 1000 invoices per assignee (%s) exceeded')
-                    % line.partner_id.display_name]
-        if partner_limit > 1000:
-            errors += [
-                _('Limit of 1000 assignees per communication exceeded')]
-        # ----- Cessionario
-        # -----     Normalizzazione delle stringhe
-        if not check_normalized_string(
-                comunicazione.cessionario_Denominazione):
-            errors.append(
-                _('Remove empty characters around assignee\'s denomination'))
-        if not check_normalized_string(comunicazione.cessionario_Nome):
-            errors.append(
-                _('Remove empty characters around assignee\'s name'))
-        if not check_normalized_string(comunicazione.cessionario_Cognome):
-            errors.append(
-                _('Remove empty characters around assignee\'s surname'))
-        if not check_normalized_string(
-                comunicazione.cessionario_sede_Indirizzo):
-            errors.append(
+    def _get_errors_rules_dtr(self):
+        """
+        Rules of _compute_errors for supplier bills; messages are listed
+        in the same order as NORMALIZED_FIELDS
+        """
+        return {
+            'company_prefix': 'cessionario_',
+            'company_messages': [
+                _('Remove empty characters around assignee\'s denomination'),
+                _('Remove empty characters around assignee\'s name'),
+                _('Remove empty characters around assignee\'s surname'),
                 _('Remove empty characters around assignee\'s headquarters '
-                  'address'))
-        if not check_normalized_string(
-                comunicazione.cessionario_sede_NumeroCivico):
-            errors.append(
-                _('Remove empty characters around assignee\'s street number'))
-        if not check_normalized_string(comunicazione.cessionario_sede_Comune):
-            errors.append(
-                _('Remove empty characters around assignee\'s city'))
-        if not check_normalized_string(comunicazione.cessionario_so_Indirizzo):
-            errors.append(
+                  'address'),
+                _('Remove empty characters around assignee\'s street number'),
+                _('Remove empty characters around assignee\'s city'),
                 _('Remove empty characters around address of permanent '
-                  'establishment'))
-        if not check_normalized_string(
-                comunicazione.cessionario_so_NumeroCivico):
-            errors.append(
+                  'establishment'),
                 _('Remove empty characters around street number of permanent '
-                  'establishment'))
-        if not check_normalized_string(comunicazione.cessionario_so_Comune):
-            errors.append(
+                  'establishment'),
                 _('Remove empty characters around city of permanent '
-                  'establishment'))
-        if not check_normalized_string(
-                comunicazione.cessionario_rf_Denominazione):
-            errors.append(
+                  'establishment'),
                 _('Remove empty characters around denomination of fiscal '
-                  'representative'))
-        if not check_normalized_string(comunicazione.cessionario_rf_Nome):
-            errors.append(
+                  'representative'),
                 _('Remove empty characters around name of fiscal '
-                  'representative'))
-        if not check_normalized_string(comunicazione.cessionario_rf_Cognome):
-            errors.append(
+                  'representative'),
                 _('Remove empty characters around surname of fiscal '
-                  'representative'))
-        # ----- Cedente
-        for partner in comunicazione.fatture_ricevute_ids:
-            # -----     Normalizzazione delle stringhe
-            if not check_normalized_string(partner.cedente_Denominazione):
-                errors.append(_(
-                    u'Remove empty characters around denomination of seller '
-                    u'%s'
-                ) % partner.partner_id.display_name)
-            if not check_normalized_string(partner.cedente_Nome):
-                errors.append(_(
-                    u'Remove empty characters around name of seller '
-                    u'%s'
-                ) % partner.partner_id.display_name)
-            if not check_normalized_string(partner.cedente_Cognome):
-                errors.append(_(
-                    u'Remove empty characters around surname of seller '
-                    u'%s'
-                ) % partner.partner_id.display_name)
-            if not check_normalized_string(partner.cedente_sede_Indirizzo):
-                errors.append(_(
-                    u'Remove empty characters around headquarters address of '
-                    u'seller %s'
-                ) % partner.partner_id.display_name)
-            if not check_normalized_string(partner.cedente_sede_NumeroCivico):
-                errors.append(_(
-                    u'Remove empty characters around street number of seller '
-                    u'%s'
-                ) % partner.partner_id.display_name)
-            if not check_normalized_string(partner.cedente_sede_Comune):
-                errors.append(_(
-                    u'Remove empty characters around city of seller '
-                    u'%s'
-                ) % partner.partner_id.display_name)
-            if not check_normalized_string(partner.cedente_so_Indirizzo):
-                errors.append(_(
-                    u'Remove empty characters around address of permanent '
-                    u'establishment %s'
-                ) % partner.partner_id.display_name)
-            if not check_normalized_string(partner.cedente_so_NumeroCivico):
-                errors.append(_(
-                    u'Remove empty characters around street number of '
-                    u'permanent establishment %s'
-                ) % partner.partner_id.display_name)
-            if not check_normalized_string(partner.cedente_so_Comune):
-                errors.append(_(
-                    u'Remove empty characters around city of permanent '
-                    u'establishment %s'
-                ) % partner.partner_id.display_name)
+                  'representative'),
+            ],
+            'section_field': 'fatture_ricevute_ids',
+            'partner_prefix': 'cedente_',
+            'partner_messages': [
+                _(u'Remove empty characters around denomination of seller '
+                  u'%s'),
+                _(u'Remove empty characters around name of seller '
+                  u'%s'),
+                _(u'Remove empty characters around surname of seller '
+                  u'%s'),
+                _(u'Remove empty characters around headquarters address of '
+                  u'seller %s'),
+                _(u'Remove empty characters around street number of seller '
+                  u'%s'),
+                _(u'Remove empty characters around city of seller '
+                  u'%s'),
+                _(u'Remove empty characters around address of permanent '
+                  u'establishment %s'),
+                _(u'Remove empty characters around street number of '
+                  u'permanent establishment %s'),
+                _(u'Remove empty characters around city of permanent '
+                  u'establishment %s'),
+                _(u'Remove empty characters around denomination of fiscal '
+                  u'representative %s'),
+                _(u'Remove empty characters around name of fiscal '
+                  u'representative %s'),
+                _(u'Remove empty characters around surname of fiscal '
+                  u'representative %s'),
+            ],
+            'country_message': _(u'Define a country ID for seller %s'),
+            'zip_message': _(u'ZIP %s of seller %s is not 5 characters'),
+            'body_field': 'fatture_ricevute_body_ids',
+            'body_messages': [
+                ('dati_fattura_Numero',
+                 _(u'No invoice number for supplier bill %s')),
+                ('dati_fattura_DataRegistrazione',
+                 _(u'No registration date for supplier bill %s')),
+            ],
+        }
+
+    def _compute_errors(self, rules):
+        """
+        Checks the communication in a single pass over data read in bulk:
+        a query for the sections, one for their bodies and one for the
+        bodies having VAT data.
+        :param rules: dict returned by _get_errors_rules_dte or
+        _get_errors_rules_dtr
+        :return: list of (model name, record id, message, arguments), see
+        _format_errors
+        """
+        self.ensure_one()
+        errors = []
+        sections = self[rules['section_field']]
+        body_field = sections._fields[rules['body_field']]
+        bodies = self.env[body_field.comodel_name].search([
+            (body_field.inverse_name, 'in', sections.ids)])
+        iva_field = bodies._fields['dati_fattura_iva_ids']
+        bodies_with_iva = {
+            group[iva_field.inverse_name][0]
+            for group in self.env[iva_field.comodel_name].read_group(
+                [(iva_field.inverse_name, 'in', bodies.ids)],
+                [iva_field.inverse_name], [iva_field.inverse_name])
+        }
+        bodies_data = bodies.read(
+            [body_field.inverse_name, 'invoice_id']
+            + [fname for fname, dummy in rules['body_messages']],
+            load='')
+        bodies_by_section = defaultdict(list)
+        for body_data in bodies_data:
+            bodies_by_section[body_data[body_field.inverse_name]].append(
+                body_data)
+        prefix = rules['partner_prefix']
+        sections_data = sections.read(
+            ['partner_id'] + [prefix + fname for fname in CHECKED_FIELDS],
+            load='')
+        sede_message = _(u'Address, city, country of %s are mandatory')
+        so_message = _(
+            u'Address, city, ZIP and country of permanent '
+            u'establishment %s are mandatory, when at least one value '
+            u'is defined')
+        rf_message = _(
+            u'Country ID and fiscal identifier of fiscal '
+            u'representative %s are mandatory, when at least one '
+            u'value is defined')
+        iva_message = _(u'No VAT data defined for invoice %s of partner %s')
+
+        # Names are referenced, not read: they are read when errors are
+        # formatted, so that cached errors don't show outdated names
+        def partner_name(data):
+            return 'res.partner', data['partner_id'], 'display_name'
+
+        def invoice_number(body_data):
+            return 'account.invoice', body_data['invoice_id'], 'number'
+
+        # ----- Conta il limite di partner e fatture
+        for data in sections_data:
+            if len(bodies_by_section[data['id']]) > INVOICES_LIMIT:
+                errors.append((sections._name, data['id'], _(
+                    'Limit of 1000 invoices per assignee (%s) exceeded'
+                ), (partner_name(data), )))
+        if len(sections_data) > PARTNERS_LIMIT:
+            errors.append((self._name, self.id, _(
+                'Limit of 1000 assignees per communication exceeded'), ()))
+        # ----- Normalizzazione delle stringhe della società
+        for fname, message in zip(
+                NORMALIZED_FIELDS, rules['company_messages']):
             if not check_normalized_string(
-                    partner.cedente_rf_Denominazione):
-                errors.append(_(
-                    u'Remove empty characters around denomination of fiscal '
-                    u'representative %s'
-                ) % partner.partner_id.display_name)
-            if not check_normalized_string(partner.cedente_rf_Nome):
-                errors.append(_(
-                    u'Remove empty characters around name of fiscal '
-                    u'representative %s'
-                ) % partner.partner_id.display_name)
-            if not check_normalized_string(partner.cedente_rf_Cognome):
-                errors.append(_(
-                    u'Remove empty characters around surname of fiscal '
-                    u'representative %s'
-                ) % partner.partner_id.display_name)
+                    self[rules['company_prefix'] + fname]):
+                errors.append((self._name, self.id, message, ()))
+        # ----- Partner
+        for data in sections_data:
+            values = {
+                fname: data[prefix + fname] for fname in CHECKED_FIELDS}
+
+            def add_error(message, *args):
+                errors.append((sections._name, data['id'], message,
+                               args or (partner_name(data), )))
+
+            # -----     Normalizzazione delle stringhe
+            for fname, message in zip(
+                    NORMALIZED_FIELDS, rules['partner_messages']):
+                if not check_normalized_string(values[fname]):
+                    add_error(message)
             # ----- Dati fiscali
-            if not partner.cedente_IdFiscaleIVA_IdPaese and \
-                    partner.cedente_IdFiscaleIVA_IdCodice:
-                errors.append(_(
-                    u'Define a country ID for seller %s'
-                ) % partner.partner_id.display_name)
+            if not values['IdFiscaleIVA_IdPaese'] and \
+                    values['IdFiscaleIVA_IdCodice']:
+                add_error(rules['country_message'])
             # ----- Dati Sede
-            if not all([partner.cedente_sede_Indirizzo,
-                        partner.cedente_sede_Comune,
-                        partner.cedente_sede_Nazione, ]):
-                errors.append(_(
-                    u'Address, city, country of %s are mandatory'
-                ) % partner.partner_id.display_name)
+            if not all(values[fname] for fname in (
+                    'sede_Indirizzo', 'sede_Comune', 'sede_Nazione')):
+                add_error(sede_message)
             # ----- Dati Stabile Organizzazione
-            if any([partner.cedente_so_Indirizzo,
-                    partner.cedente_so_NumeroCivico,
-                    partner.cedente_so_Cap,
-                    partner.cedente_so_Comune,
-                    partner.cedente_so_Provincia,
-                    partner.cedente_so_Nazione,
-                    ]) and not all([partner.cedente_so_Indirizzo,
-                                    partner.cedente_so_Comune,
-                                    partner.cedente_so_Cap,
-                                    partner.cedente_so_Nazione, ]):
-                errors.append(_(
-                    u'Address, city, ZIP and country of permanent '
-                    u'establishment %s are mandatory, when at least one value '
-                    u'is defined'
-                ) % partner.partner_id.display_name)
+            if any(values[fname] for fname in (
+                    'so_Indirizzo', 'so_NumeroCivico', 'so_Cap',
+                    'so_Comune', 'so_Provincia', 'so_Nazione')) \
+                    and not all(values[fname] for fname in (
+                        'so_Indirizzo', 'so_Comune', 'so_Cap',
+                        'so_Nazione')):
+                add_error(so_message)
             # ----- Rappresentante Fiscale
-            if any([partner.cedente_rf_IdFiscaleIVA_IdPaese,
-                    partner.cedente_rf_IdFiscaleIVA_IdCodice,
-                    partner.cedente_rf_Denominazione,
-                    partner.cedente_rf_Nome,
-                    partner.cedente_rf_Cognome,
-                    ]) and not all([
-                        partner.cedente_rf_IdFiscaleIVA_IdPaese,
-                        partner.cedente_rf_IdFiscaleIVA_IdCodice, ]):
-                errors.append(_(
-                    u'Country ID and fiscal identifier of fiscal '
-                    u'representative %s are mandatory, when at least one '
-                    u'value is defined'
-                ) % partner.partner_id.display_name)
+            if any(values[fname] for fname in (
+                    'rf_IdFiscaleIVA_IdPaese', 'rf_IdFiscaleIVA_IdCodice',
+                    'rf_Denominazione', 'rf_Nome', 'rf_Cognome')) \
+                    and not all(values[fname] for fname in (
+                        'rf_IdFiscaleIVA_IdPaese',
+                        'rf_IdFiscaleIVA_IdCodice')):
+                add_error(rf_message)
             # ----- CAP
-            if partner.cedente_sede_Cap and \
-                    not re.match('[0-9]{5}', partner.cedente_sede_Cap):
-                errors.append(_(
-                    u'ZIP %s of seller %s is not 5 characters'
-                ) % (
-                    partner.cedente_sede_Cap,
-                    partner.partner_id.display_name
-                ))
+            if values['sede_Cap'] and \
+                    not re.match('[0-9]{5}', values['sede_Cap']):
+                add_error(rules['zip_message'],
+                          values['sede_Cap'], partner_name(data))
             # ----- Dettagli IVA
-            for invoice in partner.fatture_ricevute_body_ids:
-                if not invoice.dati_fattura_iva_ids:
-                    errors.append(_(
-                        u'No VAT data defined for invoice %s of partner %s'
-                    ) % (
-                        invoice.invoice_id.number,
-                        partner.partner_id.display_name))
-                if not invoice.dati_fattura_Numero:
-                    errors.append(
-                        _(u'No invoice number for supplier bill %s') % (
-                            invoice.invoice_id.number))
-                if not invoice.dati_fattura_DataRegistrazione:
-                    errors.append(
-                        _(u'No registration date for supplier bill %s') % (
-                            invoice.invoice_id.number))
+            for body_data in bodies_by_section[data['id']]:
+                if body_data['id'] not in bodies_with_iva:
+                    errors.append((bodies._name, body_data['id'], iva_message, (
+                        invoice_number(body_data), partner_name(data))))
+                for fname, message in rules['body_messages']:
+                    if not body_data[fname]:
+                        errors.append((
+                            bodies._name, body_data['id'],
+                            message, (invoice_number(body_data), )))
         return errors
 
+    @api.model
+    def _format_errors(self, errors):
+        """
+        Formats errors computed by _compute_errors, reading the names of the
+        referenced records in batch.
+        :param errors: list of (model name, record id, message, arguments),
+        an argument being either a value or a (model name, record id, field
+        name) reference
+        :return: tuple of (model name, record id, message)
+        """
+        ids_by_model = defaultdict(set)
+        for dummy, dummy, dummy, args in errors:
+            for arg in args:
+                if isinstance(arg, tuple) and arg[1]:
+                    ids_by_model[arg[0]].add(arg[1])
+        records_by_model = {
+            model: self.env[model].browse(list(ids))
+            for model, ids in ids_by_model.items()
+        }
+
+        def format_arg(arg):
+            if isinstance(arg, tuple):
+                model, record_id, fname = arg
+                records = records_by_model.get(model, self.env[model])
+                return records.browse(record_id)[fname]
+            return arg
+
+        return tuple(
+            (model, record_id,
+             message % tuple(map(format_arg, args)) if args else message)
+            for model, record_id, message, args in errors
+        )
+
+    @api.multi
+    def _update_errors_cache_key(self):
+        """
+        Errors computed so far won't be used anymore for these
+        communications: called whenever they or their sections change
+        """
+        if not self:
+            return
+        self.env.cr.execute(
+            "UPDATE comunicazione_dati_iva SET errors_cache_key = %s "
+            "WHERE id IN %s", (uuid4().hex, tuple(self.ids)))
+        self.invalidate_cache(['errors_cache_key'], self.ids)
+
+    @tools.ormcache('self.id', 'self.env.lang', 'dati_trasmissione',
+                    'errors_cache_key')
+    def _get_errors(self, dati_trasmissione, errors_cache_key):
+        if dati_trasmissione == 'DTE':
+            rules = self._get_errors_rules_dte()
+        else:
+            rules = self._get_errors_rules_dtr()
+        return tuple(self._compute_errors(rules))
+
+    @api.multi
+    def get_errors(self):
+        """
+        Errors of the communication, cached until it or its sections change;
+        names of partners and invoices are read each time
+        :return: tuple of (model name, record id, message)
+        """
+        self.ensure_one()
+        if self.dati_trasmissione not in ('DTE', 'DTR'):
+            return ()
+        return self._format_errors(self._get_errors(
+            self.dati_trasmissione, self.errors_cache_key))
+
+    @api.multi
+    def _check_errors_dte(self):
+        self.ensure_one()
+        return [message for dummy, dummy, message in self._format_errors(
+            self._get_errors('DTE', self.errors_cache_key))]
+
+    @api.multi
+    def _check_errors_dtr(self):
+        self.ensure_one()
+        return [message for dummy, dummy, message in self._format_errors(
+            self._get_errors('DTR', self.errors_cache_key))]
+
     @api.multi
     def check_errors(self):
         for comunicazione in self:
@@ -1145,904 +1371,6 @@ class ComunicazioneDatiIva(models.Model):
         """
         return True
 
-    def _export_xml_get_dati_fattura(self):
-        # ----- 0 - Dati Fattura
-        attrs = {
-            'versione': VERSION
-        }
-        x_0_dati_fattura = etree.Element(
-            etree.QName(NS_2, "DatiFattura"), attrib=attrs, nsmap=NS_MAP)
-        return x_0_dati_fattura
-
-    def _export_xml_get_dati_fattura_header(self):
-        # ----- 1 - Dati Fattura
-        x_1_dati_fattura_header = etree.Element(
-            etree.QName("DatiFatturaHeader"))
-        # ----- 1.1 - Progressivo Invio
-        x_1_1_progressivo_invio = etree.SubElement(
-            x_1_dati_fattura_header,
-            etree.QName("ProgressivoInvio"))
-        x_1_1_progressivo_invio.text = str(self.identificativo)
-
-        # Nota del file excel:
-        # Questo blocco va valorizzato solo se il soggetto obbligato
-        # alla comunicazione dei dati fattura non coincide con
-        # il soggetto passivo IVA al quale i dati si riferiscono.
-        # NON deve essere valorizzato se per il soggetto trasmittente
-        # è vera una delle seguenti affermazioni:
-        # - coincide  con il soggetto IVA al quale i dati si riferiscono;
-        # - è legato da vincolo di incarico con il soggetto IVA al quale i dati
-        #     si riferiscono;
-        # - è un intermediario.
-        # In tutti gli altri casi questo blocco DEVE essere valorizzato.
-
-        # ----- 1.2 - Dichiarante
-        x_1_2_dichiarante = etree.SubElement(
-            x_1_dati_fattura_header,
-            etree.QName("Dichiarante"))
-        # ----- 1.2.1 - Codice Fiscale
-        x_1_2_1_codice_fiscale = etree.SubElement(
-            x_1_2_dichiarante,
-            etree.QName("CodiceFiscale"))
-        x_1_2_1_codice_fiscale.text = self.declarant_fiscalcode or ''
-        # ----- 1.2.2 - Carica
-        x_1_2_2_carica = etree.SubElement(
-            x_1_2_dichiarante,
-            etree.QName("Carica"))
-        x_1_2_2_carica.text = self.codice_carica_id.code if \
-            self.codice_carica_id else ''
-        return x_1_dati_fattura_header
-
-    def _export_xml_get_dte(self):
-        # ----- 2 - DTE
-        x_2_dte = etree.Element(
-            etree.QName("DTE"))
-        # -----     2.1 - Cedente Prestatore DTE
-        x_2_1_cedente_prestatore = etree.SubElement(
-            x_2_dte,
-            etree.QName("CedentePrestatoreDTE"))
-        # -----         2.1.1 - IdentificativiFiscali
-        x_2_1_1_identificativi_fiscali = etree.SubElement(
-            x_2_1_cedente_prestatore,
-            etree.QName("IdentificativiFiscali"))
-        # -----             2.1.1.1 - Id Fiscale IVA
-        x_2_1_1_1_id_fiscale_iva = etree.SubElement(
-            x_2_1_1_identificativi_fiscali,
-            etree.QName("IdFiscaleIVA"))
-        # -----                 2.1.1.1.1 - Id Paese
-        x_2_1_1_1_1_id_paese = etree.SubElement(
-            x_2_1_1_1_id_fiscale_iva,
-            etree.QName("IdPaese"))
-        x_2_1_1_1_1_id_paese.text = self.cedente_IdFiscaleIVA_IdPaese or ''
-        # -----                 2.1.1.1.2 - Id Codice
-        x_2_1_1_1_2_id_codice = etree.SubElement(
-            x_2_1_1_1_id_fiscale_iva,
-            etree.QName("IdCodice"))
-        x_2_1_1_1_2_id_codice.text = self.cedente_IdFiscaleIVA_IdCodice or ''
-        # -----             2.1.1.2 - Codice Fiscale
-        x_2_1_1_2_codice_fiscale = etree.SubElement(
-            x_2_1_1_identificativi_fiscali,
-            etree.QName("CodiceFiscale"))
-        x_2_1_1_2_codice_fiscale.text = self.cedente_CodiceFiscale or ''
-        # -----         2.1.2 - AltriDatiIdentificativi
-        x_2_1_2_altri_identificativi = etree.SubElement(
-            x_2_1_cedente_prestatore,
-            etree.QName("AltriDatiIdentificativi"))
-        # -----             2.1.2.1 - Denominazione
-        x_2_1_2_1_denominazione = etree.SubElement(
-            x_2_1_2_altri_identificativi,
-            etree.QName("Denominazione"))
-        x_2_1_2_1_denominazione.text = self.cedente_Denominazione or ''
-        # -----             2.1.2.2 - Nome
-        x_2_1_2_2_nome = etree.SubElement(
-            x_2_1_2_altri_identificativi,
-            etree.QName("Nome"))
-        x_2_1_2_2_nome.text = self.cedente_Nome or ''
-        # -----             2.1.2.3 - Cognome
-        x_2_1_2_3_cognome = etree.SubElement(
-            x_2_1_2_altri_identificativi,
-            etree.QName("Cognome"))
-        x_2_1_2_3_cognome.text = self.cedente_Cognome or ''
-        # -----             2.1.2.4 - Sede
-        x_2_1_2_4_sede = etree.SubElement(
-            x_2_1_2_altri_identificativi,
-            etree.QName("Sede"))
-        # -----                 2.1.2.4.1 - Indirizzo
-        x_2_1_2_4_1_indirizzo = etree.SubElement(
-            x_2_1_2_4_sede,
-            etree.QName("Indirizzo"))
-        x_2_1_2_4_1_indirizzo.text = self.cedente_sede_Indirizzo or ''
-        # -----                 2.1.2.4.2 - Numero Civico
-        x_2_1_2_4_2_numero_civico = etree.SubElement(
-            x_2_1_2_4_sede,
-            etree.QName("NumeroCivico"))
-        x_2_1_2_4_2_numero_civico.text = self.cedente_sede_NumeroCivico or ''
-        # -----                 2.1.2.4.3 - CAP
-        x_2_1_2_4_3_cap = etree.SubElement(
-            x_2_1_2_4_sede,
-            etree.QName("CAP"))
-        x_2_1_2_4_3_cap.text = self.cedente_sede_Cap or ''
-        # -----                 2.1.2.4.4 - Comune
-        x_2_1_2_4_4_comune = etree.SubElement(
-            x_2_1_2_4_sede,
-            etree.QName("Comune"))
-        x_2_1_2_4_4_comune.text = self.cedente_sede_Comune or ''
-        # -----                 2.1.2.4.5 - Provincia
-        x_2_1_2_4_5_provincia = etree.SubElement(
-            x_2_1_2_4_sede,
-            etree.QName("Provincia"))
-        x_2_1_2_4_5_provincia.text = self.cedente_sede_Provincia or ''
-        # -----                 2.1.2.4.6 - Nazione
-        x_2_1_2_4_6_nazione = etree.SubElement(
-            x_2_1_2_4_sede,
-            etree.QName("Nazione"))
-        x_2_1_2_4_6_nazione.text = self.cedente_sede_Nazione or ''
-        # -----             2.1.2.5 - Stabile Organizzazione
-        x_2_1_2_5_stabile_organizzazione = etree.SubElement(
-            x_2_1_2_altri_identificativi,
-            etree.QName("StabileOrganizzazione"))
-        # -----                 2.1.2.5.1 - Indirizzo
-        x_2_1_2_5_1_indirizzo = etree.SubElement(
-            x_2_1_2_5_stabile_organizzazione,
-            etree.QName("Indirizzo"))
-        x_2_1_2_5_1_indirizzo.text = self.cedente_so_Indirizzo or ''
-        # -----                 2.1.2.5.2 - Numero Civico
-        x_2_1_2_5_2_numero_civico = etree.SubElement(
-            x_2_1_2_5_stabile_organizzazione,
-            etree.QName("Numerocivico"))
-        x_2_1_2_5_2_numero_civico.text = self.cedente_so_NumeroCivico or ''
-        # -----                 2.1.2.5.3 - CAP
-        x_2_1_2_5_3_cap = etree.SubElement(
-            x_2_1_2_5_stabile_organizzazione,
-            etree.QName("CAP"))
-        x_2_1_2_5_3_cap.text = self.cedente_so_Cap or ''
-        # -----                 2.1.2.5.4 - Comune
-        x_2_1_2_5_4_comune = etree.SubElement(
-            x_2_1_2_5_stabile_organizzazione,
-            etree.QName("Comune"))
-        x_2_1_2_5_4_comune.text = self.cedente_so_Comune or ''
-        # -----                 2.1.2.5.5 - Provincia
-        x_2_1_2_5_5_provincia = etree.SubElement(
-            x_2_1_2_5_stabile_organizzazione,
-            etree.QName("Provincia"))
-        x_2_1_2_5_5_provincia.text = self.cedente_so_Provincia or ''
-        # -----                 2.1.2.5.6 - Nazione
-        x_2_1_2_5_6_nazione = etree.SubElement(
-            x_2_1_2_5_stabile_organizzazione,
-            etree.QName("Nazione"))
-        x_2_1_2_5_6_nazione.text = self.cedente_so_Nazione or ''
-        # -----             2.1.2.6 - Rappresentante Fiscale
-        x_2_1_2_6_rappresentante_fiscale = etree.SubElement(
-            x_2_1_2_altri_identificativi,
-            etree.QName("RappresentanteFiscale"))
-        # -----                 2.1.2.6.1 - Id Fiscale IVA
-        x_2_1_2_6_1_id_fiscale_iva = etree.SubElement(
-            x_2_1_2_6_rappresentante_fiscale,
-            etree.QName("IdFiscaleIVA"))
-        # -----                     2.1.2.6.1.1 - Id Paese
-        x_2_1_2_6_1_1_id_paese = etree.SubElement(
-            x_2_1_2_6_1_id_fiscale_iva,
-            etree.QName("IdPaese"))
-        x_2_1_2_6_1_1_id_paese.text = (
-            self.cedente_rf_IdFiscaleIVA_IdPaese or '')
-        # -----                     2.1.2.6.1.2 - Id Codice
-        x_2_1_2_6_1_2_id_codice = etree.SubElement(
-            x_2_1_2_6_1_id_fiscale_iva,
-            etree.QName("IdCodice"))
-        x_2_1_2_6_1_2_id_codice.text = \
-            self.cedente_rf_IdFiscaleIVA_IdCodice or ''
-        # -----                 2.1.2.6.2 - Denominazione
-        x_2_1_2_6_2_denominazione = etree.SubElement(
-            x_2_1_2_6_rappresentante_fiscale,
-            etree.QName("Denominazione"))
-        x_2_1_2_6_2_denominazione.text = \
-            self.cedente_rf_Denominazione or ''
-        # -----                 2.1.2.6.3 - Nome
-        x_2_1_2_6_3_nome = etree.SubElement(
-            x_2_1_2_6_rappresentante_fiscale,
-            etree.QName("Nome"))
-        x_2_1_2_6_3_nome.text = self.cedente_rf_Nome or ''
-        # -----                 2.1.2.6.4 - Cognome
-        x_2_1_2_6_4_cognome = etree.SubElement(
-            x_2_1_2_6_rappresentante_fiscale,
-            etree.QName("Cognome"))
-        x_2_1_2_6_4_cognome.text = self.cedente_rf_Cognome or ''
-
-        for partner_invoice in self.fatture_emesse_ids:
-            # -----     2.2 - Cessionario Committente DTE
-            x_2_2_cessionario_committente = etree.SubElement(
-                x_2_dte,
-                etree.QName("CessionarioCommittenteDTE"))
-            # -----         2.2.1 - IdentificativiFiscali
-            x_2_2_1_identificativi_fiscali = etree.SubElement(
-                x_2_2_cessionario_committente,
-                etree.QName("IdentificativiFiscali"))
-            if partner_invoice.cessionario_IdFiscaleIVA_IdPaese and \
-                    partner_invoice.cessionario_IdFiscaleIVA_IdCodice:
-                # -----             2.2.1.1 - Id Fiscale IVA
-                x_2_2_1_1_id_fiscale_iva = etree.SubElement(
-                    x_2_2_1_identificativi_fiscali,
-                    etree.QName("IdFiscaleIVA"))
-                # -----                 2.2.1.1.1 - Id Paese
-                x_2_2_1_1_1_id_paese = etree.SubElement(
-                    x_2_2_1_1_id_fiscale_iva,
-                    etree.QName("IdPaese"))
-                x_2_2_1_1_1_id_paese.text = \
-                    partner_invoice.cessionario_IdFiscaleIVA_IdPaese or ''
-                # -----                 2.2.1.1.2 - Id Codice
-                x_2_2_1_1_2_id_codice = etree.SubElement(
-                    x_2_2_1_1_id_fiscale_iva,
-                    etree.QName("IdCodice"))
-                x_2_2_1_1_2_id_codice.text = \
-                    partner_invoice.cessionario_IdFiscaleIVA_IdCodice or ''
-            # -----             2.2.1.2 - Codice Fiscale
-            x_2_2_1_2_codice_fiscale = etree.SubElement(
-                x_2_2_1_identificativi_fiscali,
-                etree.QName("CodiceFiscale"))
-            x_2_2_1_2_codice_fiscale.text = \
-                partner_invoice.cessionario_CodiceFiscale or ''
-            # -----         2.2.2 - AltriDatiIdentificativi
-            x_2_2_2_altri_identificativi = etree.SubElement(
-                x_2_2_cessionario_committente,
-                etree.QName("AltriDatiIdentificativi"))
-            # -----             2.2.2.1 - Denominazione
-            x_2_2_2_1_altri_identificativi_denominazione = etree.SubElement(
-                x_2_2_2_altri_identificativi,
-                etree.QName("Denominazione"))
-            x_2_2_2_1_altri_identificativi_denominazione.text = \
-                encode_for_export(partner_invoice.cessionario_Denominazione or '', 80)
-            # -----             2.2.2.2 - Nome
-            x_2_2_2_2_nome = etree.SubElement(
-                x_2_2_2_altri_identificativi,
-                etree.QName("Nome"))
-            x_2_2_2_2_nome.text = \
-                encode_for_export(partner_invoice.cessionario_Nome or '', 60)
-            # -----             2.2.2.3 - Cognome
-            x_2_2_2_3_cognome = etree.SubElement(
-                x_2_2_2_altri_identificativi,
-                etree.QName("Cognome"))
-            x_2_2_2_3_cognome.text = \
-                encode_for_export(partner_invoice.cessionario_Cognome or '', 60)
-            # -----             2.2.2.4 - Sede
-            x_2_2_2_4_sede = etree.SubElement(
-                x_2_2_2_altri_identificativi,
-                etree.QName("Sede"))
-            # -----                 2.2.2.4.1 - Indirizzo
-            x_2_2_2_4_1_indirizzo = etree.SubElement(
-                x_2_2_2_4_sede,
-                etree.QName("Indirizzo"))
-            x_2_2_2_4_1_indirizzo.text = \
-                encode_for_export(partner_invoice.cessionario_sede_Indirizzo or '', 60)
-            # -----                 2.2.2.4.2 - Numero Civico
-            x_2_2_2_4_2_numero_civico = etree.SubElement(
-                x_2_2_2_4_sede,
-                etree.QName("NumeroCivico"))
-            x_2_2_2_4_2_numero_civico.text = \
-                encode_for_export(
-                    partner_invoice.cessionario_sede_NumeroCivico or '', 8,
-                    encoding='ascii')
-            # -----                 2.2.2.4.3 - CAP
-            x_2_2_2_4_3_cap = etree.SubElement(
-                x_2_2_2_4_sede,
-                etree.QName("CAP"))
-            x_2_2_2_4_3_cap.text = \
-                encode_for_export(partner_invoice.cessionario_sede_Cap or '', 5,
-                                  encoding='ascii')
-            # -----                 2.2.2.4.4 - Comune
-            x_2_2_2_4_4_comune = etree.SubElement(
-                x_2_2_2_4_sede,
-                etree.QName("Comune"))
-            x_2_2_2_4_4_comune.text = \
-                encode_for_export(partner_invoice.cessionario_sede_Comune or '', 60)
-            # -----                 2.2.2.4.5 - Provincia
-            x_2_2_2_4_5_provincia = etree.SubElement(
-                x_2_2_2_4_sede,
-                etree.QName("Provincia"))
-            x_2_2_2_4_5_provincia.text = \
-                partner_invoice.cessionario_sede_Provincia or ''
-            # -----                 2.2.2.4.6 - Nazione
-            x_2_2_2_4_6_nazione = etree.SubElement(
-                x_2_2_2_4_sede,
-                etree.QName("Nazione"))
-            x_2_2_2_4_6_nazione.text = \
-                partner_invoice.cessionario_sede_Nazione or ''
-            # -----             2.2.2.5 - Stabile Organizzazione
-            x_2_2_2_5_stabile_organizzazione = etree.SubElement(
-                x_2_2_2_altri_identificativi,
-                etree.QName("StabileOrganizzazione"))
-            # -----                 2.2.2.5.1 - Indirizzo
-            x_2_2_2_5_1_indirizzo = etree.SubElement(
-                x_2_2_2_5_stabile_organizzazione,
-                etree.QName("Indirizzo"))
-            x_2_2_2_5_1_indirizzo.text = \
-                encode_for_export(partner_invoice.cessionario_so_Indirizzo or '', 60)
-            # -----                 2.2.2.5.2 - Numero Civico
-            x_2_2_2_5_2_numero_civico = etree.SubElement(
-                x_2_2_2_5_stabile_organizzazione,
-                etree.QName("NumeroCivico"))
-            x_2_2_2_5_2_numero_civico.text = \
-                encode_for_export(partner_invoice.cessionario_so_NumeroCivico or '', 8,
-                                  encoding='ascii')
-            # -----                 2.2.2.5.3 - CAP
-            x_2_2_2_5_3_cap = etree.SubElement(
-                x_2_2_2_5_stabile_organizzazione,
-                etree.QName("CAP"))
-            x_2_2_2_5_3_cap.text = \
-                encode_for_export(partner_invoice.cessionario_so_Cap or '', 5,
-                                  encoding='ascii')
-            # -----                 2.2.2.5.4 - Comune
-            x_2_2_2_5_4_comune = etree.SubElement(
-                x_2_2_2_5_stabile_organizzazione,
-                etree.QName("Comune"))
-            x_2_2_2_5_4_comune.text = \
-                encode_for_export(partner_invoice.cessionario_so_Comune or '', 60)
-            # -----                 2.2.2.5.5 - Provincia
-            x_2_2_2_5_5_provincia = etree.SubElement(
-                x_2_2_2_5_stabile_organizzazione,
-                etree.QName("Provincia"))
-            x_2_2_2_5_5_provincia.text = \
-                partner_invoice.cessionario_so_Provincia or ''
-            # -----                 2.2.2.5.6 - Nazione
-            x_2_2_2_5_6_nazione = etree.SubElement(
-                x_2_2_2_5_stabile_organizzazione,
-                etree.QName("Nazione"))
-            x_2_2_2_5_6_nazione.text = \
-                partner_invoice.cessionario_so_Nazione or ''
-            # -----             2.2.2.6 - Rappresentante Fiscale
-            x_2_2_2_6_rappresentante_fiscale = etree.SubElement(
-                x_2_2_2_altri_identificativi,
-                etree.QName("RappresentanteFiscale"))
-            # -----                 2.2.2.6.1 - Id Fiscale IVA
-            x_2_2_2_6_1_id_fiscale_iva = etree.SubElement(
-                x_2_2_2_6_rappresentante_fiscale,
-                etree.QName("IdFiscaleIVA"))
-            x_2_2_2_6_rappresentante_fiscale.text = \
-                partner_invoice.cessionario_rf_IdFiscaleIVA_IdPaese or ''
-            # -----                     2.2.2.6.1.1 - Id Paese
-            x_2_2_2_6_1_1_id_paese = etree.SubElement(
-                x_2_2_2_6_1_id_fiscale_iva,
-                etree.QName("IdPaese"))
-            x_2_2_2_6_1_1_id_paese.text = \
-                partner_invoice.cessionario_rf_IdFiscaleIVA_IdPaese or ''
-            # -----                     2.2.2.6.1.2 - Id Codice
-            x_2_2_2_6_1_2_id_codice = etree.SubElement(
-                x_2_2_2_6_1_id_fiscale_iva,
-                etree.QName("IdCodice"))
-            x_2_2_2_6_1_2_id_codice.text = \
-                partner_invoice.cessionario_rf_IdFiscaleIVA_IdCodice or ''
-            # -----                 2.2.2.6.2 - Denominazione
-            x_2_2_2_6_2_denominazione = etree.SubElement(
-                x_2_2_2_6_rappresentante_fiscale,
-                etree.QName("Denominazione"))
-            x_2_2_2_6_2_denominazione.text = \
-                encode_for_export(
-                    partner_invoice.cessionario_rf_Denominazione or '', 80)
-            # -----                 2.2.2.6.3 - Nome
-            x_2_2_2_6_3_nome = etree.SubElement(
-                x_2_2_2_6_rappresentante_fiscale,
-                etree.QName("Nome"))
-            x_2_2_2_6_3_nome.text = \
-                encode_for_export(partner_invoice.cessionario_rf_Nome or '', 60)
-            # -----                 2.2.2.6.4 - Cognome
-            x_2_2_2_6_4_cognome = etree.SubElement(
-                x_2_2_2_6_rappresentante_fiscale,
-                etree.QName("Cognome"))
-            x_2_2_2_6_4_cognome.text = \
-                encode_for_export(partner_invoice.cessionario_rf_Cognome or '', 60)
-
-            for invoice in partner_invoice.fatture_emesse_body_ids:
-                # -----         2.2.3 - Dati Fattura Body DTE
-                x_2_2_3_dati_fattura_body_dte = etree.SubElement(
-                    x_2_2_cessionario_committente,
-                    etree.QName("DatiFatturaBodyDTE"))
-                # -----             2.2.3.1 - Dati Generali
-                x_2_2_3_1_dati_generali = etree.SubElement(
-                    x_2_2_3_dati_fattura_body_dte,
-                    etree.QName("DatiGenerali"))
-                # -----                 2.2.3.1.1 - Tipo Documento
-                x_2_2_3_1_1_tipo_documento = etree.SubElement(
-                    x_2_2_3_1_dati_generali,
-                    etree.QName("TipoDocumento"))
-                x_2_2_3_1_1_tipo_documento.text = \
-                    invoice.dati_fattura_TipoDocumento.code or ''
-                # -----                 2.2.3.1.2 - Data
-                x_2_2_3_1_2_data = etree.SubElement(
-                    x_2_2_3_1_dati_generali,
-                    etree.QName("Data"))
-                x_2_2_3_1_2_data.text = \
-                    fields.Date.to_string(invoice.dati_fattura_Data) or ''
-                # -----                 2.2.3.1.3 - Numero
-                x_2_2_3_1_2_numero = etree.SubElement(
-                    x_2_2_3_1_dati_generali,
-                    etree.QName("Numero"))
-                x_2_2_3_1_2_numero.text = invoice.dati_fattura_Numero or ''
-
-                for tax in invoice.dati_fattura_iva_ids:
-                    # -----             2.2.3.2 - Dati Riepilogo
-                    x_2_2_3_2_riepilogo = etree.SubElement(
-                        x_2_2_3_dati_fattura_body_dte,
-                        etree.QName("DatiRiepilogo"))
-                    # -----                 2.2.3.2.1 - Imponibile Importo
-                    x_2_2_3_2_1_imponibile_importo = etree.SubElement(
-                        x_2_2_3_2_riepilogo,
-                        etree.QName("ImponibileImporto"))
-                    x_2_2_3_2_1_imponibile_importo.text = \
-                        format_decimal(tax.ImponibileImporto)
-                    # -----                 2.2.3.2.2 - Dati IVA
-                    x_2_2_3_2_2_dati_iva = etree.SubElement(
-                        x_2_2_3_2_riepilogo,
-                        etree.QName("DatiIVA"))
-                    # -----                     2.2.3.2.2.1 - Imposta
-                    x_2_2_3_2_2_1_imposta = etree.SubElement(
-                        x_2_2_3_2_2_dati_iva,
-                        etree.QName("Imposta"))
-                    x_2_2_3_2_2_1_imposta.text = format_decimal(tax.Imposta)
-                    # -----                     2.2.3.2.2.2 - Aliquota
-                    x_2_2_3_2_2_2_aliquota = etree.SubElement(
-                        x_2_2_3_2_2_dati_iva,
-                        etree.QName("Aliquota"))
-                    x_2_2_3_2_2_2_aliquota.text = format_decimal(tax.Aliquota)
-                    # -----                 2.2.3.2.3 - Natura
-                    x_2_2_3_2_3_natura = etree.SubElement(
-                        x_2_2_3_2_riepilogo,
-                        etree.QName("Natura"))
-                    x_2_2_3_2_3_natura.text = \
-                        tax.Natura_id.code if tax.Natura_id else ''
-                    # -----                 2.2.3.2.4 - Detraibile
-                    x_2_2_3_2_4_detraibile = etree.SubElement(
-                        x_2_2_3_2_riepilogo,
-                        etree.QName("Detraibile"))
-                    x_2_2_3_2_4_detraibile.text = format_decimal(
-                        tax.Detraibile)
-                    # -----                 2.2.3.2.5 - Deducibile
-                    x_2_2_3_2_5_deducibile = etree.SubElement(
-                        x_2_2_3_2_riepilogo,
-                        etree.QName("Deducibile"))
-                    x_2_2_3_2_5_deducibile.text = tax.Deducibile or ''
-                    # -----                 2.2.3.2.6 - Esigibilita IVA
-                    x_2_2_3_2_6_esagibilita_iva = etree.SubElement(
-                        x_2_2_3_2_riepilogo,
-                        etree.QName("EsigibilitaIVA"))
-                    x_2_2_3_2_6_esagibilita_iva.text = tax.EsigibilitaIVA or ''
-
-        return x_2_dte
-
-    def _export_xml_get_dtr(self):
-        # ----- 3 - DTR
-        x_3_dtr = etree.Element(
-            etree.QName("DTR"))
-        # -----     2.1 - Cessionario Committente DTR
-        x_3_1_cessionario_committente = etree.SubElement(
-            x_3_dtr,
-            etree.QName("CessionarioCommittenteDTR"))
-        # -----         2.1.1 - IdentificativiFiscali
-        x_3_1_1_identificativi_fiscali = etree.SubElement(
-            x_3_1_cessionario_committente,
-            etree.QName("IdentificativiFiscali"))
-        # -----             2.1.1.1 - Id Fiscale IVA
-        x_3_1_1_1_id_fiscale_iva = etree.SubElement(
-            x_3_1_1_identificativi_fiscali,
-            etree.QName("IdFiscaleIVA"))
-        # -----                 2.1.1.1.1 - Id Paese
-        x_3_1_1_1_1_id_paese = etree.SubElement(
-            x_3_1_1_1_id_fiscale_iva,
-            etree.QName("IdPaese"))
-        x_3_1_1_1_1_id_paese.text = self.cessionario_IdFiscaleIVA_IdPaese or ''
-        # -----                 2.1.1.1.2 - Id Codice
-        x_3_1_1_1_2_id_codice = etree.SubElement(
-            x_3_1_1_1_id_fiscale_iva,
-            etree.QName("IdCodice"))
-        x_3_1_1_1_2_id_codice.text = (
-            self.cessionario_IdFiscaleIVA_IdCodice or '')
-        # -----             2.1.1.2 - Codice Fiscale
-        x_3_1_1_2_codice_fiscale = etree.SubElement(
-            x_3_1_1_identificativi_fiscali,
-            etree.QName("CodiceFiscale"))
-        x_3_1_1_2_codice_fiscale.text = self.cessionario_CodiceFiscale or ''
-        # -----         2.1.2 - AltriDatiIdentificativi
-        x_3_1_2_altri_identificativi = etree.SubElement(
-            x_3_1_cessionario_committente,
-            etree.QName("AltriDatiIdentificativi"))
-        # -----             2.1.2.1 - Denominazione
-        x_3_1_2_1_denominazione = etree.SubElement(
-            x_3_1_2_altri_identificativi,
-            etree.QName("Denominazione"))
-        x_3_1_2_1_denominazione.text = self.cessionario_Denominazione or ''
-        # -----             2.1.2.2 - Nome
-        x_3_1_2_2_nome = etree.SubElement(
-            x_3_1_2_altri_identificativi,
-            etree.QName("Nome"))
-        x_3_1_2_2_nome.text = self.cessionario_Nome or ''
-        # -----             2.1.2.3 - Cognome
-        x_3_1_2_3_cognome = etree.SubElement(
-            x_3_1_2_altri_identificativi,
-            etree.QName("Cognome"))
-        x_3_1_2_3_cognome.text = self.cessionario_Cognome or ''
-        # -----             2.1.2.4 - Sede
-        x_3_1_2_4_sede = etree.SubElement(
-            x_3_1_2_altri_identificativi,
-            etree.QName("Sede"))
-        # -----                 2.1.2.4.1 - Indirizzo
-        x_3_1_2_4_1_indirizzo = etree.SubElement(
-            x_3_1_2_4_sede,
-            etree.QName("Indirizzo"))
-        x_3_1_2_4_1_indirizzo.text = self.cessionario_sede_Indirizzo or ''
-        # -----                 2.1.2.4.2 - Numero Civico
-        x_3_1_2_4_2_numero_civico = etree.SubElement(
-            x_3_1_2_4_sede,
-            etree.QName("NumeroCivico"))
-        x_3_1_2_4_2_numero_civico.text = (
-            self.cessionario_sede_NumeroCivico or '')
-        # -----                 2.1.2.4.3 - CAP
-        x_3_1_2_4_3_cap = etree.SubElement(
-            x_3_1_2_4_sede,
-            etree.QName("CAP"))
-        x_3_1_2_4_3_cap.text = self.cessionario_sede_Cap or ''
-        # -----                 2.1.2.4.4 - Comune
-        x_3_1_2_4_4_comune = etree.SubElement(
-            x_3_1_2_4_sede,
-            etree.QName("Comune"))
-        x_3_1_2_4_4_comune.text = self.cessionario_sede_Comune or ''
-        # -----                 2.1.2.4.5 - Provincia
-        x_3_1_2_4_5_provincia = etree.SubElement(
-            x_3_1_2_4_sede,
-            etree.QName("Provincia"))
-        x_3_1_2_4_5_provincia.text = self.cessionario_sede_Provincia or ''
-        # -----                 2.1.2.4.6 - Nazione
-        x_3_1_2_4_6_nazione = etree.SubElement(
-            x_3_1_2_4_sede,
-            etree.QName("Nazione"))
-        x_3_1_2_4_6_nazione.text = self.cessionario_sede_Nazione or ''
-        # -----             2.1.2.5 - Stabile Organizzazione
-        x_3_1_2_5_stabile_organizzazione = etree.SubElement(
-            x_3_1_2_altri_identificativi,
-            etree.QName("StabileOrganizzazione"))
-        # -----                 2.1.2.5.1 - Indirizzo
-        x_3_1_2_5_1_indirizzo = etree.SubElement(
-            x_3_1_2_5_stabile_organizzazione,
-            etree.QName("Indirizzo"))
-        x_3_1_2_5_1_indirizzo.text = self.cessionario_so_Indirizzo or ''
-        # -----                 2.1.2.5.2 - Numero Civico
-        x_3_1_2_5_2_numero_civico = etree.SubElement(
-            x_3_1_2_5_stabile_organizzazione,
-            etree.QName("Numerocivico"))
-        x_3_1_2_5_2_numero_civico.text = self.cessionario_so_NumeroCivico or ''
-        # -----                 2.1.2.5.3 - CAP
-        x_3_1_2_5_3_cap = etree.SubElement(
-            x_3_1_2_5_stabile_organizzazione,
-            etree.QName("CAP"))
-        x_3_1_2_5_3_cap.text = self.cessionario_so_Cap or ''
-        # -----                 2.1.2.5.4 - Comune
-        x_3_1_2_5_4_comune = etree.SubElement(
-            x_3_1_2_5_stabile_organizzazione,
-            etree.QName("Comune"))
-        x_3_1_2_5_4_comune.text = self.cessionario_so_Comune or ''
-        # -----                 2.1.2.5.5 - Provincia
-        x_3_1_2_5_5_provincia = etree.SubElement(
-            x_3_1_2_5_stabile_organizzazione,
-            etree.QName("Provincia"))
-        x_3_1_2_5_5_provincia.text = self.cessionario_so_Provincia or ''
-        # -----                 2.1.2.5.6 - Nazione
-        x_3_1_2_5_6_nazione = etree.SubElement(
-            x_3_1_2_5_stabile_organizzazione,
-            etree.QName("Nazione"))
-        x_3_1_2_5_6_nazione.text = self.cessionario_so_Nazione or ''
-        # -----             2.1.2.6 - Rappresentante Fiscale
-        x_3_1_2_6_rappresentante_fiscale = etree.SubElement(
-            x_3_1_2_altri_identificativi,
-            etree.QName("RappresentanteFiscale"))
-        # -----                 2.1.2.6.1 - Id Fiscale IVA
-        x_3_1_2_6_1_id_fiscale_iva = etree.SubElement(
-            x_3_1_2_6_rappresentante_fiscale,
-            etree.QName("IdFiscaleIVA"))
-        # -----                     2.1.2.6.1.1 - Id Paese
-        x_3_1_2_6_1_1_id_paese = etree.SubElement(
-            x_3_1_2_6_1_id_fiscale_iva,
-            etree.QName("IdPaese"))
-        x_3_1_2_6_1_1_id_paese.text = (
-            self.cessionario_rf_IdFiscaleIVA_IdPaese or '')
-        # -----                     2.1.2.6.1.2 - Id Codice
-        x_3_1_2_6_1_2_id_codice = etree.SubElement(
-            x_3_1_2_6_1_id_fiscale_iva,
-            etree.QName("IdCodice"))
-        x_3_1_2_6_1_2_id_codice.text = \
-            self.cessionario_rf_IdFiscaleIVA_IdCodice or ''
-        # -----                 2.1.2.6.2 - Denominazione
-        x_3_1_2_6_2_denominazione = etree.SubElement(
-            x_3_1_2_6_rappresentante_fiscale,
-            etree.QName("Denominazione"))
-        x_3_1_2_6_2_denominazione.text = \
-            self.cessionario_rf_Denominazione or ''
-        # -----                 2.1.2.6.3 - Nome
-        x_3_1_2_6_3_nome = etree.SubElement(
-            x_3_1_2_6_rappresentante_fiscale,
-            etree.QName("Nome"))
-        x_3_1_2_6_3_nome.text = self.cessionario_rf_Nome or ''
-        # -----                 2.1.2.6.4 - Cognome
-        x_3_1_2_6_4_cognome = etree.SubElement(
-            x_3_1_2_6_rappresentante_fiscale,
-            etree.QName("Cognome"))
-        x_3_1_2_6_4_cognome.text = self.cessionario_rf_Cognome or ''
-
-        for partner_invoice in self.fatture_ricevute_ids:
-            # -----     2.2 - Cessionario Committente DTE
-            x_3_2_cedente_prestatore = etree.SubElement(
-                x_3_dtr,
-                etree.QName("CedentePrestatoreDTR"))
-            # -----         2.2.1 - IdentificativiFiscali
-            x_3_2_1_identificativi_fiscali = etree.SubElement(
-                x_3_2_cedente_prestatore,
-                etree.QName("IdentificativiFiscali"))
-            if partner_invoice.cedente_IdFiscaleIVA_IdPaese and \
-                    partner_invoice.cedente_IdFiscaleIVA_IdCodice:
-                # -----             2.2.1.1 - Id Fiscale IVA
-                x_3_2_1_1_id_fiscale_iva = etree.SubElement(
-                    x_3_2_1_identificativi_fiscali,
-                    etree.QName("IdFiscaleIVA"))
-                # -----                 2.2.1.1.1 - Id Paese
-                x_3_2_1_1_1_id_paese = etree.SubElement(
-                    x_3_2_1_1_id_fiscale_iva,
-                    etree.QName("IdPaese"))
-                x_3_2_1_1_1_id_paese.text = \
-                    partner_invoice.cedente_IdFiscaleIVA_IdPaese or ''
-                # -----                 2.2.1.1.2 - Id Codice
-                x_3_2_1_1_2_id_codice = etree.SubElement(
-                    x_3_2_1_1_id_fiscale_iva,
-                    etree.QName("IdCodice"))
-                x_3_2_1_1_2_id_codice.text = \
-                    partner_invoice.cedente_IdFiscaleIVA_IdCodice or ''
-            # -----             2.2.1.2 - Codice Fiscale
-            x_3_2_1_2_codice_fiscale = etree.SubElement(
-                x_3_2_1_identificativi_fiscali,
-                etree.QName("CodiceFiscale"))
-            x_3_2_1_2_codice_fiscale.text = \
-                partner_invoice.cedente_CodiceFiscale or ''
-            # -----         2.2.2 - AltriDatiIdentificativi
-            x_3_2_2_altri_identificativi = etree.SubElement(
-                x_3_2_cedente_prestatore,
-                etree.QName("AltriDatiIdentificativi"))
-            # -----             2.2.2.1 - Denominazione
-            x_3_2_2_1_altri_identificativi_denominazione = etree.SubElement(
-                x_3_2_2_altri_identificativi,
-                etree.QName("Denominazione"))
-            x_3_2_2_1_altri_identificativi_denominazione.text = \
-                encode_for_export(partner_invoice.cedente_Denominazione or '', 80)
-            # -----             2.2.2.2 - Nome
-            x_3_2_2_2_nome = etree.SubElement(
-                x_3_2_2_altri_identificativi,
-                etree.QName("Nome"))
-            x_3_2_2_2_nome.text = \
-                encode_for_export(partner_invoice.cedente_Nome or '', 60)
-            # -----             2.2.2.3 - Cognome
-            x_3_2_2_3_cognome = etree.SubElement(
-                x_3_2_2_altri_identificativi,
-                etree.QName("Cognome"))
-            x_3_2_2_3_cognome.text = \
-                encode_for_export(partner_invoice.cedente_Cognome or '', 60)
-            # -----             2.2.2.4 - Sede
-            x_3_2_2_4_sede = etree.SubElement(
-                x_3_2_2_altri_identificativi,
-                etree.QName("Sede"))
-            # -----                 2.2.2.4.1 - Indirizzo
-            x_3_2_2_4_1_indirizzo = etree.SubElement(
-                x_3_2_2_4_sede,
-                etree.QName("Indirizzo"))
-            x_3_2_2_4_1_indirizzo.text = \
-                encode_for_export(partner_invoice.cedente_sede_Indirizzo or '', 60)
-            # -----                 2.2.2.4.2 - Numero Civico
-            x_3_2_2_4_2_numero_civico = etree.SubElement(
-                x_3_2_2_4_sede,
-                etree.QName("NumeroCivico"))
-            x_3_2_2_4_2_numero_civico.text = \
-                encode_for_export(partner_invoice.cedente_sede_NumeroCivico or '', 8,
-                                  encoding='ascii')
-            # -----                 2.2.2.4.3 - CAP
-            x_3_2_2_4_3_cap = etree.SubElement(
-                x_3_2_2_4_sede,
-                etree.QName("CAP"))
-            x_3_2_2_4_3_cap.text = \
-                encode_for_export(partner_invoice.cedente_sede_Cap or '', 5,
-                                  encoding='ascii')
-            # -----                 2.2.2.4.4 - Comune
-            x_3_2_2_4_4_comune = etree.SubElement(
-                x_3_2_2_4_sede,
-                etree.QName("Comune"))
-            x_3_2_2_4_4_comune.text = \
-                encode_for_export(partner_invoice.cedente_sede_Comune or '', 60)
-            # -----                 2.2.2.4.5 - Provincia
-            x_3_2_2_4_5_provincia = etree.SubElement(
-                x_3_2_2_4_sede,
-                etree.QName("Provincia"))
-            x_3_2_2_4_5_provincia.text = \
-                partner_invoice.cedente_sede_Provincia or ''
-            # -----                 2.2.2.4.6 - Nazione
-            x_3_2_2_4_6_nazione = etree.SubElement(
-                x_3_2_2_4_sede,
-                etree.QName("Nazione"))
-            x_3_2_2_4_6_nazione.text = \
-                partner_invoice.cedente_sede_Nazione or ''
-            # -----             2.2.2.5 - Stabile Organizzazione
-            x_3_2_2_5_stabile_organizzazione = etree.SubElement(
-                x_3_2_2_altri_identificativi,
-                etree.QName("StabileOrganizzazione"))
-            # -----                 2.2.2.5.1 - Indirizzo
-            x_3_2_2_5_1_indirizzo = etree.SubElement(
-                x_3_2_2_5_stabile_organizzazione,
-                etree.QName("Indirizzo"))
-            x_3_2_2_5_1_indirizzo.text = \
-                encode_for_export(partner_invoice.cedente_so_Indirizzo or '', 60)
-            # -----                 2.2.2.5.2 - Numero Civico
-            x_3_2_2_5_2_numero_civico = etree.SubElement(
-                x_3_2_2_5_stabile_organizzazione,
-                etree.QName("NumeroCivico"))
-            x_3_2_2_5_2_numero_civico.text = \
-                encode_for_export(partner_invoice.cedente_so_NumeroCivico or '', 8,
-                                  encoding='ascii')
-            # -----                 2.2.2.5.3 - CAP
-            x_3_2_2_5_3_cap = etree.SubElement(
-                x_3_2_2_5_stabile_organizzazione,
-                etree.QName("CAP"))
-            x_3_2_2_5_3_cap.text = \
-                encode_for_export(partner_invoice.cedente_so_Cap or '', 5,
-                                  encoding='ascii')
-            # -----                 2.2.2.5.4 - Comune
-            x_3_2_2_5_4_comune = etree.SubElement(
-                x_3_2_2_5_stabile_organizzazione,
-                etree.QName("Comune"))
-            x_3_2_2_5_4_comune.text = \
-                encode_for_export(partner_invoice.cedente_so_Comune or '', 60)
-            # -----                 2.2.2.5.5 - Provincia
-            x_3_2_2_5_5_provincia = etree.SubElement(
-                x_3_2_2_5_stabile_organizzazione,
-                etree.QName("Provincia"))
-            x_3_2_2_5_5_provincia.text = \
-                partner_invoice.cedente_so_Provincia or ''
-            # -----                 2.2.2.5.6 - Nazione
-            x_3_2_2_5_6_nazione = etree.SubElement(
-                x_3_2_2_5_stabile_organizzazione,
-                etree.QName("Nazione"))
-            x_3_2_2_5_6_nazione.text = \
-                partner_invoice.cedente_so_Nazione or ''
-            # -----             2.2.2.6 - Rappresentante Fiscale
-            x_3_2_2_6_rappresentante_fiscale = etree.SubElement(
-                x_3_2_2_altri_identificativi,
-                etree.QName("RappresentanteFiscale"))
-            # -----                 2.2.2.6.1 - Id Fiscale IVA
-            x_3_2_2_6_1_id_fiscale_iva = etree.SubElement(
-                x_3_2_2_6_rappresentante_fiscale,
-                etree.QName("IdFiscaleIVA"))
-            x_3_2_2_6_rappresentante_fiscale.text = \
-                partner_invoice.cedente_rf_IdFiscaleIVA_IdPaese or ''
-            # -----                     2.2.2.6.1.1 - Id Paese
-            x_3_2_2_6_1_1_id_paese = etree.SubElement(
-                x_3_2_2_6_1_id_fiscale_iva,
-                etree.QName("IdPaese"))
-            x_3_2_2_6_1_1_id_paese.text = \
-                partner_invoice.cedente_rf_IdFiscaleIVA_IdPaese or ''
-            # -----                     2.2.2.6.1.2 - Id Codice
-            x_3_2_2_6_1_2_id_codice = etree.SubElement(
-                x_3_2_2_6_1_id_fiscale_iva,
-                etree.QName("IdCodice"))
-            x_3_2_2_6_1_2_id_codice.text = \
-                partner_invoice.cedente_rf_IdFiscaleIVA_IdCodice or ''
-            # -----                 2.2.2.6.2 - Denominazione
-            x_3_2_2_6_2_denominazione = etree.SubElement(
-                x_3_2_2_6_rappresentante_fiscale,
-                etree.QName("Denominazione"))
-            x_3_2_2_6_2_denominazione.text = \
-                encode_for_export(partner_invoice.cedente_rf_Denominazione or '', 80)
-            # -----                 2.2.2.6.3 - Nome
-            x_3_2_2_6_3_nome = etree.SubElement(
-                x_3_2_2_6_rappresentante_fiscale,
-                etree.QName("Nome"))
-            x_3_2_2_6_3_nome.text = \
-                encode_for_export(partner_invoice.cedente_rf_Nome or '', 60)
-            # -----                 2.2.2.6.4 - Cognome
-            x_3_2_2_6_4_cognome = etree.SubElement(
-                x_3_2_2_6_rappresentante_fiscale,
-                etree.QName("Cognome"))
-            x_3_2_2_6_4_cognome.text = \
-                encode_for_export(partner_invoice.cedente_rf_Cognome or '', 60)
-
-            for invoice in partner_invoice.fatture_ricevute_body_ids:
-                # -----         2.2.3 - Dati Fattura Body DTE
-                x_3_2_3_dati_fattura_body_dte = etree.SubElement(
-                    x_3_2_cedente_prestatore,
-                    etree.QName("DatiFatturaBodyDTR"))
-                # -----             2.2.3.1 - Dati Generali
-                x_3_2_3_1_dati_generali = etree.SubElement(
-                    x_3_2_3_dati_fattura_body_dte,
-                    etree.QName("DatiGenerali"))
-                # -----                 2.2.3.1.1 - Tipo Documento
-                x_3_2_3_1_1_tipo_documento = etree.SubElement(
-                    x_3_2_3_1_dati_generali,
-                    etree.QName("TipoDocumento"))
-                x_3_2_3_1_1_tipo_documento.text = \
-                    invoice.dati_fattura_TipoDocumento.code or ''
-                # -----                 2.2.3.1.2 - Data
-                x_3_2_3_1_2_data = etree.SubElement(
-                    x_3_2_3_1_dati_generali,
-                    etree.QName("Data"))
-                x_3_2_3_1_2_data.text = fields.Date.to_string(
-                    invoice.dati_fattura_Data) or ''
-                # -----                 2.2.3.1.3 - Numero
-                x_3_2_3_1_3_numero = etree.SubElement(
-                    x_3_2_3_1_dati_generali,
-                    etree.QName("Numero"))
-                x_3_2_3_1_3_numero.text = invoice.dati_fattura_Numero or ''
-                # -----                 2.2.3.1.4 - Data Registrazione
-                x_3_2_3_1_4_data_registrazione = etree.SubElement(
-                    x_3_2_3_1_dati_generali,
-                    etree.QName("DataRegistrazione"))
-                x_3_2_3_1_4_data_registrazione.text = fields.Date.to_string(
-                    invoice.dati_fattura_DataRegistrazione) or ''
-                for tax in invoice.dati_fattura_iva_ids:
-                    # -----             2.2.3.2 - Dati Riepilogo
-                    x_3_2_3_2_riepilogo = etree.SubElement(
-                        x_3_2_3_dati_fattura_body_dte,
-                        etree.QName("DatiRiepilogo"))
-                    # -----                 2.2.3.2.1 - Imponibile Importo
-                    x_3_2_3_2_1_imponibile_importo = etree.SubElement(
-                        x_3_2_3_2_riepilogo,
-                        etree.QName("ImponibileImporto"))
-                    x_3_2_3_2_1_imponibile_importo.text = \
-                        format_decimal(tax.ImponibileImporto)
-                    # -----                 2.2.3.2.2 - Dati IVA
-                    x_3_2_3_2_2_dati_iva = etree.SubElement(
-                        x_3_2_3_2_riepilogo,
-                        etree.QName("DatiIVA"))
-                    # -----                     2.2.3.2.2.1 - Imposta
-                    x_3_2_3_2_2_1_imposta = etree.SubElement(
-                        x_3_2_3_2_2_dati_iva,
-                        etree.QName("Imposta"))
-                    x_3_2_3_2_2_1_imposta.text = format_decimal(tax.Imposta)
-                    # -----                     2.2.3.2.2.2 - Aliquota
-                    x_3_2_3_2_2_2_aliquota = etree.SubElement(
-                        x_3_2_3_2_2_dati_iva,
-                        etree.QName("Aliquota"))
-                    x_3_2_3_2_2_2_aliquota.text = format_decimal(tax.Aliquota)
-                    # -----                 2.2.3.2.3 - Natura
-                    x_3_2_3_2_3_natura = etree.SubElement(
-                        x_3_2_3_2_riepilogo,
-                        etree.QName("Natura"))
-                    x_3_2_3_2_3_natura.text = \
-                        tax.Natura_id.code if tax.Natura_id else ''
-                    # -----                 2.2.3.2.4 - Detraibile
-                    x_3_2_3_2_4_detraibile = etree.SubElement(
-                        x_3_2_3_2_riepilogo,
-                        etree.QName("Detraibile"))
-                    x_3_2_3_2_4_detraibile.text = format_decimal(
-                        tax.Detraibile)
-                    # -----                 2.2.3.2.5 - Deducibile
-                    x_3_2_3_2_5_deducibile = etree.SubElement(
-                        x_3_2_3_2_riepilogo,
-                        etree.QName("Deducibile"))
-                    x_3_2_3_2_5_deducibile.text = tax.Deducibile or ''
-                    # -----                 2.2.3.2.6 - Esigibilita IVA
-                    x_3_2_3_2_6_esagibilita_iva = etree.SubElement(
-                        x_3_2_3_2_riepilogo,
-                        etree.QName("EsigibilitaIVA"))
-                    x_3_2_3_2_6_esagibilita_iva.text = tax.EsigibilitaIVA or ''
-
-        return x_3_dtr
-
-    def _export_xml_get_ann(self):
-        # ----- 4 - ANN
-        x_4_ann = etree.Element(
-            etree.QName("ANN"))
-        # ----- 4.1 - Id File
-        x_4_1_id_file = etree.SubElement(
-            x_4_ann,
-            etree.QName("IdFile"))
-        x_4_1_id_file.text = self.id_comunicazione
-        # ----- 4.2 - Posizione
-
-        # If this node is empty, cancel all invoices of previous comunication
-        # x_4_2_posizione = etree.SubElement(
-        #     x_4_ann,
-        #     etree.QName("Posizione"))
-        return x_4_ann
-
     @api.multi
     def get_export_xml_filename(self):
         self.ensure_one()
@@ -2059,36 +1387,55 @@ class ComunicazioneDatiIva(models.Model):
     def get_export_xml(self):
         self.ensure_one()
         self._validate()
-        # ----- 0 - Dati Fattura
-        x_0_dati_fattura = self._export_xml_get_dati_fattura()
-        # ----- 1 - Dati Fattura header
-        if self.dati_trasmissione in ('DTE', 'DTR'):
-            x_1_dati_fattura_header = (
-                self._export_xml_get_dati_fattura_header())
-            x_0_dati_fattura.append(x_1_dati_fattura_header)
-        # ----- 2 - DTE
-        if self.dati_trasmissione == 'DTE':
-            x_2_dte = self._export_xml_get_dte()
-            x_0_dati_fattura.append(x_2_dte)
-        # ----- 3 - DTR
-        elif self.dati_trasmissione == 'DTR':
-            x_3_dtr = self._export_xml_get_dtr()
-            x_0_dati_fattura.append(x_3_dtr)
-        # ----- 4 - ANN
-        elif self.dati_trasmissione == 'ANN':
-            x_4_ann = self._export_xml_get_ann()
-            x_0_dati_fattura.append(x_4_ann)
-        # ----- Remove empty nodes
-        clear_xml(x_0_dati_fattura)
-        # ----- Create XML
-        xml_string = etree.tostring(
-            x_0_dati_fattura, encoding='latin1', method='xml', pretty_print=True)
-        return xml_string
+        output = BytesIO()
+        with etree.xmlfile(output, encoding='latin1') as xml_file:
+            xml_file.write_declaration()
+            # ----- 0 - Dati Fattura
+            with xml_file.element(
+                    etree.QName(NS_2, "DatiFattura"),
+                    attrib={'versione': VERSION}, nsmap=NS_MAP):
+                for section in XML_SECTIONS[self.dati_trasmissione]:
+                    write_xml_section(xml_file, section, self)
+                xml_file.write('\n')
+        # Text can't be written outside of the root element
+        output.write(b'\n')
+        return output.getvalue()
+
+
+class ComunicazioneDatiIvaSection(models.AbstractModel):
+    """
+    Sections of the communication: any change invalidates the errors
+    computed for the communication
+    """
+    _name = 'comunicazione.dati.iva.section'
+    _description = 'Invoices data communication - Section'
+    # Path to the communication
+    _comunicazione_field = 'comunicazione_id'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records.mapped(self._comunicazione_field)._update_errors_cache_key()
+        return records
+
+    @api.multi
+    def write(self, vals):
+        res = super().write(vals)
+        self.mapped(self._comunicazione_field)._update_errors_cache_key()
+        return res
+
+    @api.multi
+    def unlink(self):
+        comunicazioni = self.mapped(self._comunicazione_field)
+        res = super().unlink()
+        comunicazioni._update_errors_cache_key()
+        return res
 
 
 class ComunicazioneDatiIvaFattureEmesse(models.Model):
     _name = 'comunicazione.dati.iva.fatture.emesse'
     _description = 'Invoices data communication - Customer invoices'
+    _inherit = 'comunicazione.dati.iva.section'
 
     comunicazione_id = fields.Many2one(
         'comunicazione.dati.iva', string='Communication', readonly=True,
@@ -2193,6 +1540,8 @@ class ComunicazioneDatiIvaFattureEmesse(models.Model):
 class ComunicazioneDatiIvaFattureEmesseBody(models.Model):
     _name = 'comunicazione.dati.iva.fatture.emesse.body'
     _description = 'Invoices data communication - Customer invoices body'
+    _inherit = 'comunicazione.dati.iva.section'
+    _comunicazione_field = 'fattura_emessa_id.comunicazione_id'
 
     @api.depends('dati_fattura_iva_ids.ImponibileImporto',
                  'dati_fattura_iva_ids.Imposta')
@@ -2241,6 +1590,9 @@ class ComunicazioneDatiIvaFattureEmesseBody(models.Model):
 class ComunicazioneDatiIvaFattureEmesseIva(models.Model):
     _name = 'comunicazione.dati.iva.fatture.emesse.iva'
     _description = 'Invoices data communication - Customer invoices VAT'
+    _inherit = 'comunicazione.dati.iva.section'
+    _comunicazione_field = \
+        'fattura_emessa_body_id.fattura_emessa_id.comunicazione_id'
 
     fattura_emessa_body_id = fields.Many2one(
         'comunicazione.dati.iva.fatture.emesse.body',
@@ -2270,6 +1622,7 @@ class ComunicazioneDatiIvaFattureEmesseIva(models.Model):
 class ComunicazioneDatiIvaFattureRicevute(models.Model):
     _name = 'comunicazione.dati.iva.fatture.ricevute'
     _description = 'Invoices data communication - Supplier bills'
+    _inherit = 'comunicazione.dati.iva.section'
 
     comunicazione_id = fields.Many2one(
         'comunicazione.dati.iva', string='Communication', readonly=True,
@@ -2375,6 +1728,8 @@ class ComunicazioneDatiIvaFattureRicevute(models.Model):
 class ComunicazioneDatiIvaFattureRicevuteBody(models.Model):
     _name = 'comunicazione.dati.iva.fatture.ricevute.body'
     _description = 'Invoices data communication - Supplier bills body'
+    _inherit = 'comunicazione.dati.iva.section'
+    _comunicazione_field = 'fattura_ricevuta_id.comunicazione_id'
 
     @api.depends('dati_fattura_iva_ids.ImponibileImporto',
                  'dati_fattura_iva_ids.Imposta')
@@ -2448,6 +1803,9 @@ class ComunicazioneDatiIvaFattureRicevuteBody(models.Model):
 class ComunicazioneDatiIvaFattureRicevuteIva(models.Model):
     _name = 'comunicazione.dati.iva.fatture.ricevute.iva'
     _description = 'Invoices data communication - Supplier bills VAT'
+    _inherit = 'comunicazione.dati.iva.section'
+    _comunicazione_field = \
+        'fattura_ricevuta_body_id.fattura_ricevuta_id.comunicazione_id'
 
     fattura_ricevuta_body_id = fields.Many2one(
         'comunicazione.dati.iva.fatture.ricevute.body',
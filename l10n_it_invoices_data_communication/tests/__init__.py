@@ -0,0 +1,7 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from . import test_batch_communication
+from . import test_compute_communication
+from . import test_export_xml
+from . import test_errors
+from . import test_split_communication
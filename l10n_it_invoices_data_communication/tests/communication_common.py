@@ -0,0 +1,142 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from datetime import date
+
+from odoo.addons.account.tests.account_test_classes import AccountingTestCase
+
+
+class CommunicationCommon(AccountingTestCase):
+    """
+    Posted invoices of foreign partners, to be included in communications
+    of January 2019
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.company = self.env.user.company_id
+        self.invoice_model = self.env['account.invoice']
+        self.communication_model = self.env['comunicazione.dati.iva']
+        account_model = self.env['account.account']
+        self.receivable_account = account_model.search([
+            ('user_type_id', '=', self.env.ref(
+                'account.data_account_type_receivable').id)
+        ], limit=1)
+        self.payable_account = account_model.search([
+            ('user_type_id', '=', self.env.ref(
+                'account.data_account_type_payable').id)
+        ], limit=1)
+        self.revenue_account = account_model.search([
+            ('user_type_id', '=', self.env.ref(
+                'account.data_account_type_revenue').id)
+        ], limit=1)
+        self.expense_account = account_model.search([
+            ('user_type_id', '=', self.env.ref(
+                'account.data_account_type_expenses').id)
+        ], limit=1)
+        self.tax_account = account_model.search([
+            ('user_type_id', '=', self.env.ref(
+                'account.data_account_type_current_liabilities').id)
+        ], limit=1)
+        self.sale_journal = self.env['account.journal'].search([
+            ('type', '=', 'sale'),
+            ('company_id', '=', self.company.id),
+        ], limit=1)
+        self.purchase_journal = self.env['account.journal'].search([
+            ('type', '=', 'purchase'),
+            ('company_id', '=', self.company.id),
+        ], limit=1)
+        self._create_taxes()
+        # Supplier references must be unique for each partner
+        self.references_count = 0
+
+    def _create_taxes(self):
+        tax_model = self.env['account.tax']
+        self.tax_22_sale = tax_model.create({
+            'name': "Tax 22% sale",
+            'type_tax_use': 'sale',
+            'amount': 22,
+            'account_id': self.tax_account.id,
+            'payability': 'I',
+        })
+        self.tax_22_purchase = tax_model.create({
+            'name': "Tax 22% purchase",
+            'type_tax_use': 'purchase',
+            'amount': 22,
+            'account_id': self.tax_account.id,
+            'payability': 'I',
+        })
+        # Half deductible: only the deductible child has an account
+        self.tax_22_deductible = tax_model.create({
+            'name': "Tax 22% deductible part",
+            'type_tax_use': 'none',
+            'amount': 11,
+            'account_id': self.tax_account.id,
+        })
+        self.tax_22_undeductible = tax_model.create({
+            'name': "Tax 22% undeductible part",
+            'type_tax_use': 'none',
+            'amount': 11,
+        })
+        self.tax_22_half = tax_model.create({
+            'name': "Tax 22% half deductible",
+            'type_tax_use': 'purchase',
+            'amount_type': 'group',
+            'amount': 22,
+            'payability': 'I',
+            'children_tax_ids': [(6, 0, [
+                self.tax_22_deductible.id, self.tax_22_undeductible.id])],
+        })
+
+    def _create_partner(self, name, country_code='FR'):
+        return self.env['res.partner'].create({
+            'name': name,
+            'street': 'Rue de Paris',
+            'city': 'Paris',
+            'country_id': self.env.ref(
+                'base.%s' % country_code.lower()).id,
+        })
+
+    def _create_invoice(self, partner, invoice_type='out_invoice',
+                        taxes=None, price_unit=100.0,
+                        invoice_date=date(2019, 1, 15)):
+        """ Creates and validates an invoice having a single line """
+        if invoice_type in ('out_invoice', 'out_refund'):
+            journal = self.sale_journal
+            account = self.receivable_account
+            line_account = self.revenue_account
+            taxes = taxes or self.tax_22_sale
+        else:
+            journal = self.purchase_journal
+            account = self.payable_account
+            line_account = self.expense_account
+            taxes = taxes or self.tax_22_purchase
+        self.references_count += 1
+        invoice = self.invoice_model.create({
+            'partner_id': partner.id,
+            'type': invoice_type,
+            'journal_id': journal.id,
+            'account_id': account.id,
+            'date_invoice': invoice_date,
+            'reference': 'REF/%s' % self.references_count,
+            'invoice_line_ids': [(0, 0, {
+                'name': 'Service',
+                'quantity': 1.0,
+                'price_unit': price_unit,
+                'account_id': line_account.id,
+                'invoice_line_tax_ids': [(6, 0, taxes.ids)],
+            })],
+        })
+        invoice.compute_taxes()
+        invoice.action_invoice_open()
+        return invoice
+
+    def _create_communication(self, dati_trasmissione):
+        """ Creates a communication of January 2019 and computes it """
+        communication = self.communication_model.create({
+            'company_id': self.company.id,
+            'dati_trasmissione': dati_trasmissione,
+            'date_start': date(2019, 1, 1),
+            'date_end': date(2019, 1, 31),
+        })
+        communication.compute_values()
+        return communication
@@ -0,0 +1,85 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import base64
+import zipfile
+from datetime import date
+from io import BytesIO
+
+from odoo.tests.common import TransactionCase
+
+
+class TestBatchCommunication(TransactionCase):
+
+    def setUp(self):
+        super(TestBatchCommunication, self).setUp()
+        self.company = self.env.user.company_id
+        self.wizard = self.env['wizard.batch.invoices.communication'].create({
+            'company_ids': [(6, 0, self.company.ids)],
+            'date_start': date(2019, 2, 15),
+            'date_end': date(2019, 8, 10),
+        })
+
+    def test_get_periods_quarter(self):
+        self.assertEqual(self.wizard._get_periods(), [
+            (date(2019, 2, 15), date(2019, 3, 31)),
+            (date(2019, 4, 1), date(2019, 6, 30)),
+            (date(2019, 7, 1), date(2019, 8, 10)),
+        ])
+
+    def test_get_periods_month(self):
+        self.wizard.write({
+            'periodicity': 'month',
+            'date_start': date(2019, 12, 31),
+            'date_end': date(2020, 2, 29),
+        })
+        self.assertEqual(self.wizard._get_periods(), [
+            (date(2019, 12, 31), date(2019, 12, 31)),
+            (date(2020, 1, 1), date(2020, 1, 31)),
+            (date(2020, 2, 1), date(2020, 2, 29)),
+        ])
+
+    def test_get_periods_single_day(self):
+        self.wizard.date_end = self.wizard.date_start
+        self.assertEqual(self.wizard._get_periods(), [
+            (date(2019, 2, 15), date(2019, 2, 15)),
+        ])
+
+    def test_write_batch_export(self):
+        vals = {
+            'company_id': self.company.id,
+            'date_start': date(2019, 1, 1),
+            'date_end': date(2019, 3, 31),
+        }
+        vals_list = [
+            dict(vals, dati_trasmissione='DTE'),
+            dict(vals, dati_trasmissione='DTR'),
+            dict(vals, dati_trasmissione='DTE', date_start=date(2019, 4, 1)),
+        ]
+        results = [
+            [('split_1.xml', b'<DatiFattura/>', 'All data are correct.'),
+             ('split_2.xml', False, 'Errors:\n - Missing VAT')],
+            [],
+            [(False, False, 'Unexpected error')],
+        ]
+        self.wizard._write_batch_export(vals_list, results)
+
+        zip_file = zipfile.ZipFile(
+            BytesIO(base64.b64decode(self.wizard.file_export)))
+        self.assertEqual(zip_file.namelist(), ['split_1.xml'])
+        self.assertEqual(zip_file.read('split_1.xml'), b'<DatiFattura/>')
+        self.assertEqual(
+            self.wizard.filename,
+            'comunicazione_dati_fatture_2019-02-15_2019-08-10.zip')
+        summary = self.wizard.summary
+        header = '%s DTE 2019-01-01 - 2019-03-31' % self.company.name
+        self.assertIn(
+            '%s (split_1.xml)\nAll data are correct.' % header, summary)
+        self.assertIn(
+            '%s (split_2.xml not exported)\nErrors:\n - Missing VAT' % header,
+            summary)
+        self.assertIn(
+            '%s DTR 2019-01-01 - 2019-03-31\nNo invoices found'
+            % self.company.name, summary)
+        self.assertIn(
+            '%s DTE 2019-04-01 - 2019-03-31\nUnexpected error'
+            % self.company.name, summary)
@@ -0,0 +1,127 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from .communication_common import CommunicationCommon
+
+IVA_FIELDS = [
+    'ImponibileImporto', 'Imposta', 'Aliquota', 'Natura_id',
+    'EsigibilitaIVA', 'Detraibile',
+]
+
+
+class TestComputeCommunication(CommunicationCommon):
+    """
+    Sections, bodies and VAT summaries created in bulk are the same
+    that are computed for each invoice alone
+    """
+
+    def _check_iva(self, body):
+        invoice = body.invoice_id
+        expected = [
+            {fname: vals[fname] for fname in IVA_FIELDS}
+            for dummy, dummy, vals in invoice._get_tax_comunicazione_dati_iva()
+        ]
+        computed = body.dati_fattura_iva_ids.read(IVA_FIELDS, load='')
+        for vals in computed:
+            del vals['id']
+        self.assertEqual(computed, expected)
+
+    def test_compute_dte(self):
+        customer_fr = self._create_partner('Customer FR')
+        customer_de = self._create_partner('Customer DE', 'DE')
+        invoices = (
+            self._create_invoice(customer_fr)
+            | self._create_invoice(customer_fr, price_unit=50.0)
+            | self._create_invoice(customer_de, price_unit=200.0)
+        )
+
+        communication = self._create_communication('DTE')
+        sections = communication.fatture_emesse_ids
+        self.assertEqual(sections.mapped('partner_id'),
+                         customer_fr | customer_de)
+        bodies = sections.mapped('fatture_emesse_body_ids')
+        self.assertEqual(bodies.mapped('invoice_id'), invoices)
+        for section in sections:
+            partner_vals = communication._prepare_cessionario_partner_id(
+                section.partner_id)
+            for fname, value in partner_vals.items():
+                self.assertEqual(section[fname], value)
+            for body in section.fatture_emesse_body_ids:
+                invoice = body.invoice_id
+                self.assertEqual(invoice.partner_id, section.partner_id)
+                self.assertEqual(body.dati_fattura_TipoDocumento,
+                                 invoice.fiscal_document_type_id)
+                self.assertEqual(body.dati_fattura_Data,
+                                 invoice.date_invoice)
+                self.assertEqual(body.dati_fattura_Numero, invoice.number)
+                self._check_iva(body)
+
+        invoice = invoices[2]
+        body = bodies.filtered(lambda b: b.invoice_id == invoice)
+        self.assertEqual(
+            body.dati_fattura_iva_ids.read(IVA_FIELDS, load='')[0],
+            {
+                'id': body.dati_fattura_iva_ids.id,
+                'ImponibileImporto': 200.0,
+                'Imposta': 44.0,
+                'Aliquota': 22.0,
+                'Natura_id': False,
+                'EsigibilitaIVA': 'I',
+                'Detraibile': 0.0,
+            })
+
+    def test_compute_dtr(self):
+        supplier_fr = self._create_partner('Supplier FR')
+        supplier_de = self._create_partner('Supplier DE', 'DE')
+        bill = self._create_invoice(supplier_fr, 'in_invoice')
+        bill_half = self._create_invoice(
+            supplier_de, 'in_invoice', taxes=self.tax_22_half)
+        bill_both = self._create_invoice(
+            supplier_de, 'in_invoice',
+            taxes=self.tax_22_purchase | self.tax_22_half)
+
+        communication = self._create_communication('DTR')
+        sections = communication.fatture_ricevute_ids
+        self.assertEqual(sections.mapped('partner_id'),
+                         supplier_fr | supplier_de)
+        bodies = sections.mapped('fatture_ricevute_body_ids')
+        self.assertEqual(bodies.mapped('invoice_id'),
+                         bill | bill_half | bill_both)
+        for section in sections:
+            partner_vals = communication._prepare_cedente_partner_id(
+                section.partner_id)
+            for fname, value in partner_vals.items():
+                self.assertEqual(section[fname], value)
+            for body in section.fatture_ricevute_body_ids:
+                invoice = body.invoice_id
+                self.assertEqual(invoice.partner_id, section.partner_id)
+                self.assertEqual(body.dati_fattura_TipoDocumento,
+                                 invoice.fiscal_document_type_id)
+                self.assertEqual(body.dati_fattura_Data,
+                                 invoice.date_invoice)
+                self.assertEqual(body.dati_fattura_DataRegistrazione,
+                                 invoice.date)
+                self.assertEqual(body.dati_fattura_Numero,
+                                 invoice.reference)
+                self._check_iva(body)
+
+        # Children taxes are summarized in their parent:
+        # only the deductible part has an account
+        half_vals = {
+            'ImponibileImporto': 100.0,
+            'Imposta': 22.0,
+            'Aliquota': 22.0,
+            'Natura_id': False,
+            'EsigibilitaIVA': 'I',
+            'Detraibile': 50.0,
+        }
+        body = bodies.filtered(lambda b: b.invoice_id == bill_half)
+        self.assertEqual(
+            body.dati_fattura_iva_ids.read(IVA_FIELDS, load=''),
+            [dict(half_vals, id=body.dati_fattura_iva_ids.id)])
+        body = bodies.filtered(lambda b: b.invoice_id == bill_both)
+        self.assertEqual(len(body.dati_fattura_iva_ids), 2)
+        self.assertIn(
+            half_vals,
+            [{fname: vals[fname] for fname in IVA_FIELDS}
+             for vals in body.dati_fattura_iva_ids.read(
+                 IVA_FIELDS, load='')])
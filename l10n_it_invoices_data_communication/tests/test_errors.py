@@ -0,0 +1,217 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from datetime import date
+
+from odoo.tests.common import TransactionCase
+
+from .test_export_xml import TRANSMISSION_FIELDS, to_commands
+
+BAD_COMPANY_DATA = {
+    'IdFiscaleIVA_IdPaese': 'IT',
+    'IdFiscaleIVA_IdCodice': '01234567890',
+    'Denominazione': ' Test Company',
+    'sede_Indirizzo': 'Via Roma',
+    'sede_Comune': 'Roma ',
+    'sede_Nazione': 'IT',
+    'rf_Nome': 'Mario ',
+}
+BAD_PARTNERS_DATA = [
+    {
+        'name': "Bad Partner",
+        'IdFiscaleIVA_IdCodice': '12345678901',
+        'Denominazione': 'Bad Partner ',
+        'sede_Indirizzo': 'Via Verdi',
+        'sede_NumeroCivico': ' 1',
+        'sede_Cap': '1234A',
+        'sede_Comune': 'Roma',
+        'so_Comune': 'Milano',
+        'rf_Denominazione': 'Representative',
+        'bodies': [
+            {'Numero': '2019/0001', 'DataRegistrazione': date(2019, 1, 2),
+             'iva': False},
+            {'Numero': '2019/0003', 'DataRegistrazione': date(2019, 1, 4),
+             'iva': True},
+        ],
+    },
+    {
+        'name': "Good Partner",
+        'IdFiscaleIVA_IdPaese': 'IT',
+        'IdFiscaleIVA_IdCodice': '09876543210',
+        'Denominazione': 'Good Partner',
+        'sede_Indirizzo': 'Via Verdi',
+        'sede_Cap': '00100',
+        'sede_Comune': 'Roma',
+        'sede_Nazione': 'IT',
+        'bodies': [
+            {'Numero': '2019/0002', 'DataRegistrazione': date(2019, 1, 3),
+             'iva': True},
+        ],
+    },
+]
+# Messages of the checks done before errors were computed in a single pass
+EXPECTED_ERRORS = {
+    'DTE': [
+        "Remove empty characters around seller's denomination",
+        "Remove empty characters around seller's city",
+        "Remove empty characters around name of fiscal representative",
+        "Remove empty characters around denomination of assignee "
+        "Bad Partner",
+        "Remove empty characters around street number of assignee "
+        "Bad Partner",
+        "Define a country ID for assignee Bad Partner",
+        "Address, city, country of Bad Partner are mandatory",
+        "Address, city, ZIP and country of permanent establishment "
+        "Bad Partner are mandatory, when at least one value is defined",
+        "Country ID and fiscal identifier of fiscal representative "
+        "Bad Partner are mandatory, when at least one value is defined",
+        "ZIP 1234A of assignee Bad Partner is not 5 numeric characters",
+        "No VAT data defined for invoice False of partner Bad Partner",
+    ],
+    'DTR': [
+        "Remove empty characters around assignee's denomination",
+        "Remove empty characters around assignee's city",
+        "Remove empty characters around name of fiscal representative",
+        "Remove empty characters around denomination of seller "
+        "Bad Partner",
+        "Remove empty characters around street number of seller "
+        "Bad Partner",
+        "Define a country ID for seller Bad Partner",
+        "Address, city, country of Bad Partner are mandatory",
+        "Address, city, ZIP and country of permanent establishment "
+        "Bad Partner are mandatory, when at least one value is defined",
+        "Country ID and fiscal identifier of fiscal representative "
+        "Bad Partner are mandatory, when at least one value is defined",
+        "ZIP 1234A of seller Bad Partner is not 5 characters",
+        "No VAT data defined for invoice False of partner Bad Partner",
+    ],
+}
+
+
+def get_bad_communication_vals(dati_trasmissione, get_partner_id):
+    """
+    Values of a communication having errors
+    :param get_partner_id: function of a name giving the value of the
+    partner having this name
+    """
+    company_prefix, partner_prefix, sections_field, bodies_field = \
+        TRANSMISSION_FIELDS[dati_trasmissione]
+    vals = {
+        company_prefix + fname: value
+        for fname, value in BAD_COMPANY_DATA.items()}
+    vals['dati_trasmissione'] = dati_trasmissione
+    sections_vals = []
+    for partner_data in BAD_PARTNERS_DATA:
+        section_vals = {
+            partner_prefix + fname: value
+            for fname, value in partner_data.items()
+            if fname not in ('name', 'bodies')}
+        section_vals['partner_id'] = get_partner_id(partner_data['name'])
+        bodies_vals = []
+        for body_data in partner_data['bodies']:
+            body_vals = {
+                'dati_fattura_Data': date(2019, 1, 1),
+                'dati_fattura_Numero': body_data['Numero'],
+                'dati_fattura_iva_ids': [{
+                    'ImponibileImporto': 100.0,
+                    'Imposta': 22.0,
+                    'Aliquota': 22.0,
+                }] if body_data['iva'] else [],
+            }
+            if dati_trasmissione == 'DTR':
+                body_vals['dati_fattura_DataRegistrazione'] = \
+                    body_data['DataRegistrazione']
+            bodies_vals.append(body_vals)
+        section_vals[bodies_field] = bodies_vals
+        sections_vals.append(section_vals)
+    vals[sections_field] = sections_vals
+    return vals
+
+
+class TestErrors(TransactionCase):
+
+    def setUp(self):
+        super().setUp()
+        self.partners = {
+            partner_data['name']: self.env['res.partner'].create({
+                'name': partner_data['name'],
+            })
+            for partner_data in BAD_PARTNERS_DATA
+        }
+        self.document_type = self.env['fiscal.document.type'].search(
+            [('code', '=', 'TD01')], limit=1)
+
+    def _create_communication(self, dati_trasmissione):
+        vals = get_bad_communication_vals(
+            dati_trasmissione, lambda name: self.partners[name].id)
+        bodies_field = TRANSMISSION_FIELDS[dati_trasmissione][3]
+        for section_vals in vals[TRANSMISSION_FIELDS[dati_trasmissione][2]]:
+            for body_vals in section_vals[bodies_field]:
+                body_vals['dati_fattura_TipoDocumento'] = \
+                    self.document_type.id
+        vals.update({
+            'company_id': self.env.user.company_id.id,
+            'date_start': date(2019, 1, 1),
+            'date_end': date(2019, 1, 31),
+        })
+        return self.env['comunicazione.dati.iva'].create(to_commands(vals))
+
+    def test_errors_dte(self):
+        communication = self._create_communication('DTE')
+        self.assertEqual(
+            communication._check_errors_dte(), EXPECTED_ERRORS['DTE'])
+        errors = communication.get_errors()
+        self.assertEqual(
+            [message for dummy, dummy, message in errors],
+            EXPECTED_ERRORS['DTE'])
+        section = communication.fatture_emesse_ids[0]
+        self.assertIn(
+            (section._name, section.id,
+             "Define a country ID for assignee Bad Partner"),
+            errors)
+
+    def test_errors_dtr(self):
+        communication = self._create_communication('DTR')
+        self.assertEqual(
+            communication._check_errors_dtr(), EXPECTED_ERRORS['DTR'])
+        communication.check_errors()
+        self.assertEqual(
+            communication.errors,
+            '\n - '.join(['Errors:'] + EXPECTED_ERRORS['DTR']))
+
+    def test_errors_cache_key(self):
+        communication = self._create_communication('DTE')
+        section = communication.fatture_emesse_ids[0]
+        body = section.fatture_emesse_body_ids[1]
+        iva = body.dati_fattura_iva_ids
+        keys = {communication.errors_cache_key}
+        for record, vals in (
+                (communication, {'cedente_sede_Comune': 'Roma'}),
+                (section, {'cessionario_IdFiscaleIVA_IdPaese': 'IT'}),
+                (body, {'dati_fattura_Numero': '2019/0004'}),
+                (iva, {'Imposta': 10.0})):
+            record.write(vals)
+            self.assertNotIn(communication.errors_cache_key, keys)
+            keys.add(communication.errors_cache_key)
+        self.assertNotIn(
+            "Remove empty characters around seller's city",
+            communication._check_errors_dte())
+        self.assertNotIn(
+            "Define a country ID for assignee Bad Partner",
+            communication._check_errors_dte())
+
+        iva.unlink()
+        self.assertNotIn(communication.errors_cache_key, keys)
+
+    def test_errors_partner_renamed(self):
+        communication = self._create_communication('DTE')
+        communication.get_errors()
+        cache_key = communication.errors_cache_key
+
+        self.partners["Bad Partner"].name = "Renamed Partner"
+        self.assertEqual(communication.errors_cache_key, cache_key)
+        messages = [
+            message for dummy, dummy, message in communication.get_errors()]
+        self.assertIn(
+            "Define a country ID for assignee Renamed Partner", messages)
+        self.assertFalse(
+            [message for message in messages if "Bad Partner" in message])
@@ -0,0 +1,221 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import os
+from datetime import date
+
+from odoo.tests.common import TransactionCase
+
+# Own company: Stabile Organizzazione uses tag Numerocivico
+COMPANY_DATA = {
+    'IdFiscaleIVA_IdPaese': 'IT',
+    'IdFiscaleIVA_IdCodice': '01234567890',
+    'CodiceFiscale': '01234567890',
+    'Denominazione': 'Test  Company',
+    'sede_Indirizzo': 'Via Roma',
+    'sede_NumeroCivico': '1',
+    'sede_Cap': '00100',
+    'sede_Comune': 'Roma',
+    'sede_Provincia': 'RM',
+    'sede_Nazione': 'IT',
+    'so_Indirizzo': 'Via Milano',
+    'so_NumeroCivico': '2',
+    'so_Cap': '20100',
+    'so_Comune': 'Milano',
+    'so_Provincia': 'MI',
+    'so_Nazione': 'IT',
+}
+PARTNERS_DATA = [
+    {
+        # Rappresentante Fiscale also holds its country as text
+        'IdFiscaleIVA_IdPaese': 'FR',
+        'IdFiscaleIVA_IdCodice': '12345678901',
+        'Denominazione': 'Partner   One  Très Long',
+        'sede_Indirizzo': 'Rue de Paris',
+        'sede_NumeroCivico': '10bis',
+        'sede_Cap': '75001',
+        'sede_Comune': 'Paris',
+        'sede_Nazione': 'FR',
+        'rf_IdFiscaleIVA_IdPaese': 'IT',
+        'rf_IdFiscaleIVA_IdCodice': '09876543210',
+        'rf_Denominazione': 'Fiscal Representative',
+        'bodies': [
+            {
+                'TipoDocumento': 'TD01',
+                'Data': date(2019, 1, 15),
+                'DataRegistrazione': date(2019, 1, 20),
+                'Numero': '2019/0001',
+                'iva': [
+                    {
+                        'ImponibileImporto': 100.0,
+                        'Imposta': 22.0,
+                        'Aliquota': 22.0,
+                        'Detraibile': 100.0,
+                        'EsigibilitaIVA': 'I',
+                    },
+                    {
+                        'ImponibileImporto': 50.5,
+                        'Natura': 'N2',
+                        'Deducibile': 'SI',
+                        'EsigibilitaIVA': 'D',
+                    },
+                ],
+            },
+        ],
+    },
+    {
+        # Id Fiscale IVA is skipped without code
+        'IdFiscaleIVA_IdPaese': 'IT',
+        'CodiceFiscale': 'VRDGPP80A01H501X',
+        'Nome': 'Giuseppe',
+        'Cognome': 'Verdi',
+        'sede_Indirizzo': 'Via Verdi',
+        'sede_Cap': '00100',
+        'sede_Comune': 'Roma',
+        'sede_Provincia': 'RM',
+        'sede_Nazione': 'IT',
+        'so_Indirizzo': 'Via Napoli',
+        'so_NumeroCivico': '3',
+        'so_Cap': '80100',
+        'so_Comune': 'Napoli',
+        'so_Nazione': 'IT',
+        'bodies': [
+            {
+                'TipoDocumento': 'TD04',
+                'Data': date(2019, 2, 1),
+                'DataRegistrazione': date(2019, 2, 3),
+                'Numero': 'NC/0001',
+                'iva': [
+                    {
+                        'ImponibileImporto': 10.0,
+                        'Imposta': 1.0,
+                        'Aliquota': 10.0,
+                        'EsigibilitaIVA': 'S',
+                    },
+                ],
+            },
+            {
+                'TipoDocumento': 'TD01',
+                'Data': date(2019, 2, 5),
+                'DataRegistrazione': date(2019, 2, 6),
+                'Numero': '2019/0002',
+                'iva': [
+                    {
+                        'ImponibileImporto': 1234.56,
+                        'Imposta': 271.6,
+                        'Aliquota': 22.0,
+                        'EsigibilitaIVA': 'I',
+                    },
+                ],
+            },
+        ],
+    },
+]
+# Kind of transmission: (own company prefix, partners prefix,
+# sections field, bodies field)
+TRANSMISSION_FIELDS = {
+    'DTE': ('cedente_', 'cessionario_',
+            'fatture_emesse_ids', 'fatture_emesse_body_ids'),
+    'DTR': ('cessionario_', 'cedente_',
+            'fatture_ricevute_ids', 'fatture_ricevute_body_ids'),
+}
+
+
+def get_communication_vals(dati_trasmissione, get_code_id):
+    """
+    Values of a communication exporting the data above
+    :param get_code_id: function of a model and a code giving the value of
+    the record having this code
+    """
+    vals = {
+        'identificativo': 7,
+        'dati_trasmissione': dati_trasmissione,
+        'declarant_fiscalcode': 'RSSMRA80A01H501U',
+        'codice_carica_id': get_code_id('codice.carica', '1'),
+    }
+    if dati_trasmissione == 'ANN':
+        vals['id_comunicazione'] = '12345678'
+        return vals
+    company_prefix, partner_prefix, sections_field, bodies_field = \
+        TRANSMISSION_FIELDS[dati_trasmissione]
+    vals.update({
+        company_prefix + fname: value
+        for fname, value in COMPANY_DATA.items()})
+    sections_vals = []
+    for partner_data in PARTNERS_DATA:
+        section_vals = {
+            partner_prefix + fname: value
+            for fname, value in partner_data.items() if fname != 'bodies'}
+        bodies_vals = []
+        for body_data in partner_data['bodies']:
+            body_vals = {
+                'dati_fattura_TipoDocumento': get_code_id(
+                    'fiscal.document.type', body_data['TipoDocumento']),
+                'dati_fattura_Data': body_data['Data'],
+                'dati_fattura_Numero': body_data['Numero'],
+                'dati_fattura_iva_ids': [{
+                    'ImponibileImporto': iva_data['ImponibileImporto'],
+                    'Imposta': iva_data.get('Imposta', 0.0),
+                    'Aliquota': iva_data.get('Aliquota', 0.0),
+                    'Natura_id': get_code_id(
+                        'account.tax.kind', iva_data.get('Natura')),
+                    'Detraibile': iva_data.get('Detraibile', 0.0),
+                    'Deducibile': iva_data.get('Deducibile', False),
+                    'EsigibilitaIVA': iva_data['EsigibilitaIVA'],
+                } for iva_data in body_data['iva']],
+            }
+            if dati_trasmissione == 'DTR':
+                body_vals['dati_fattura_DataRegistrazione'] = \
+                    body_data['DataRegistrazione']
+            bodies_vals.append(body_vals)
+        section_vals[bodies_field] = bodies_vals
+        sections_vals.append(section_vals)
+    vals[sections_field] = sections_vals
+    return vals
+
+
+def get_golden_file_path(dati_trasmissione):
+    return os.path.join(
+        os.path.dirname(__file__), 'data',
+        'export_%s.xml' % dati_trasmissione.lower())
+
+
+def to_commands(vals):
+    """ Converts lists of values of one2many fields to creation commands """
+    return {
+        fname: [(0, 0, to_commands(line_vals)) for line_vals in value]
+        if isinstance(value, list) else value
+        for fname, value in vals.items()
+    }
+
+
+class TestExportXml(TransactionCase):
+    """
+    Exported files are compared with the files exported before the XML
+    was streamed from a declarative mapping
+    """
+
+    def get_code_id(self, model, code):
+        if not code:
+            return False
+        return self.env[model].search([('code', '=', code)], limit=1).id
+
+    def _check_export_xml(self, dati_trasmissione):
+        vals = get_communication_vals(dati_trasmissione, self.get_code_id)
+        vals.update({
+            'company_id': self.env.user.company_id.id,
+            'date_start': date(2019, 1, 1),
+            'date_end': date(2019, 3, 31),
+        })
+        communication = self.env['comunicazione.dati.iva'].create(
+            to_commands(vals))
+        with open(get_golden_file_path(dati_trasmissione), 'rb') as golden:
+            self.assertEqual(communication.get_export_xml(), golden.read())
+
+    def test_export_xml_dte(self):
+        self._check_export_xml('DTE')
+
+    def test_export_xml_dtr(self):
+        self._check_export_xml('DTR')
+
+    def test_export_xml_ann(self):
+        self._check_export_xml('ANN')
@@ -0,0 +1,122 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from unittest import mock
+
+from odoo.addons.l10n_it_invoices_data_communication.models import \
+    communication as communication_module
+
+from .communication_common import CommunicationCommon
+
+
+class TestSplitCommunication(CommunicationCommon):
+
+    def setUp(self):
+        super().setUp()
+        # Invoices of each partner, in the order they are created
+        self.partner_invoices = []
+        for name, invoices_count in (('A', 5), ('B', 3), ('C', 1)):
+            partner = self._create_partner('Customer %s' % name)
+            self.partner_invoices.append([
+                self._create_invoice(partner)
+                for dummy in range(invoices_count)])
+        self.invoices = self.invoice_model.browse([
+            invoice.id
+            for invoices in self.partner_invoices for invoice in invoices])
+
+    def _patch_limits(self, partners_limit, invoices_limit):
+        patcher = mock.patch.multiple(
+            communication_module,
+            PARTNERS_LIMIT=partners_limit, INVOICES_LIMIT=invoices_limit)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _split(self, communication):
+        """
+        Splits `communication`, identifiers being reserved in the test
+        transaction
+        """
+        first = communication._get_last_identificativo(self.env.cr) + 1
+        with mock.patch.object(
+                communication_module.ComunicazioneDatiIva,
+                '_reserve_identificativi',
+                return_value=first) as reserve:
+            communications = communication.split_communication()
+        if len(communications) > 1:
+            reserve.assert_called_once_with(len(communications) - 1)
+        return communications, first
+
+    def _check_split(self, communications, first, splitting_by):
+        """
+        Every file respects the limits, every invoice is in exactly one
+        file and each copy has its own reserved identifier
+        """
+        invoices_ids = []
+        for communication in communications:
+            sections = communication.fatture_emesse_ids
+            self.assertLessEqual(
+                len(sections), communication_module.PARTNERS_LIMIT)
+            for section in sections:
+                self.assertLessEqual(
+                    len(section.fatture_emesse_body_ids),
+                    communication_module.INVOICES_LIMIT)
+            bodies = sections.mapped('fatture_emesse_body_ids')
+            invoices_ids.extend(bodies.mapped('invoice_id').ids)
+
+            note_lines = communication.splitting_note.split('\n')
+            self.assertEqual(note_lines[0], splitting_by)
+            if splitting_by == "Splitted considering invoices":
+                expected_lines = bodies.mapped('invoice_id.number')
+            else:
+                expected_lines = sections.mapped('partner_id.name')
+            self.assertEqual(sorted(note_lines[1:]), sorted(expected_lines))
+        self.assertEqual(sorted(invoices_ids), sorted(self.invoices.ids))
+
+        self.assertEqual(
+            communications[1:].mapped('identificativo'),
+            list(range(first, first + len(communications) - 1)))
+        self.assertEqual(
+            len(set(communications.mapped('identificativo'))),
+            len(communications))
+
+    def test_plan_partition(self):
+        """
+        Slices of 2 invoices of each partner are grouped by rank, then
+        split every 2 partners
+        """
+        self._patch_limits(2, 2)
+        invoices_a, invoices_b, invoices_c = self.partner_invoices
+        partition = self.communication_model._plan_partition(self.invoices)
+        self.assertEqual([part.ids for part in partition], [
+            [invoice.id for invoice in invoices_a[0:2] + invoices_b[0:2]],
+            [invoice.id for invoice in invoices_c],
+            [invoice.id for invoice in invoices_a[2:4] + invoices_b[2:3]],
+            [invoice.id for invoice in invoices_a[4:5]],
+        ])
+
+    def test_split_communication_invoices(self):
+        communication = self._create_communication('DTE')
+        self.assertEqual(
+            communication.mapped(
+                'fatture_emesse_ids.fatture_emesse_body_ids.invoice_id'),
+            self.invoices)
+        self._patch_limits(2, 2)
+        communications, first = self._split(communication)
+        self.assertEqual(len(communications), 4)
+        self.assertEqual(communications[0], communication)
+        self._check_split(
+            communications, first, "Splitted considering invoices")
+
+    def test_split_communication_partners(self):
+        communication = self._create_communication('DTE')
+        self._patch_limits(2, 5)
+        communications, first = self._split(communication)
+        self.assertEqual(len(communications), 2)
+        self._check_split(
+            communications, first, "Splitted considering partners")
+
+    def test_split_communication_within_limits(self):
+        communication = self._create_communication('DTE')
+        self._patch_limits(3, 5)
+        communications, dummy = self._split(communication)
+        self.assertEqual(communications, communication)
+        self.assertFalse(communication.splitting_note)
@@ -3,3 +3,4 @@
 from . import export_file
 from . import compute_fiscal_document_type
 from . import split_big_communication
+from . import batch_communication
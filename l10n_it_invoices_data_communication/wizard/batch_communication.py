@@ -0,0 +1,194 @@
+
+import base64
+import logging
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import api, fields, models, exceptions, _
+
+_logger = logging.getLogger(__name__)
+
+# Communications computed at the same time, each in its own transaction
+BATCH_WORKERS = 4
+PERIOD_MONTHS = {
+    'month': 1,
+    'quarter': 3,
+}
+
+
+class BatchInvoicesCommunication(models.TransientModel):
+    _name = "wizard.batch.invoices.communication"
+    _description = "Generate invoices data communications in batch"
+
+    company_ids = fields.Many2many(
+        'res.company', string='Companies', required=True,
+        default=lambda self: self.env.user.company_id)
+    date_start = fields.Date(string='Date start', required=True)
+    date_end = fields.Date(string='Date end', required=True)
+    periodicity = fields.Selection(
+        [('month', 'Monthly'),
+         ('quarter', 'Quarterly')],
+        required=True, default='quarter')
+    fatture_emesse = fields.Boolean(string="Customer invoices", default=True)
+    fatture_ricevute = fields.Boolean(string="Supplier bills", default=True)
+    file_export = fields.Binary('File', readonly=True)
+    filename = fields.Char()
+    summary = fields.Text(readonly=True)
+
+    def _get_periods(self):
+        """
+        Splits the wizard dates in calendar months or quarters
+        :return: list of (date start, date end)
+        """
+        self.ensure_one()
+        months = PERIOD_MONTHS[self.periodicity]
+        period_start = self.date_start.replace(
+            month=self.date_start.month - (self.date_start.month - 1) % months,
+            day=1)
+        periods = []
+        while period_start <= self.date_end:
+            next_start = period_start + relativedelta(months=months)
+            periods.append((
+                max(period_start, self.date_start),
+                min(next_start - relativedelta(days=1), self.date_end),
+            ))
+            period_start = next_start
+        return periods
+
+    def _get_batch_communications_vals(self):
+        """
+        Values of a communication for each company, period and kind of
+        transmission. Identifiers are reserved here, as communications are
+        created in separate transactions that can't see each other.
+        """
+        self.ensure_one()
+        dati_trasmissione = []
+        if self.fatture_emesse:
+            dati_trasmissione.append('DTE')
+        if self.fatture_ricevute:
+            dati_trasmissione.append('DTR')
+        vals_list = []
+        for company in self.company_ids:
+            for date_start, date_end in self._get_periods():
+                for transmission in dati_trasmissione:
+                    vals_list.append({
+                        'company_id': company.id,
+                        'date_start': date_start,
+                        'date_end': date_end,
+                        'dati_trasmissione': transmission,
+                    })
+        if vals_list:
+            identificativo = self.env[
+                'comunicazione.dati.iva']._reserve_identificativi(
+                len(vals_list))
+            for vals in vals_list:
+                vals['identificativo'] = identificativo
+                identificativo += 1
+        return vals_list
+
+    def _compute_communication(self, vals):
+        """
+        Creates, computes, splits within the limits of a single file, checks
+        and exports a communication in a new transaction, committed unless
+        an error occurs.
+        Runs in a worker thread: nothing must be read through the wizard
+        environment, whose cursor belongs to the main thread.
+        :return: list of (XML file name, XML file content, errors), one for
+        each resulting communication, empty if no invoice has been found;
+        content is False if the communication has errors and has not been
+        exported
+        """
+        with api.Environment.manage(), self.pool.cursor() as cr:
+            env = api.Environment(cr, self.env.uid, self.env.context)
+            try:
+                communication = env['comunicazione.dati.iva'].create(vals)
+                communication.compute_values()
+                if not communication.fatture_emesse_ids \
+                        and not communication.fatture_ricevute_ids:
+                    cr.rollback()
+                    return []
+                communications = communication.split_communications()
+                communications.check_errors()
+                return [(
+                    comunicazione.get_export_xml_filename(),
+                    not comunicazione.get_errors()
+                    and comunicazione.get_export_xml(),
+                    comunicazione.errors,
+                ) for comunicazione in communications]
+            except Exception as e:
+                _logger.exception(
+                    "Error computing invoices data communication %s", vals)
+                cr.rollback()
+                return [(False, False, getattr(e, 'name', False) or str(e))]
+
+    def _write_batch_export(self, vals_list, results):
+        """
+        Zips the exported files and summarizes the result of each
+        communication in the wizard.
+        :param vals_list: values of the batch communications
+        :param results: results of `_compute_communication` for each values
+        """
+        self.ensure_one()
+        companies = {c.id: c for c in self.company_ids}
+        summary = []
+        output = BytesIO()
+        with zipfile.ZipFile(output, mode='w',
+                             compression=zipfile.ZIP_DEFLATED) as zip_file:
+            for vals, communication_results in zip(vals_list, results):
+                header = '{company} {type} {start} - {end}'.format(
+                    company=companies[vals['company_id']].name,
+                    type=vals['dati_trasmissione'],
+                    start=fields.Date.to_string(vals['date_start']),
+                    end=fields.Date.to_string(vals['date_end']),
+                )
+                if not communication_results:
+                    summary.append(header)
+                    summary.append(_('No invoices found') + '\n')
+                for filename, xml, errors in communication_results:
+                    if filename and xml:
+                        zip_file.writestr(filename, xml)
+                        file_note = ' (%s)' % filename
+                    elif filename:
+                        file_note = ' (%s %s)' % (filename, _('not exported'))
+                    else:
+                        file_note = ''
+                    summary.append(header + file_note)
+                    summary.append(errors + '\n')
+        self.write({
+            'file_export': base64.encodebytes(output.getvalue()),
+            'filename': 'comunicazione_dati_fatture_{start}_{end}.zip'.format(
+                start=fields.Date.to_string(self.date_start),
+                end=fields.Date.to_string(self.date_end)),
+            'summary': '\n'.join(summary),
+        })
+
+    @api.multi
+    def generate(self):
+        self.ensure_one()
+        if not self.fatture_emesse and not self.fatture_ricevute:
+            raise exceptions.UserError(_(
+                'Select customer invoices and/or supplier bills'))
+        if self.date_start > self.date_end:
+            raise exceptions.UserError(_(
+                'Date start must precede date end'))
+        vals_list = self._get_batch_communications_vals()
+        with ThreadPoolExecutor(max_workers=BATCH_WORKERS) as executor:
+            results = list(executor.map(
+                self._compute_communication, vals_list))
+        self._write_batch_export(vals_list, results)
+
+        view = self.env.ref(
+            'l10n_it_invoices_data_communication.'
+            'wizard_batch_invoices_communication_exit')
+        return {
+            'view_type': 'form',
+            'view_id': [view.id],
+            'view_mode': 'form',
+            'res_model': self._name,
+            'res_id': self.id,
+            'type': 'ir.actions.act_window',
+            'target': 'new',
+        }
@@ -18,12 +18,23 @@ class ReportRegistroIva(models.AbstractModel):
         # see addons/account/report/account_balance.py
 
         date_format = data['form']['date_format']
+        moves = self.env['account.move'].browse(data['ids'])
+        form = dict(data['form'])
+        totals_taxes = self.env['account.tax']
+        if form.get('only_totals'):
+            # Moves are not printed: totals are computed for every used tax
+            # at once, without loading moves
+            totals_taxes = self._get_used_taxes(form)
+            form['totals_by_tax'] = totals_taxes._compute_totals_taxes(form)
+        else:
+            # Resolve the invoices of every printed move only once
+            form['invoices_by_move'] = self._get_invoices_by_move(moves)
 
         docargs = {
             'doc_ids': data['ids'],
             'doc_model': self.env['account.move'],
-            'data': data['form'],
-            'docs': self.env['account.move'].browse(data['ids']),
+            'data': form,
+            'docs': moves,
             'get_move': self._get_move,
             'tax_lines': self._get_tax_lines,
             'format_date': self._format_date,
@@ -37,6 +48,7 @@ class ReportRegistroIva(models.AbstractModel):
             'env': self.env,
             'formatLang': formatLang,
             'compute_totals_tax': self._compute_totals_tax,
+            'totals_taxes': totals_taxes,
             'l10n_it_count_fiscal_page_base': data['form']['fiscal_page_base'],
             'only_totals': data['form']['only_totals'],
             'date_format': date_format,
@@ -57,10 +69,104 @@ class ReportRegistroIva(models.AbstractModel):
             formatted_date = my_date.strftime(date_format)
         return formatted_date or ''
 
-    def _get_invoice_from_move(self, move):
+    def _get_invoices_by_move(self, moves):
+        """
+        Returns:
+            A dict {move id: list of invoice ids} for every move in `moves`,
+            computed with one search
+        """
+        invoices_by_move = {move_id: [] for move_id in moves.ids}
+        invoices = self.env['account.invoice'].search([
+            ('move_id', 'in', moves.ids)])
+        for invoice in invoices:
+            invoices_by_move[invoice.move_id.id].append(invoice.id)
+        return invoices_by_move
+
+    def _get_invoice_from_move(self, move, data=None):
+        invoices_by_move = data and data.get('invoices_by_move')
+        if invoices_by_move is not None and move.id in invoices_by_move:
+            return self.env['account.invoice'].browse(
+                invoices_by_move[move.id])
         return self.env['account.invoice'].search([
             ('move_id', '=', move.id)])
 
+    def _get_used_taxes(self, data):
+        """
+        Returns:
+            The taxes printed in the totals of the registry, as they would be
+            collected from moves by `_get_tax_lines`, without loading moves
+            or their lines
+        """
+        line_model = self.env['account.move.line']
+        domain = [
+            ('move_id.date', '>=', data['from_date']),
+            ('move_id.date', '<=', data['to_date']),
+            ('move_id.journal_id', 'in', data['journal_ids']),
+            ('move_id.state', '=', 'posted'),
+        ]
+        tax_ids = {
+            group['tax_line_id'][0] for group in line_model.read_group(
+                domain + [('tax_line_id', '!=', False)],
+                ['tax_line_id'], ['tax_line_id'])
+        }
+        query = line_model._where_calc(domain)
+        line_model._apply_ir_rules(query, 'read')
+        from_clause, where_clause, where_params = query.get_sql()
+        self.env.cr.execute("""
+            SELECT account_move_line.name
+            FROM {from_clause},
+                account_move_line_account_tax_rel rel
+            WHERE {where_clause}
+                AND rel.account_move_line_id = account_move_line.id
+            GROUP BY account_move_line.id
+            HAVING COUNT(*) > 1
+            LIMIT 1
+        """.format(from_clause=from_clause,
+                   where_clause=where_clause or 'TRUE'), where_params)
+        row = self.env.cr.fetchone()
+        if row:
+            raise UserError(
+                _("Move line %s has too many base taxes") % row[0])
+        self.env.cr.execute("""
+            SELECT DISTINCT rel.account_tax_id
+            FROM {from_clause},
+                account_move_line_account_tax_rel rel
+            WHERE {where_clause}
+                AND rel.account_move_line_id = account_move_line.id
+        """.format(from_clause=from_clause,
+                   where_clause=where_clause or 'TRUE'), where_params)
+        tax_ids.update(row[0] for row in self.env.cr.fetchall())
+        used_taxes = self.env['account.tax']
+        for tax in self.env['account.tax'].browse(tax_ids):
+            used_taxes |= self._get_registry_tax(
+                tax, data['registry_type'])[0]
+        return used_taxes
+
+    def _get_registry_tax(self, tax, registry_type):
+        """
+        Returns:
+            A tuple (tax, set_cee_absolute_value): the tax `tax` is printed
+            as in the registry, empty if it is not printed, and whether its
+            amounts are printed as absolute values
+        """
+        set_cee_absolute_value = False
+        if (
+            (registry_type == 'customer' and tax.cee_type == 'sale') or
+            (registry_type == 'supplier' and tax.cee_type == 'purchase')
+        ):
+            set_cee_absolute_value = True
+
+        elif tax.cee_type:
+            return self.env['account.tax'], False
+
+        if tax.parent_tax_ids and len(tax.parent_tax_ids) == 1:
+            # we group by main tax
+            tax = tax.parent_tax_ids[0]
+
+        if tax.exclude_from_registries:
+            return self.env['account.tax'], False
+        return tax, set_cee_absolute_value
+
     def _get_move_line(self, move, data):
         return [move_line for move_line in move.line_ids]
 
@@ -68,7 +174,6 @@ class ReportRegistroIva(models.AbstractModel):
         res = {}
 
         for move_line in move_lines:
-            set_cee_absolute_value = False
             if not(move_line.tax_line_id or move_line.tax_ids):
                 continue
 
@@ -84,20 +189,9 @@ class ReportRegistroIva(models.AbstractModel):
                 tax = move_line.tax_line_id
                 is_base = False
 
-            if (
-                (registry_type == 'customer' and tax.cee_type == 'sale') or
-                (registry_type == 'supplier' and tax.cee_type == 'purchase')
-            ):
-                set_cee_absolute_value = True
-
-            elif tax.cee_type:
-                continue
-
-            if tax.parent_tax_ids and len(tax.parent_tax_ids) == 1:
-                # we group by main tax
-                tax = tax.parent_tax_ids[0]
-
-            if tax.exclude_from_registries:
+            tax, set_cee_absolute_value = self._get_registry_tax(
+                tax, registry_type)
+            if not tax:
                 continue
 
             if not res.get(tax.id):
@@ -149,7 +243,7 @@ class ReportRegistroIva(models.AbstractModel):
         # index è usato per non ripetere la stampa dei dati fattura quando ci
         # sono più codici IVA
         index = 0
-        invoice = self._get_invoice_from_move(move)
+        invoice = self._get_invoice_from_move(move, data)
         if 'refund' in move.move_type:
             invoice_type = "NC"
         else:
@@ -217,4 +311,7 @@ class ReportRegistroIva(models.AbstractModel):
             A tuple: (tax_name, base, tax, deductible, undeductible)
 
         """
+        totals_by_tax = data.get('totals_by_tax')
+        if totals_by_tax and tax.id in totals_by_tax:
+            return totals_by_tax[tax.id]
         return tax._compute_totals_tax(data)
@@ -0,0 +1,173 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from datetime import date
+from unittest import mock
+
+from odoo.tests.common import SavepointCase, tagged
+
+_logger = logging.getLogger(__name__)
+
+REPORT_NAME = 'l10n_it_vat_registries.report_registro_iva'
+
+
+def get_env_int(name, default):
+    return int(os.environ.get(name) or default)
+
+
+@tagged('-standard', 'vat_registries_benchmark')
+class TestVatRegistriesBenchmark(SavepointCase):
+    """
+    Measures wall time and SQL queries of rendering a VAT registry
+    over synthetic invoices.
+
+    Not run by default: use `--test-tags vat_registries_benchmark`.
+    The number of invoices is read from environment variable
+    VAT_REGISTRIES_BENCHMARK_INVOICES (default 200).
+    If VAT_REGISTRIES_BENCHMARK_OUTPUT is set, results are dumped there as
+    JSON.
+    If VAT_REGISTRIES_BENCHMARK_BASELINE is set, it must point to such a
+    JSON file: every operation fails if its SQL queries exceed the baseline
+    ones by more than VAT_REGISTRIES_BENCHMARK_TOLERANCE percent
+    (default 10).
+    """
+
+    results = {}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.registry_date = date(2019, 1, 31)
+        account_model = cls.env['account.account']
+        journal = cls.env['account.journal'].search([
+            ('type', '=', 'sale'),
+            ('company_id', '=', cls.env.user.company_id.id),
+        ], limit=1)
+        receivable_account = account_model.search([
+            ('user_type_id', '=',
+             cls.env.ref('account.data_account_type_receivable').id),
+        ], limit=1)
+        revenue_account = account_model.search([
+            ('user_type_id', '=',
+             cls.env.ref('account.data_account_type_revenue').id),
+        ], limit=1)
+        tax_account = account_model.search([
+            ('user_type_id', '=',
+             cls.env.ref('account.data_account_type_current_liabilities').id),
+        ], limit=1)
+        tax = cls.env['account.tax'].create({
+            'name': "Benchmark Tax 22%",
+            'type_tax_use': 'sale',
+            'amount': 22,
+            'account_id': tax_account.id,
+        })
+        partner = cls.env.ref('base.res_partner_2')
+        cls.invoices = cls.env['account.invoice']
+        for num in range(get_env_int('VAT_REGISTRIES_BENCHMARK_INVOICES',
+                                     200)):
+            cls.invoices |= cls.invoices.create({
+                'partner_id': partner.id,
+                'date_invoice': cls.registry_date,
+                'account_id': receivable_account.id,
+                'type': 'out_invoice',
+                'journal_id': journal.id,
+                'invoice_line_ids': [(0, 0, {
+                    'name': "Benchmark %d" % num,
+                    'quantity': 1.0,
+                    'price_unit': 100.0 + num,
+                    'account_id': revenue_account.id,
+                    'invoice_line_tax_ids': [(6, 0, tax.ids)],
+                })],
+            })
+        cls.invoices.action_invoice_open()
+
+        tax_registry = cls.env['account.tax.registry'].create({
+            'name': "Benchmark Sales",
+            'layout_type': 'customer',
+            'journal_ids': [(6, 0, journal.ids)],
+        })
+        cls.wizard = cls.env['wizard.registro.iva'].create({
+            'from_date': cls.registry_date,
+            'to_date': cls.registry_date,
+            'tax_registry_id': tax_registry.id,
+            'layout_type': 'customer',
+            'fiscal_page_base': 0,
+        })
+        cls.wizard.on_change_tax_registry_id()
+        cls.report = cls.env['ir.actions.report']._get_report_from_name(
+            REPORT_NAME)
+        # Templates are compiled once, out of any measure
+        cls.render_registry(cls.wizard)
+
+    @classmethod
+    def tearDownClass(cls):
+        output = os.environ.get('VAT_REGISTRIES_BENCHMARK_OUTPUT')
+        if output:
+            with open(output, 'w') as output_file:
+                json.dump(cls.results, output_file, indent=4, sort_keys=True)
+        super().tearDownClass()
+
+    @classmethod
+    def render_registry(cls, wizard):
+        data = wizard.print_registro()['data']
+        return cls.report.render_qweb_html(data['ids'], data)
+
+    @contextmanager
+    def benchmark(self, operation):
+        self.env.invalidate_all()
+        queries = self.cr.sql_log_count
+        start = time.perf_counter()
+        yield
+        wall_time = time.perf_counter() - start
+        queries = self.cr.sql_log_count - queries
+
+        result = {
+            'invoices': len(self.invoices),
+            'queries': queries,
+            'wall_time': wall_time,
+        }
+        self.results[operation] = result
+        _logger.info(
+            "VAT registries benchmark: %s on %d invoices: %.3fs, %d queries",
+            operation, len(self.invoices), wall_time, queries,
+        )
+        self.check_baseline(operation, result)
+
+    def check_baseline(self, operation, result):
+        baseline_path = os.environ.get('VAT_REGISTRIES_BENCHMARK_BASELINE')
+        if not baseline_path:
+            return
+        with open(baseline_path) as baseline_file:
+            baseline = json.load(baseline_file).get(operation)
+        if not baseline:
+            return
+        tolerance = get_env_int('VAT_REGISTRIES_BENCHMARK_TOLERANCE', 10)
+        max_queries = baseline['queries'] * (100 + tolerance) / 100
+        self.assertLessEqual(
+            result['queries'], max_queries,
+            "%s: %d queries, baseline is %d"
+            % (operation, result['queries'], baseline['queries'])
+        )
+
+    def test_render_registry(self):
+        with self.benchmark('render_registry'):
+            self.render_registry(self.wizard)
+
+    def test_render_registry_without_invoices_by_move(self):
+        """ Invoices are searched for each move, as before they were
+        resolved once per registry """
+        registry_report = self.env['report.%s' % REPORT_NAME]
+        with mock.patch.object(
+                type(registry_report), '_get_invoices_by_move',
+                return_value=None):
+            with self.benchmark('render_registry_without_invoices_by_move'):
+                self.render_registry(self.wizard)
+
+    def test_render_registry_only_totals(self):
+        self.wizard.only_totals = True
+        with self.benchmark('render_registry_only_totals'):
+            self.render_registry(self.wizard)
@@ -76,3 +76,31 @@ class TestRegistry(AccountingTestCase):
         html = report.render_qweb_html(res['data']['ids'], res['data'])
 
         self.assertTrue(b'Tax 10.0' in html[0])
+
+        # Invoices are resolved once per registry, not once per move
+        registry_report = self.env[
+            'report.l10n_it_vat_registries.report_registro_iva']
+        move = invoice.move_id
+        invoices_by_move = registry_report._get_invoices_by_move(move)
+        self.assertEqual(invoices_by_move, {move.id: invoice.ids})
+        queries_count = self.cr.sql_log_count
+        move_invoice = registry_report._get_invoice_from_move(
+            move, {'invoices_by_move': invoices_by_move})
+        self.assertEqual(self.cr.sql_log_count, queries_count)
+        self.assertEqual(move_invoice, invoice)
+
+        # Totals only registry is computed without loading moves
+        wizard.only_totals = True
+        res = wizard.print_registro()
+        self.assertFalse(res['data']['ids'])
+        html = report.render_qweb_html(res['data']['ids'], res['data'])
+        self.assertTrue(b'Tax 10.0' in html[0])
+        totals_data = {
+            'from_date': test_date,
+            'to_date': test_date,
+            'journal_ids': self.journal.ids,
+            'registry_type': 'supplier',
+        }
+        self.assertEqual(
+            tax._compute_totals_taxes(totals_data)[tax.id],
+            tax._compute_totals_tax(totals_data))
@@ -63,7 +63,11 @@ class WizardRegistroIva(models.TransientModel):
         if not wizard.journal_ids:
             raise UserError(_('No journals found in the current selection.\n'
                               'Please load them before to retry!'))
-        move_ids = self._get_move_ids(wizard)
+        if wizard.only_totals:
+            # Totals are computed by the report without loading moves
+            move_ids = []
+        else:
+            move_ids = self._get_move_ids(wizard)
 
         datas_form = {}
         datas_form['from_date'] = wizard.from_date